@@ -0,0 +1,157 @@
+import asyncio
+import datetime
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import feedparser
+
+from app.adapters.url_canonical import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Where feed parsing runs: "process" (default, keeps the event loop and the GIL free),
+# "thread", or "inline" (in the event loop, only useful for debugging)
+FEED_PARSER_EXECUTOR = os.getenv("FEED_PARSER_EXECUTOR", "process")
+FEED_PARSER_WORKERS = int(os.getenv("FEED_PARSER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor: Optional[Executor] = None
+_executor_kind: Optional[str] = None
+
+
+_UPDATE_PERIOD_SECONDS = {
+    "hourly": 3600,
+    "daily": 86400,
+    "weekly": 604800,
+    "monthly": 2592000,
+    "yearly": 31536000,
+}
+
+
+def parse_feed_hints(feed_info) -> dict:
+    """
+    Read the publisher's polling hints from the channel metadata:
+    RSS `<ttl>` (minutes) and `sy:updatePeriod` / `sy:updateFrequency`.
+    """
+    hints = {"ttl_seconds": None, "update_period_seconds": None}
+    try:
+        ttl = feed_info.get("ttl")
+        if ttl:
+            hints["ttl_seconds"] = int(ttl) * 60
+    except (TypeError, ValueError):
+        pass
+    try:
+        period = feed_info.get("sy_updateperiod")
+        if period and str(period).strip().lower() in _UPDATE_PERIOD_SECONDS:
+            frequency = int(feed_info.get("sy_updatefrequency") or 1)
+            hints["update_period_seconds"] = _UPDATE_PERIOD_SECONDS[str(period).strip().lower()] // max(frequency, 1)
+    except (TypeError, ValueError):
+        pass
+    return hints
+
+
+def entry_canonical_url(entry) -> str:
+    """Dedup key for an entry, preferring the publisher's <link rel="canonical"> or FeedBurner's original link."""
+    for link in getattr(entry, "links", None) or []:
+        if link.get("rel") == "canonical" and link.get("href"):
+            return canonicalize_url(link["href"])
+    return canonicalize_url(getattr(entry, "feedburner_origlink", None) or entry.link)
+
+
+def parse_feed(text: str, limit: int = 20) -> dict:
+    """
+    Parse one feed body and normalize its entries into compact article records.
+
+    Runs in a worker process or thread, so it only returns plain, picklable data:
+    the article dicts, the entries' publish times and the feed's polling hints.
+    """
+    feed = feedparser.parse(text)
+    articles = []
+    published_times = []
+    for entry in feed.entries[:limit]:
+        published = None
+        if getattr(entry, "published_parsed", None):
+            published_dt = datetime.datetime(*entry.published_parsed[:6])
+            published_times.append(published_dt)
+            published = published_dt.isoformat()
+
+        # Extract image from various RSS fields
+        image_url = None
+        if hasattr(entry, 'media_content') and entry.media_content:
+            image_url = entry.media_content[0].get('url')
+        elif hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
+            image_url = entry.media_thumbnail[0].get('url')
+        elif hasattr(entry, 'enclosures') and entry.enclosures:
+            for enclosure in entry.enclosures:
+                if enclosure.get('type', '').startswith('image/'):
+                    image_url = enclosure.get('url')
+                    break
+        elif hasattr(entry, 'links') and entry.links:
+            for link in entry.links:
+                if link.get('type', '').startswith('image/'):
+                    image_url = link.get('href')
+                    break
+
+        # Extract summary/description/content
+        summary = getattr(entry, "summary", None)
+        if not summary:
+            summary = getattr(entry, "description", None)
+        if not summary and hasattr(entry, "content") and entry.content:
+            # content is usually a list of dicts with 'value'
+            summary = entry.content[0].get('value') if isinstance(entry.content, list) and 'value' in entry.content[0] else None
+        if not summary and hasattr(entry, "content_encoded"):
+            summary = getattr(entry, "content_encoded", None)
+        if not summary:
+            summary = ""
+
+        articles.append(
+            {
+                "title": entry.title,
+                "url": entry.link,
+                "canonical_url": entry_canonical_url(entry),
+                "source": feed.feed.get("title", "RSS"),
+                "published_at": published,
+                "summary": summary,
+                "source_type": "rss",  # Mark as RSS source for tracking
+                "image_url": image_url  # Extract image from RSS
+            }
+        )
+    return {"articles": articles, "published": published_times, **parse_feed_hints(feed.feed)}
+
+
+def get_parser_executor() -> Optional[Executor]:
+    """Return the shared parser pool, creating it on first use (None when parsing inline)."""
+    global _executor, _executor_kind
+    if FEED_PARSER_EXECUTOR == "inline":
+        return None
+    if _executor is None or _executor_kind != FEED_PARSER_EXECUTOR:
+        shutdown_parser_executor()
+        if FEED_PARSER_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=FEED_PARSER_WORKERS, thread_name_prefix="feed-parser")
+        else:
+            # spawn: workers only import this module, never the app's threads or sockets
+            _executor = ProcessPoolExecutor(
+                max_workers=FEED_PARSER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        _executor_kind = FEED_PARSER_EXECUTOR
+        logger.info(f"Started {FEED_PARSER_EXECUTOR} feed parser pool with {FEED_PARSER_WORKERS} workers")
+    return _executor
+
+
+async def parse_feed_async(text: str, limit: int = 20) -> dict:
+    """Parse a feed off the event loop on the configured executor."""
+    executor = get_parser_executor()
+    if executor is None:
+        return parse_feed(text, limit)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, parse_feed, text, limit)
+
+
+def shutdown_parser_executor():
+    global _executor, _executor_kind
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _executor_kind = None
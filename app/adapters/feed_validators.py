@@ -0,0 +1,109 @@
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import FeedValidator
+
+logger = logging.getLogger(__name__)
+
+
+def body_hash(text: str) -> str:
+    """Fingerprint a feed body so unchanged responses can be skipped without parsing."""
+    return hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+class FeedValidatorStore:
+    """
+    Per-feed ETag / Last-Modified / body hash cache.
+
+    Lookups and updates happen in memory during a fetch cycle; `load` and
+    `save` persist the validators in the `feed_validators` table so they
+    survive restarts. `discard` rolls a feed back to its last saved
+    validators, for feeds whose articles could not be stored.
+    """
+
+    def __init__(self):
+        self._validators: Dict[str, dict] = {}
+        self._saved: Dict[str, dict] = {}
+        self._dirty = set()
+        self.loaded = False
+
+    def get(self, feed_url: str) -> Optional[dict]:
+        return self._validators.get(feed_url)
+
+    def conditional_headers(self, feed_url: str) -> dict:
+        """Build If-None-Match / If-Modified-Since headers for a feed, if we have validators."""
+        headers = {}
+        cached = self._validators.get(feed_url)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    def update(self, feed_url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+               body_hash: Optional[str] = None):
+        cached = self._validators.setdefault(feed_url, {})
+        # Keep previous validators when a response omits them (e.g. on 304)
+        if etag:
+            cached["etag"] = etag
+        if last_modified:
+            cached["last_modified"] = last_modified
+        if body_hash:
+            cached["body_hash"] = body_hash
+        self._dirty.add(feed_url)
+
+    def discard(self, feed_urls: Iterable[str]):
+        """Forget unsaved updates, so the next fetch downloads and parses these feeds again."""
+        for feed_url in feed_urls:
+            if feed_url in self._saved:
+                self._validators[feed_url] = dict(self._saved[feed_url])
+            else:
+                self._validators.pop(feed_url, None)
+            self._dirty.discard(feed_url)
+
+    def clear(self):
+        self._validators.clear()
+        self._saved.clear()
+        self._dirty.clear()
+        self.loaded = False
+
+    def load(self, db: Session):
+        """Load persisted validators from the database."""
+        for row in db.query(FeedValidator).all():
+            self._validators[row.feed_url] = {
+                "etag": row.etag,
+                "last_modified": row.last_modified,
+                "body_hash": row.body_hash,
+            }
+            self._saved[row.feed_url] = dict(self._validators[row.feed_url])
+        self.loaded = True
+        logger.info(f"Loaded cache validators for {len(self._validators)} feeds")
+
+    def save(self, db: Session):
+        """Persist validators that changed since the last save."""
+        if not self._dirty:
+            return
+        now = datetime.utcnow()
+        for feed_url in self._dirty:
+            cached = self._validators.get(feed_url, {})
+            db.merge(
+                FeedValidator(
+                    feed_url=feed_url,
+                    etag=cached.get("etag"),
+                    last_modified=cached.get("last_modified"),
+                    body_hash=cached.get("body_hash"),
+                    checked_at=now,
+                )
+            )
+        db.commit()
+        for feed_url in self._dirty:
+            self._saved[feed_url] = dict(self._validators.get(feed_url, {}))
+        self._dirty.clear()
+
+
+validator_store = FeedValidatorStore()
@@ -0,0 +1,116 @@
+import asyncio
+import importlib.util
+import logging
+import os
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Pool settings for the shared outbound client used by all adapters
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "50"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "600"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "6"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+USER_AGENT = "NewsNest/1.0 (+https://github.com/Newsnest1/News-Nest1)"
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class HostLimitedClient(httpx.AsyncClient):
+    """
+    AsyncClient that caps concurrent requests per host, whatever the method or caller
+    (RSS feeds, NewsAPI, MeiliSearch). A request holds its host's slot until its response
+    is read; redirects are followed within the slot of the first host. Streamed responses
+    (none in this app) would release it once the headers arrive.
+    """
+
+    def __init__(self, *args, max_connections_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_connections_per_host = max_connections_per_host
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        async with self._host_semaphore(request.url.host):
+            return await super().send(request, **kwargs)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 support in httpx needs the optional `h2` package."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _build_client() -> HostLimitedClient:
+    http2 = HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed; falling back to HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return HostLimitedClient(
+        limits=limits,
+        timeout=HTTP_TIMEOUT,
+        http2=http2,
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the application-scoped HTTP client, creating it on first use.
+    Connections are kept alive and reused across feed update cycles.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        # A client is tied to the event loop it was created on, so a new loop
+        # (e.g. a fresh asyncio.run in scripts or tests) gets a new client.
+        if _client is not None and not _client.is_closed:
+            _close_on_old_loop(_client, _client_loop)
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+def _close_on_old_loop(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+    """
+    Close a client left behind by another event loop. Its connections can only be closed
+    on that loop: if it still runs (another thread), the close is scheduled there. A loop
+    that has finished can no longer run the close, and its pooled sockets are closed when
+    the client is garbage-collected, so they are only dropped here.
+    """
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    else:
+        logger.debug("Dropping the HTTP client of a finished event loop")
+
+
+async def fetch(url, **kwargs) -> httpx.Response:
+    """GET `url` through the shared client (which caps concurrent requests per host)."""
+    return await get_http_client().get(url, **kwargs)
+
+
+async def close_http_client():
+    """Close the shared client and release its pooled connections."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
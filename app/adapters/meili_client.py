@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.adapters.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+MEILI_URL = os.getenv("MEILI_URL", "http://search:7700")
+MEILI_MASTER_KEY = os.getenv("MEILI_MASTER_KEY", "a_master_key")
+# Searches sit on the request path, so they get a tight budget; indexing calls carry
+# multi-megabyte payloads and get a looser one
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "2"))
+MEILI_TIMEOUT = float(os.getenv("MEILI_TIMEOUT", "30"))
+SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", "2"))
+SEARCH_RETRY_BACKOFF = float(os.getenv("SEARCH_RETRY_BACKOFF", "0.05"))
+
+# Transport errors raised before the request reached MeiliSearch, so any call can be retried
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class MeiliError(Exception):
+    """An error response from MeiliSearch, or a request that could not be completed."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, code: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+class AsyncMeiliClient:
+    """
+    MeiliSearch REST client on the shared pooled httpx client.
+
+    Calls never block the event loop and reuse keep-alive connections. Idempotent
+    calls (searches, reads, document upserts and deletes) are retried with backoff on
+    transport errors, 429 and 5xx responses; index-level writes only when the request
+    never left the pool.
+    """
+
+    def __init__(self, url: str = MEILI_URL, api_key: str = MEILI_MASTER_KEY,
+                 search_timeout: float = SEARCH_TIMEOUT, timeout: float = MEILI_TIMEOUT,
+                 max_retries: int = SEARCH_MAX_RETRIES, retry_backoff: float = SEARCH_RETRY_BACKOFF,
+                 http: Optional[httpx.AsyncClient] = None):
+        self.url = url.rstrip("/")
+        self.api_key = api_key
+        self.search_timeout = search_timeout
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._http = http
+
+    async def request(self, method: str, path: str, *, idempotent: bool = True, timeout: Optional[float] = None,
+                      headers: Optional[Dict[str, str]] = None, **kwargs) -> Any:
+        """Send a request and return the decoded JSON body (None for an empty one)."""
+        http = self._http or get_http_client()
+        headers = {"Authorization": f"Bearer {self.api_key}", **(headers or {})}
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                response = await http.request(
+                    method, self.url + path, headers=headers, timeout=timeout or self.timeout, **kwargs
+                )
+            except httpx.TransportError as e:
+                if attempt == self.max_retries or not (idempotent or isinstance(e, _NOT_SENT)):
+                    raise MeiliError(f"{method} {path} failed: {e!r}") from e
+                logger.warning(f"MeiliSearch {method} {path} attempt {attempt + 1} failed: {e!r}")
+                continue
+            if response.status_code < 400:
+                return response.json() if response.content else None
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if not (idempotent and retryable) or attempt == self.max_retries:
+                raise self._error(method, path, response)
+            logger.warning(f"MeiliSearch {method} {path} attempt {attempt + 1} returned {response.status_code}")
+
+    @staticmethod
+    def _error(method: str, path: str, response: httpx.Response) -> MeiliError:
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        message = body.get("message") if isinstance(body, dict) else None
+        return MeiliError(
+            f"{method} {path} returned {response.status_code}: {message or response.text[:200]}",
+            status_code=response.status_code,
+            code=body.get("code") if isinstance(body, dict) else None,
+        )
+
+    async def search(self, index: str, query: str, **params) -> dict:
+        body = {"q": query, **params}
+        return await self.request("POST", f"/indexes/{index}/search", json=body, timeout=self.search_timeout)
+
+    async def get_task(self, uid: int) -> dict:
+        return await self.request("GET", f"/tasks/{uid}")
+
+    async def add_documents_ndjson(self, index: str, payload: bytes, primary_key: str = "id") -> dict:
+        return await self.request(
+            "POST", f"/indexes/{index}/documents", params={"primaryKey": primary_key},
+            content=payload, headers={"Content-Type": "application/x-ndjson"},
+        )
+
+    async def delete_documents(self, index: str, ids: List[str]) -> dict:
+        return await self.request("POST", f"/indexes/{index}/documents/delete-batch", json=ids)
+
+    async def get_settings(self, index: str) -> dict:
+        return await self.request("GET", f"/indexes/{index}/settings")
+
+    async def update_settings(self, index: str, settings: dict) -> dict:
+        return await self.request("PATCH", f"/indexes/{index}/settings", json=settings)
+
+    async def get_stats(self, index: str) -> dict:
+        return await self.request("GET", f"/indexes/{index}/stats")
+
+    async def list_indexes(self, limit: int = 1000) -> List[dict]:
+        return (await self.request("GET", "/indexes", params={"limit": limit}))["results"]
+
+    async def create_index(self, uid: str, primary_key: str = "id") -> dict:
+        return await self.request("POST", "/indexes", json={"uid": uid, "primaryKey": primary_key}, idempotent=False)
+
+    async def delete_index(self, uid: str) -> dict:
+        return await self.request("DELETE", f"/indexes/{uid}", idempotent=False)
+
+    async def swap_indexes(self, pairs: List[List[str]]) -> dict:
+        body = [{"indexes": list(pair)} for pair in pairs]
+        return await self.request("POST", "/swap-indexes", json=body, idempotent=False)
+
+
+meili_client = AsyncMeiliClient()
@@ -1,7 +1,18 @@
 import asyncio
 import datetime
+import logging
+import math
 import os
+from typing import List, Optional
+
 import httpx
+from sqlalchemy.orm import Session
+
+from app.adapters.http_client import get_http_client
+from app.adapters.url_canonical import canonicalize_url
+from app.database import NewsAPIUsage
+
+logger = logging.getLogger(__name__)
 
 NEWSAPI_ENDPOINT = "https://newsapi.org/v2/top-headlines"
 NEWSAPI_CATEGORIES = ["technology", "business", "sports", "science", "health", "entertainment", "general"]
@@ -31,95 +42,237 @@ NEWSAPI_SOURCES = [
     "science",              # Science Magazine
 ]
 
-async def fetch_category(session, category, api_key, limit):
-    """Fetches articles for a single category."""
-    params = {
-        "country": "us",
+# NewsAPI limits: at most 100 results per page and 20 source ids per request
+NEWSAPI_MAX_PAGE_SIZE = 100
+NEWSAPI_MAX_SOURCES_PER_REQUEST = 20
+# Requests allowed per UTC day by the plan (the free developer plan allows 100)
+NEWSAPI_DAILY_QUOTA = int(os.getenv("NEWSAPI_DAILY_QUOTA", "100"))
+# Requests one fetch cycle may spend, pages included; defaults to one request per category
+# and source, what fetching each of them separately used to cost
+NEWSAPI_MAX_REQUESTS_PER_CYCLE = int(
+    os.getenv("NEWSAPI_MAX_REQUESTS_PER_CYCLE", str(len(NEWSAPI_CATEGORIES) + len(NEWSAPI_SOURCES)))
+)
+
+
+class NewsAPIQuota:
+    """
+    Tracks how many NewsAPI requests are left in the current UTC day.
+
+    Requests are counted in memory; `load` and `save` persist the day's count in the
+    `newsapi_usage` table, so restarts do not hand out the day's budget again.
+    """
+
+    def __init__(self, daily_limit: int = NEWSAPI_DAILY_QUOTA, today=lambda: datetime.datetime.utcnow().date()):
+        self.daily_limit = daily_limit
+        self._today = today
+        self._day = today()
+        self.used = 0
+        self.loaded = False
+
+    def _roll_over(self):
+        if self._today() != self._day:
+            self._day = self._today()
+            self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        self._roll_over()
+        return max(self.daily_limit - self.used, 0)
+
+    def try_consume(self) -> bool:
+        """Reserve one request; returns False once the day's budget is spent."""
+        if self.remaining <= 0:
+            return False
+        self.used += 1
+        return True
+
+    def exhaust(self):
+        """Mark the budget as spent, e.g. after NewsAPI answers 429 rateLimited."""
+        self._roll_over()
+        self.used = self.daily_limit
+
+    def load(self, db: Session):
+        """Pick up the requests already made today, e.g. before a restart."""
+        self._roll_over()
+        row = db.get(NewsAPIUsage, self._day)
+        if row is not None:
+            self.used = max(self.used, row.used)
+        self.loaded = True
+
+    def save(self, db: Session):
+        """Persist today's count."""
+        self._roll_over()
+        db.merge(NewsAPIUsage(day=self._day, used=self.used))
+        db.commit()
+
+
+newsapi_quota = NewsAPIQuota()
+
+
+def plan_requests(limit: int, categories: List[str] = None, sources: List[str] = None) -> List[dict]:
+    """
+    Pack the configured categories and sources into the fewest NewsAPI calls.
+
+    Categories cannot be combined, so each gets its own request; sources are
+    sent as comma-separated batches of up to 20. `wanted` is the number of
+    results to page through for the request (`limit` per category or source).
+    """
+    categories = NEWSAPI_CATEGORIES if categories is None else categories
+    sources = NEWSAPI_SOURCES if sources is None else sources
+
+    plan = [
+        {"params": {"country": "us", "category": category}, "category": category.capitalize(), "wanted": limit}
+        for category in categories
+    ]
+    for i in range(0, len(sources), NEWSAPI_MAX_SOURCES_PER_REQUEST):
+        batch = sources[i:i + NEWSAPI_MAX_SOURCES_PER_REQUEST]
+        plan.append({
+            "params": {"sources": ",".join(batch)},
+            "sources": batch,
+            "category": "General",
+            "wanted": limit * len(batch),
+        })
+    return plan
+
+
+def allocate_pages(plan: List[dict], budget: int) -> List[int]:
+    """
+    Pages each planned request may fetch so the cycle makes at most `budget` requests.
+    Every request gets its first page before any request gets a second; the rest of
+    the budget is then shared out one page at a time.
+    """
+    needed = [math.ceil(r["wanted"] / min(NEWSAPI_MAX_PAGE_SIZE, r["wanted"])) if r["wanted"] > 0 else 0 for r in plan]
+    pages = [0] * len(plan)
+    budget = max(budget, 0)
+    while budget > 0 and pages != needed:
+        for i, need in enumerate(needed):
+            if budget > 0 and pages[i] < need:
+                pages[i] += 1
+                budget -= 1
+    return pages
+
+
+def _to_article(item: dict, category: str, native: bool = False) -> dict:
+    return {
+        "title": item["title"],
+        "url": item["url"],
+        "canonical_url": canonicalize_url(item["url"]),
+        "source": item["source"]["name"],
+        "published_at": item.get("publishedAt", datetime.datetime.utcnow().isoformat()),
+        "summary": item.get("description") or "",
         "category": category,
-        "pageSize": limit,
-        "apiKey": api_key,
+        # Only category requests carry NewsAPI's own label; it trains the text classifier
+        "native_category": category if native else None,
+        "source_type": "newsapi",  # Mark as NewsAPI source for tracking
+        "image_url": item.get("urlToImage")  # Extract image from NewsAPI
     }
-    try:
-        r = await session.get(NEWSAPI_ENDPOINT, params=params)
-        r.raise_for_status()
+
+
+async def _fetch_pages(session, params: dict, api_key: str, wanted: int, quota: NewsAPIQuota,
+                       max_pages: Optional[int] = None) -> List[dict]:
+    """
+    Page through one planned request until `wanted` items, the last page, `max_pages`
+    or the quota is reached. An error on a later page (e.g. 426 maximumResultsReached)
+    keeps the pages already fetched; an error on the first page is raised.
+    """
+    items = []
+    page = 1
+    page_size = min(NEWSAPI_MAX_PAGE_SIZE, wanted)
+    while len(items) < wanted and (max_pages is None or page <= max_pages):
+        if not quota.try_consume():
+            logger.warning("NewsAPI request budget spent for today, skipping remaining requests")
+            break
+        r = await session.get(
+            NEWSAPI_ENDPOINT,
+            params={**params, "pageSize": page_size, "page": page, "apiKey": api_key},
+            timeout=30,
+        )
+        if r.status_code == 429:
+            logger.warning("NewsAPI rate limit reached, pausing until the quota resets")
+            quota.exhaust()
+            break
+        try:
+            r.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            if not items:
+                raise
+            logger.warning(f"NewsAPI page {page} failed ({e.response.status_code}), keeping {len(items)} results")
+            break
         data = r.json()
-        articles = []
-        for item in data.get("articles", []):
-            articles.append(
-                {
-                    "title": item["title"],
-                    "url": item["url"],
-                    "source": item["source"]["name"],
-                    "published_at": item.get("publishedAt", datetime.datetime.utcnow().isoformat()),
-                    "summary": item.get("description") or "",
-                    "category": category.capitalize(),  # Use NewsAPI's built-in category
-                    "source_type": "newsapi",  # Mark as NewsAPI source for tracking
-                    "image_url": item.get("urlToImage")  # Extract image from NewsAPI
-                }
-            )
-        return articles
+        batch = data.get("articles", [])
+        items.extend(batch)
+        total = data.get("totalResults", len(items))
+        if len(batch) < page_size or page * page_size >= total:
+            break
+        page += 1
+    return items[:wanted]
+
+
+async def fetch_category(session, category, api_key, limit, quota: NewsAPIQuota = None,
+                         max_pages: Optional[int] = None):
+    """Fetches articles for a single category."""
+    quota = quota or newsapi_quota
+    try:
+        items = await _fetch_pages(
+            session, {"country": "us", "category": category}, api_key, limit, quota, max_pages
+        )
+        # Use NewsAPI's built-in category
+        return [_to_article(item, category.capitalize(), native=True) for item in items]
     except httpx.HTTPStatusError as e:
-        print(f"Error fetching NewsAPI category {category}: {e}")
+        logger.error(f"Error fetching NewsAPI category {category}: {e}")
         return []
 
-async def fetch_source(session, source, api_key, limit):
-    """Fetches articles from a specific source."""
-    params = {
-        "sources": source,
-        "pageSize": limit,
-        "apiKey": api_key,
-    }
+
+async def fetch_sources(session, sources, api_key, limit, quota: NewsAPIQuota = None,
+                        max_pages: Optional[int] = None):
+    """Fetches up to `limit` articles per source for a batch of sources in one paginated request."""
+    quota = quota or newsapi_quota
     try:
-        r = await session.get(NEWSAPI_ENDPOINT, params=params)
-        r.raise_for_status()
-        data = r.json()
-        articles = []
-        for item in data.get("articles", []):
-            articles.append(
-                {
-                    "title": item["title"],
-                    "url": item["url"],
-                    "source": item["source"]["name"],
-                    "published_at": item.get("publishedAt", datetime.datetime.utcnow().isoformat()),
-                    "summary": item.get("description") or "",
-                    "category": "General",  # Default category for source-based articles
-                    "source_type": "newsapi",  # Mark as NewsAPI source for tracking
-                    "image_url": item.get("urlToImage")  # Extract image from NewsAPI
-                }
-            )
-        return articles
+        items = await _fetch_pages(
+            session, {"sources": ",".join(sources)}, api_key, limit * len(sources), quota, max_pages
+        )
+        # Default category for source-based articles
+        return [_to_article(item, "General") for item in items]
     except httpx.HTTPStatusError as e:
-        print(f"Error fetching NewsAPI source {source}: {e}")
+        logger.error(f"Error fetching NewsAPI sources {','.join(sources)}: {e}")
         return []
 
-async def fetch_newsapi_articles(limit: int = 20):
+
+async def fetch_newsapi_articles(limit: int = 20, quota: NewsAPIQuota = None):
     api_key = os.getenv("NEWSAPI_KEY")
     if not api_key:
         return []
+    quota = quota or newsapi_quota
+
+    client = get_http_client()
+    plan = plan_requests(limit)
+    # First pages for every request come before deeper pages of any one request
+    pages = allocate_pages(plan, min(NEWSAPI_MAX_REQUESTS_PER_CYCLE, quota.remaining))
+    tasks = []
+    for request, max_pages in zip(plan, pages):
+        if not max_pages:
+            continue
+        if "sources" in request:
+            tasks.append(fetch_sources(client, request["sources"], api_key, limit, quota, max_pages))
+        else:
+            tasks.append(fetch_category(client, request["params"]["category"], api_key, limit, quota, max_pages))
+    used_before = quota.used
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    logger.info(f"NewsAPI cycle used {quota.used - used_before} requests, {quota.remaining} left today")
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        # Fetch from categories
-        category_tasks = [fetch_category(client, category, api_key, limit) for category in NEWSAPI_CATEGORIES]
-        
-        # Fetch from specific sources
-        source_tasks = [fetch_source(client, source, api_key, limit) for source in NEWSAPI_SOURCES]
-        
-        # Combine all tasks
-        all_tasks = category_tasks + source_tasks
-        results = await asyncio.gather(*all_tasks, return_exceptions=True)
-        
     # Flatten the list of lists into a single list of articles
     all_articles = []
     for result in results:
         if isinstance(result, list):  # Skip exceptions
             all_articles.extend(result)
     
-    # Deduplicate articles based on URL, keeping the first one seen
+    # Deduplicate articles based on canonical URL, keeping the first one seen
     unique_articles = []
     seen_urls = set()
     for article in all_articles:
-        if article["url"] not in seen_urls:
+        key = article.get("canonical_url") or canonicalize_url(article["url"])
+        if key not in seen_urls:
             unique_articles.append(article)
-            seen_urls.add(article["url"])
+            seen_urls.add(key)
             
     return unique_articles
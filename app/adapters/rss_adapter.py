@@ -1,8 +1,12 @@
 import asyncio
-import datetime
+import logging
+from typing import Callable, List, Optional
 
-import feedparser
-import httpx
+from app.adapters.feed_parser import parse_feed_async
+from app.adapters.feed_validators import body_hash, validator_store
+from app.adapters.http_client import fetch
+
+logger = logging.getLogger(__name__)
 
 RSS_FEEDS = [
     # Major News Sources
@@ -48,65 +52,79 @@ RSS_FEEDS = [
 ]
 
 
-async def _fetch_rss(url: str) -> str:
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        return resp.text
+async def _fetch_rss(url: str) -> Optional[str]:
+    """
+    Fetch a feed with a conditional GET.
+    Returns None when the feed is unchanged (304 or same body hash) so parsing can be skipped.
+    """
+    resp = await fetch(url, timeout=10, headers=validator_store.conditional_headers(url))
+    if resp.status_code == 304:
+        validator_store.update(url)
+        return None
+    resp.raise_for_status()
+
+    text = resp.text
+    digest = body_hash(text)
+    cached = validator_store.get(url)
+    unchanged = cached is not None and cached.get("body_hash") == digest
+    validator_store.update(
+        url,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+        body_hash=digest,
+    )
+    return None if unchanged else text
+
+
+async def fetch_rss_feed_text(url: str) -> Optional[str]:
+    """Fetch a single feed body (None when unchanged), for callers that parse separately."""
+    return await _fetch_rss(url)
+
 
+async def fetch_rss_articles(
+    limit: int = 20,
+    feed_urls: Optional[List[str]] = None,
+    on_feed_result: Optional[Callable[[str, dict], None]] = None,
+):
+    """
+    Fetch and parse RSS feeds (all of RSS_FEEDS unless `feed_urls` is given).
 
-async def fetch_rss_articles(limit: int = 20):
-    tasks = [_fetch_rss(url) for url in RSS_FEEDS]
+    If `on_feed_result` is provided it is called once per feed with the feed URL
+    and a dict describing the outcome (`status` of "ok", "unchanged" or "error",
+    entry publish times and the feed's TTL/update-period hints), which the
+    polling scheduler uses to adapt each feed's cadence.
+    """
+    urls = RSS_FEEDS if feed_urls is None else feed_urls
+    tasks = [_fetch_rss(url) for url in urls]
     texts = await asyncio.gather(*tasks, return_exceptions=True)
 
+    unchanged = sum(1 for text in texts if text is None)
+    if unchanged:
+        logger.info(f"{unchanged}/{len(texts)} RSS feeds unchanged since last poll, skipping parse")
+
+    changed = []
+    for url, text in zip(urls, texts):
+        if text is None or isinstance(text, Exception):
+            if on_feed_result:
+                on_feed_result(url, {"status": "unchanged" if text is None else "error", "error": text})
+            continue
+        changed.append((url, text))
+
+    # Parse changed feeds concurrently on the parser pool, off the event loop
+    parsed_feeds = await asyncio.gather(
+        *(parse_feed_async(text, limit) for _, text in changed), return_exceptions=True
+    )
+
     articles = []
-    for text in texts:
-        if isinstance(text, Exception):
+    for (url, _), parsed in zip(changed, parsed_feeds):
+        if isinstance(parsed, Exception):
+            logger.error(f"Failed to parse RSS feed {url}: {parsed}")
+            # Forget the new validators, so the feed is downloaded and parsed again next poll
+            validator_store.discard([url])
+            if on_feed_result:
+                on_feed_result(url, {"status": "error", "error": parsed})
             continue
-        feed = feedparser.parse(text)
-        for entry in feed.entries[:limit]:
-            published = None
-            if getattr(entry, "published_parsed", None):
-                published = datetime.datetime(*entry.published_parsed[:6]).isoformat()
-            
-            # Extract image from various RSS fields
-            image_url = None
-            if hasattr(entry, 'media_content') and entry.media_content:
-                image_url = entry.media_content[0].get('url')
-            elif hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
-                image_url = entry.media_thumbnail[0].get('url')
-            elif hasattr(entry, 'enclosures') and entry.enclosures:
-                for enclosure in entry.enclosures:
-                    if enclosure.get('type', '').startswith('image/'):
-                        image_url = enclosure.get('url')
-                        break
-            elif hasattr(entry, 'links') and entry.links:
-                for link in entry.links:
-                    if link.get('type', '').startswith('image/'):
-                        image_url = link.get('href')
-                        break
-            
-            # Extract summary/description/content
-            summary = getattr(entry, "summary", None)
-            if not summary:
-                summary = getattr(entry, "description", None)
-            if not summary and hasattr(entry, "content") and entry.content:
-                # content is usually a list of dicts with 'value'
-                summary = entry.content[0].get('value') if isinstance(entry.content, list) and 'value' in entry.content[0] else None
-            if not summary and hasattr(entry, "content_encoded"):
-                summary = getattr(entry, "content_encoded", None)
-            if not summary:
-                summary = ""
-            
-            articles.append(
-                {
-                    "title": entry.title,
-                    "url": entry.link,
-                    "source": feed.feed.get("title", "RSS"),
-                    "published_at": published,
-                    "summary": summary,
-                    "source_type": "rss",  # Mark as RSS source for tracking
-                    "image_url": image_url  # Extract image from RSS
-                }
-            )
+        articles.extend(parsed.pop("articles"))
+        if on_feed_result:
+            on_feed_result(url, {"status": "ok", **parsed})
     return articles
@@ -0,0 +1,92 @@
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+# Query parameters set by known click trackers and analytics tools. Generic names such as
+# ref, share, feed or amp are left alone: some sites route on them, and dropping them
+# could merge different pages under one key.
+_TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ocid", "cmpid", "smid", "smtyp", "taid", "sr_share", "ref_src", "ref_url",
+    "spm", "_ga", "_gl", "guccounter", "guce_referrer", "guce_referrer_sig", "xtor",
+}
+_TRACKING_PREFIXES = ("utm_", "ns_", "at_", "pk_", "mtm_", "hsa_", "oly_", "vero_")
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# AMP page paths: /amp/story, /story/amp, /story.amp, /story.amp.html, /story/amp.html
+_AMP_PATH_SEGMENT = re.compile(r"/amp(?=/|$)")
+_AMP_PATH_SUFFIX = re.compile(r"(?:[./]amp)(\.html?)?$")
+
+# Google's AMP cache: https://www-example-com.cdn.ampproject.org/c/s/www.example.com/story
+_AMP_CACHE_PATH = re.compile(r"^/[a-z]/(s/)?(.+)$")
+# Google AMP viewer: https://www.google.com/amp/s/www.example.com/story
+_GOOGLE_AMP_PATH = re.compile(r"^/amp/(s/)?(.+)$")
+
+
+def _unwrap_amp_cache(host: str, path: str, query: str) -> Optional[str]:
+    """Return the publisher URL behind an AMP cache or Google AMP viewer link."""
+    if host.endswith(".cdn.ampproject.org"):
+        match = _AMP_CACHE_PATH.match(path)
+    elif re.fullmatch(r"(www\.)?google\.[a-z.]+", host):
+        match = _GOOGLE_AMP_PATH.match(path)
+    else:
+        return None
+    if not match:
+        return None
+    scheme = "https" if match.group(1) else "http"
+    return f"{scheme}://{match.group(2)}" + (f"?{query}" if query else "")
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in _TRACKING_PARAMS or name.startswith(_TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: Optional[str]) -> Optional[str]:
+    """
+    Reduce an article URL to a key shared by every variant of the same page.
+
+    Drops the scheme distinction (always https), default ports, `www.`/`amp.`
+    host prefixes, fragments, tracking parameters and trailing slashes, maps
+    AMP pages and AMP cache links back to the article, and sorts the remaining
+    query parameters. The result is only used for deduplication; the stored
+    `url` keeps whatever the publisher linked to.
+    """
+    if not url:
+        return url
+    url = url.strip()
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in _DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.lower().rstrip(".")
+    unwrapped = _unwrap_amp_cache(host, parts.path, parts.query)
+    if unwrapped:
+        return canonicalize_url(unwrapped)
+
+    for prefix in ("www.", "amp."):
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+    if parts.port and str(parts.port) not in _DEFAULT_PORTS.values():
+        host = f"{host}:{parts.port}"
+
+    # Decode only what was needlessly escaped; %2F and friends must stay encoded
+    path = re.sub(r"%([0-9A-Fa-f]{2})", lambda m: _unescape_unreserved(m.group(0)), parts.path)
+    path = re.sub(r"/{2,}", "/", path)
+    path = _AMP_PATH_SEGMENT.sub("", path)
+    path = _AMP_PATH_SUFFIX.sub(lambda m: m.group(1) or "", path)
+    path = re.sub(r"/index\.html?$", "/", path)
+    path = path.rstrip("/")
+
+    params = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    )
+    return urlunsplit(("https", host, path, urlencode(params), ""))
+
+
+def _unescape_unreserved(escape: str) -> str:
+    char = unquote(escape)
+    return char if re.fullmatch(r"[A-Za-z0-9\-._~]", char) else escape.upper()
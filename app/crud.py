@@ -1,6 +1,17 @@
 from sqlalchemy.orm import Session
 from . import database, schemas, security
-from sqlalchemy import or_, and_, desc, func
+from sqlalchemy import or_, and_, desc, func, text, literal_column, update
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from .adapters.url_canonical import canonicalize_url
+from .services.search_filters import SEARCH_FACETS, SearchFilters, naive_utc
+
+# Generated full-text column that database.create_db_and_tables adds on PostgreSQL
+_SEARCH_VECTOR = literal_column("articles.search_vector")
+
+def _uses_search_vector(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
 
 def get_user_by_username(db: Session, username: str):
     return db.query(database.User).filter(database.User.username == username).first()
@@ -133,12 +144,264 @@ def delete_user(db: Session, user_id: int):
 def get_articles(db: Session, skip: int = 0, limit: int = 100):
     return db.query(database.Article).offset(skip).limit(limit).all()
 
-def get_articles_by_category(db: Session, category: str, skip: int = 0, limit: int = 100):
-    return db.query(database.Article).filter(database.Article.category == category).offset(skip).limit(limit).all()
+def get_articles_by_category(db: Session, category: str, skip: int = 0, limit: int = 100, min_score: Optional[int] = None):
+    """
+    Articles whose primary category is `category`; with `min_score`, every article scoring at
+    least that much for it, strongest first.
+    """
+    if min_score is None:
+        return db.query(database.Article).filter(database.Article.category == category).offset(skip).limit(limit).all()
+    return (
+        db.query(database.Article)
+        .join(database.ArticleCategory, database.ArticleCategory.article_url == database.Article.url)
+        .filter(database.ArticleCategory.category == category, database.ArticleCategory.score >= min_score)
+        .order_by(desc(database.ArticleCategory.score), desc(database.Article.published_at))
+        .offset(skip).limit(limit).all()
+    )
+
+def count_articles(db: Session) -> int:
+    return db.query(database.Article).count()
 
 def get_all_articles(db: Session):
     return db.query(database.Article).all()
 
+def insert_new_articles(
+    db: Session,
+    rows: List[dict],
+    batch_size: int = 500,
+    category_scores: Optional[Dict[str, Dict[str, int]]] = None,
+) -> List[database.Article]:
+    """
+    Insert article rows, skipping any whose URL or canonical URL already exists, and return
+    exactly the rows that were inserted. `category_scores` maps URLs to per-category scores,
+    which are stored for the inserted articles in the same transaction.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING RETURNING on PostgreSQL and SQLite, so concurrent
+    ingest workers can race on the same story without failing the commit. Rows are written in
+    chunks of `batch_size`, one statement per chunk. The returned articles are detached from
+    the session and keep their loaded values.
+    """
+    if not rows:
+        return []
+    for row in rows:
+        row.setdefault("canonical_url", canonicalize_url(row["url"]))
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        insert = None
+
+    inserted = []
+    for i in range(0, len(rows), batch_size):
+        chunk = rows[i:i + batch_size]
+        if insert is None:
+            # Portable fallback for other databases: check, then insert
+            existing = set()
+            for url, canonical_url in db.query(database.Article.url, database.Article.canonical_url).filter(or_(
+                database.Article.url.in_([row["url"] for row in chunk]),
+                database.Article.canonical_url.in_([row["canonical_url"] for row in chunk]),
+            )):
+                existing.update((url, canonical_url))
+            new_articles = []
+            for row in chunk:
+                if row["url"] not in existing and row["canonical_url"] not in existing:
+                    existing.update((row["url"], row["canonical_url"]))
+                    new_articles.append(database.Article(**row))
+            db.add_all(new_articles)
+            db.flush()
+            inserted.extend(new_articles)
+            continue
+        stmt = (
+            insert(database.Article)
+            .values(chunk)
+            .on_conflict_do_nothing()
+            .returning(database.Article)
+        )
+        inserted.extend(db.scalars(stmt).all())
+    if category_scores:
+        replace_category_scores(db, {
+            article.url: category_scores[article.url] for article in inserted if article.url in category_scores
+        })
+    # The rows are fully loaded from RETURNING (or the flush); detach them so the commit
+    # does not expire them and every later attribute read cost a SELECT per article
+    for article in inserted:
+        db.expunge(article)
+    db.commit()
+    return inserted
+
+# completed_backfills name of the canonical_url backfill
+CANONICAL_URL_BACKFILL = "canonical_url"
+
+def backfill_canonical_urls(db: Session, chunk_size: int = 1000) -> int:
+    """
+    Fill `canonical_url` for articles stored before the column existed, once per database:
+    a `completed_backfills` row marks it done, so later calls return 0 without a scan.
+
+    Rows whose canonical URL is already taken are older duplicates of another
+    article; they keep a NULL key so the unique index stays valid.
+    """
+    if db.get(database.CompletedBackfill, CANONICAL_URL_BACKFILL) is not None:
+        return 0
+    updated = 0
+    last_url = None
+    while True:
+        query = db.query(database.Article.url).filter(database.Article.canonical_url.is_(None))
+        if last_url is not None:
+            query = query.filter(database.Article.url > last_url)
+        urls = [res[0] for res in query.order_by(database.Article.url).limit(chunk_size)]
+        if not urls:
+            break
+        last_url = urls[-1]
+        keys = {url: canonicalize_url(url) for url in urls}
+        taken = {
+            res[0] for res in db.query(database.Article.canonical_url).filter(
+                database.Article.canonical_url.in_(set(keys.values()))
+            )
+        }
+        rows = []
+        for url, canonical_url in keys.items():
+            if canonical_url in taken:
+                continue
+            taken.add(canonical_url)
+            rows.append({"url": url, "canonical_url": canonical_url})
+        if rows:
+            # Bulk UPDATE by primary key: one executemany per chunk
+            db.execute(update(database.Article), rows)
+        updated += len(rows)
+        db.commit()
+    db.add(database.CompletedBackfill(name=CANONICAL_URL_BACKFILL))
+    db.commit()
+    return updated
+
+def iter_articles_changed_since(db: Session, since: Optional[datetime], chunk_size: int = 1000):
+    """
+    Stream the searchable columns of articles inserted or changed at or after `since`
+    (every article when `since` is None), `chunk_size` rows at a time.
+    """
+    article = database.Article
+    query = db.query(
+        article.url, article.title, article.source, article.content, article.published_at, article.category,
+        article.image_url,
+    )
+    if since is not None:
+        query = query.filter(article.updated_at >= since)
+    return query.yield_per(chunk_size)
+
+def purge_articles_published_before(db: Session, cutoff: datetime, chunk_size: int = 1000) -> int:
+    """
+    Delete articles published before `cutoff`, except those a user saved, leaving a
+    tombstone for each so the search index drops them too. Commits per chunk.
+    """
+    saved = db.query(database.UserSavedArticle.article_url)
+    purged = 0
+    while True:
+        urls = [url for (url,) in db.query(database.Article.url).filter(
+            database.Article.published_at < cutoff,
+            database.Article.url.notin_(saved),
+        ).limit(chunk_size)]
+        if not urls:
+            return purged
+        db.query(database.ArticleCategory).filter(
+            database.ArticleCategory.article_url.in_(urls)
+        ).delete(synchronize_session=False)
+        db.query(database.Article).filter(database.Article.url.in_(urls)).delete(synchronize_session=False)
+        db.query(database.DeletedArticle).filter(database.DeletedArticle.url.in_(urls)).delete(synchronize_session=False)
+        db.bulk_insert_mappings(database.DeletedArticle, [{"url": url, "deleted_at": datetime.utcnow()} for url in urls])
+        db.commit()
+        purged += len(urls)
+
+def get_deleted_article_urls(db: Session, since: Optional[datetime]) -> List[str]:
+    query = db.query(database.DeletedArticle.url)
+    if since is not None:
+        query = query.filter(database.DeletedArticle.deleted_at >= since)
+    return [url for (url,) in query]
+
+def prune_deleted_articles(db: Session, before: datetime) -> int:
+    """Drop tombstones the search index has already applied."""
+    count = db.query(database.DeletedArticle).filter(
+        database.DeletedArticle.deleted_at < before
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
+
+def _search_filter_conditions(filters: Optional[SearchFilters]) -> list:
+    article = database.Article
+    if not filters:
+        return []
+    conditions = []
+    if filters.categories:
+        conditions.append(article.category.in_(filters.categories))
+    if filters.sources:
+        conditions.append(article.source.in_(filters.sources))
+    if filters.published_from:
+        conditions.append(article.published_at >= naive_utc(filters.published_from))
+    if filters.published_to:
+        conditions.append(article.published_at <= naive_utc(filters.published_to))
+    return conditions
+
+def search_articles_fulltext(
+    db: Session, q: str, offset: int = 0, limit: int = 20, snippet_words: int = 30, max_total_hits: int = 1000,
+    filters: Optional[SearchFilters] = None, sort: str = "relevance",
+) -> Tuple[List[Tuple[database.Article, Optional[str]]], int, Dict[str, Dict[str, int]]]:
+    """
+    PostgreSQL full-text search over the GIN-indexed search vector: one page of (article, snippet)
+    pairs ranked by ts_rank_cd (newest first among ties; with sort="recent", newest first outright),
+    the number of matches, and per-facet value counts. Counts cover at most `max_total_hits`
+    matches, so counting a common term never scans every match.
+    """
+    query = func.websearch_to_tsquery(database.SEARCH_TEXT_CONFIG, q)
+    conditions = [_SEARCH_VECTOR.op("@@")(query), *_search_filter_conditions(filters)]
+    rank = func.ts_rank_cd(_SEARCH_VECTOR, query)
+    newest = database.Article.published_at.desc().nullslast()
+    # Fragment-free headline of about `snippet_words` words around the best match, without markup
+    headline = func.ts_headline(
+        database.SEARCH_TEXT_CONFIG, database.Article.content, query,
+        f'MaxWords={snippet_words}, MinWords={max(1, snippet_words // 2)}, StartSel="", StopSel=""',
+    )
+    rows = (
+        db.query(database.Article, headline)
+        .filter(*conditions)
+        .order_by(*((newest, rank.desc()) if sort == "recent" else (rank.desc(), newest)))
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    facet_columns = [getattr(database.Article, name) for name in SEARCH_FACETS]
+    capped = db.query(*facet_columns).filter(*conditions).limit(max_total_hits).subquery()
+    total = db.query(func.count()).select_from(capped).scalar()
+    distribution = {}
+    for name in SEARCH_FACETS:
+        column = capped.c[name]
+        counts = db.query(column, func.count()).filter(column.isnot(None)).group_by(column).order_by(column)
+        distribution[name] = {value: count for value, count in counts}
+    return [(article, snippet) for article, snippet in rows], total, distribution
+
+def get_search_sync_state(db: Session, index_name: str) -> database.SearchSyncState:
+    state = db.get(database.SearchSyncState, index_name)
+    if state is None:
+        state = database.SearchSyncState(index_name=index_name)
+        db.add(state)
+        db.flush()
+    return state
+
+def replace_category_scores(db: Session, scores_by_url: Dict[str, Dict[str, int]]):
+    """Store the non-zero category scores of the given articles, replacing any they had; the caller commits."""
+    if not scores_by_url:
+        return
+    db.query(database.ArticleCategory).filter(
+        database.ArticleCategory.article_url.in_(list(scores_by_url))
+    ).delete(synchronize_session=False)
+    rows = [
+        {"article_url": url, "category": category, "score": score}
+        for url, scores in scores_by_url.items()
+        for category, score in scores.items() if score
+    ]
+    if rows:
+        db.bulk_insert_mappings(database.ArticleCategory, rows)
+
 def get_categories(db: Session):
     """Get all unique categories from the database."""
     categories = db.query(database.Article.category).distinct().all()
@@ -149,9 +412,9 @@ def get_sources(db: Session):
     sources = db.query(database.Article.source).distinct().all()
     return [src[0] for src in sources if src[0]]  # Filter out None values
 
-def update_article_category(db: Session, article_id: int, new_category: str):
+def update_article_category(db: Session, article_url: str, new_category: str):
     """Update the category of an article."""
-    article = db.query(database.Article).filter(database.Article.id == article_id).first()
+    article = db.query(database.Article).filter(database.Article.url == article_url).first()
     if article:
         article.category = new_category
         db.commit()
@@ -159,13 +422,58 @@ def update_article_category(db: Session, article_id: int, new_category: str):
         return article
     return None
 
-def get_personalized_articles(db: Session, user_id: int, skip: int = 0, limit: int = 100):
+def get_article_texts_after(db: Session, after_url: Optional[str], limit: int):
+    """Next `limit` articles by primary key after `after_url` (keyset pagination), without loading ORM objects."""
+    query = db.query(
+        database.Article.url, database.Article.title, database.Article.content, database.Article.category,
+        database.Article.native_category,
+    )
+    if after_url is not None:
+        query = query.filter(database.Article.url > after_url)
+    return query.order_by(database.Article.url).limit(limit).all()
+
+def bulk_update_categories(db: Session, changes: List[Tuple[str, str]]) -> int:
+    """
+    Set the category of many articles with one UPDATE ... FROM (VALUES ...) statement.
+    `changes` holds (url, category) pairs; the caller commits.
+    """
+    if not changes:
+        return 0
+    params = {}
+    values = []
+    for i, (url, category) in enumerate(changes):
+        params[f"u{i}"] = url
+        params[f"c{i}"] = category
+        values.append(f"(:u{i}, :c{i})")
+    # VALUES columns are column1, column2 in both PostgreSQL and SQLite
+    # Raw SQL skips the ORM's onupdate, so bump updated_at for the search index sync here
+    params["now"] = datetime.utcnow()
+    db.execute(
+        text(
+            "UPDATE articles SET category = v.column2, updated_at = :now "
+            f"FROM (VALUES {', '.join(values)}) AS v "
+            "WHERE articles.url = v.column1"
+        ),
+        params,
+    )
+    return len(changes)
+
+def get_personalized_articles(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    categories: Iterable[str] = (),
+    min_category_score: Optional[int] = None,
+):
     """
     Get personalized articles based on user's followed topics and outlets.
-    Articles are prioritized by:
-    1. Articles matching followed topics (in title/content/category)
-    2. Articles from followed outlets
-    3. Recent articles as fallback
+    An article matches when:
+    1. A followed topic appears in its primary category, title or content (on PostgreSQL,
+       title and content as a stemmed word match through the full-text index), or names
+       one of `categories` the article scores at least `min_category_score` for
+    2. It comes from a followed outlet
+    Recent articles are the fallback when nothing is followed.
     """
     # Get user's followed topics and outlets
     followed_topics = get_followed_topics(db, user_id)
@@ -178,30 +486,44 @@ def get_personalized_articles(db: Session, user_id: int, skip: int = 0, limit: i
     # Build query for personalized articles
     query = db.query(database.Article)
     
-    # Create conditions for topic matching (case-insensitive)
+    # Topics naming a category also match secondary categories through the stored
+    # scores (indexed on category, score)
+    categories = {name.lower(): name for name in categories} if min_category_score is not None else {}
+    followed_categories = set()
     topic_conditions = []
+    full_text = _uses_search_vector(db)
     for topic in followed_topics:
         if topic and topic.strip():  # Skip empty topics
             topic_lower = topic.lower().strip()
-            topic_conditions.append(
-                or_(
+            if topic_lower in categories:
+                followed_categories.add(categories[topic_lower])
+            if full_text:
+                # Word (stemmed) match through the GIN index instead of scanning every body
+                text_match = _SEARCH_VECTOR.op("@@")(func.plainto_tsquery(database.SEARCH_TEXT_CONFIG, topic_lower))
+            else:
+                text_match = or_(
                     func.lower(database.Article.title).contains(topic_lower),
                     func.lower(database.Article.content).contains(topic_lower),
-                    func.lower(database.Article.category).contains(topic_lower)
+                )
+            topic_conditions.append(
+                or_(text_match, func.lower(database.Article.category).contains(topic_lower))
+            )
+    if followed_categories:
+        topic_conditions.append(
+            database.Article.url.in_(
+                db.query(database.ArticleCategory.article_url).filter(
+                    database.ArticleCategory.category.in_(followed_categories),
+                    database.ArticleCategory.score >= min_category_score,
                 )
             )
+        )
     
     # Create conditions for outlet matching (case-insensitive)
     outlet_conditions = []
     for outlet in followed_outlets:
         if outlet and outlet.strip():  # Skip empty outlets
             outlet_lower = outlet.lower().strip()
-            outlet_conditions.append(
-                or_(
-                    func.lower(database.Article.source).contains(outlet_lower),
-                    func.lower(database.Article.source_name).contains(outlet_lower)
-                )
-            )
+            outlet_conditions.append(func.lower(database.Article.source).contains(outlet_lower))
     
     # Combine all conditions
     all_conditions = []
@@ -220,4 +542,4 @@ def get_personalized_articles(db: Session, user_id: int, skip: int = 0, limit: i
     query = query.order_by(desc(database.Article.published_at))
     
     # Apply pagination
-    return query.offset(skip).limit(limit).all() 
\ No newline at end of file
+    return query.offset(skip).limit(limit).all() 
@@ -1,10 +1,12 @@
 import os
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Boolean, ForeignKey
+from sqlalchemy import create_engine, inspect, text, Column, String, Text, Date, DateTime, Integer, Boolean, ForeignKey, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 from dotenv import load_dotenv
 
+from app.adapters.url_canonical import canonicalize_url
+
 load_dotenv()
 
 # Default to the development database URL
@@ -25,23 +27,70 @@ if "sqlite" in SQLALCHEMY_DATABASE_URL:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Text search configuration (stemming, stop words) of the PostgreSQL articles.search_vector column
+SEARCH_TEXT_CONFIG = "english"
+
 
 class Article(Base):
     __tablename__ = "articles"
 
     url = Column(String, primary_key=True, index=True)
+    # Dedup key shared by all variants of the same page (tracking params, AMP, http/https...)
+    canonical_url = Column(
+        String, nullable=True, unique=True, index=True,
+        default=lambda ctx: canonicalize_url(ctx.get_current_parameters().get("url")),
+    )
     title = Column(String, index=True)
     source = Column(String)
     content = Column(Text, nullable=True)
     published_at = Column(DateTime, nullable=True)
     category = Column(String, nullable=True)
+    # Category NewsAPI itself assigned (category requests only); labels for the text classifier
+    native_category = Column(String, nullable=True)
     image_url = Column(String, nullable=True)
     comment = Column(String, nullable=True)
+    # MinHash of title+summary, and the URL of the first article of the same story
+    minhash = Column(LargeBinary, nullable=True)
+    story_id = Column(String, nullable=True, index=True)
+    # Last insert or change; the search index syncs rows changed since its high-water mark
+    updated_at = Column(DateTime, nullable=True, index=True, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f"<Article(title='{self.title}', category='{self.category}')>"
 
 
+class ArticleCategory(Base):
+    """An article's non-zero keyword score for one category, so feeds can match secondary categories."""
+    __tablename__ = 'article_categories'
+    article_url = Column(String, ForeignKey('articles.url'), primary_key=True)
+    category = Column(String, primary_key=True)
+    score = Column(Integer, nullable=False)
+
+    __table_args__ = (Index('ix_article_categories_category_score', 'category', 'score'),)
+
+
+class DeletedArticle(Base):
+    """Tombstone of an article removed by retention, so the search index can drop it too."""
+    __tablename__ = 'deleted_articles'
+    url = Column(String, primary_key=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class SearchSyncState(Base):
+    """High-water mark of the last successful sync into a search index."""
+    __tablename__ = 'search_sync_state'
+    index_name = Column(String, primary_key=True)
+    high_water = Column(DateTime, nullable=True)
+    synced_at = Column(DateTime, nullable=True)
+
+
+class CompletedBackfill(Base):
+    """One-off data backfill that has finished on this database, so it is never run again."""
+    __tablename__ = 'completed_backfills'
+    name = Column(String, primary_key=True)
+    completed_at = Column(DateTime, default=datetime.utcnow)
+
+
 class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True, index=True)
@@ -82,8 +131,83 @@ class UserOutlet(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class FeedValidator(Base):
+    """HTTP cache validators remembered per feed URL for conditional GETs."""
+    __tablename__ = 'feed_validators'
+    feed_url = Column(String, primary_key=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    body_hash = Column(String, nullable=True)
+    checked_at = Column(DateTime, default=datetime.utcnow)
+
+
+class NewsAPIUsage(Base):
+    """NewsAPI requests made on one UTC day, so the daily quota survives restarts."""
+    __tablename__ = 'newsapi_usage'
+    day = Column(Date, primary_key=True)
+    used = Column(Integer, nullable=False, default=0)
+
+
+class RecategorizationJob(Base):
+    """Progress of a bulk recategorization run; `cursor` is the last article URL processed."""
+    __tablename__ = 'recategorization_jobs'
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="running")
+    cursor = Column(String, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+def _add_missing_article_columns():
+    """create_all() never alters existing tables, so add columns introduced after the first deploy."""
+    existing = {column["name"] for column in inspect(engine).get_columns("articles")}
+    table = Article.__table__
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            conn.execute(text(
+                f"ALTER TABLE articles ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            ))
+            for index in table.indexes:
+                if [c.name for c in index.columns] == [column.name]:
+                    unique = "UNIQUE " if index.unique else ""
+                    conn.execute(text(
+                        f"CREATE {unique}INDEX IF NOT EXISTS {index.name} ON articles ({column.name})"
+                    ))
+
+
+def _add_search_vector():
+    """
+    PostgreSQL only: a stored generated tsvector over title (weight A), category (B), content (C)
+    and source (D), with a GIN index, for full-text search without MeiliSearch. It is not part
+    of the model because SQLite has no equivalent; adding it to an existing table rewrites it once.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    weighted = " || ".join(
+        f"setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in (("title", "A"), ("category", "B"), ("content", "C"), ("source", "D"))
+    )
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({weighted}) STORED"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_articles_search_vector ON articles USING GIN (search_vector)"
+        ))
+
+
 def create_db_and_tables():
     Base.metadata.create_all(bind=engine)
+    _add_missing_article_columns()
+    _add_search_vector()
 
 
 def get_db():
@@ -10,12 +10,19 @@ from app.routes.feed import router as feed_router
 from app.routes.search import router as search_router
 from app.routes.ws import router as ws_router
 from app.routes.users import router as users_router
-from app.services.index_populator import populate_meilisearch_index
+from app.services.index_populator import populate_meilisearch_index, reindex_meilisearch_index
 from app.database import create_db_and_tables, SessionLocal
-from app.services.feed_service import fetch_and_store_latest_articles
+from app.services.feed_service import fetch_and_store_latest_articles, purge_expired_articles
 from app.services.websocket_manager import manager
 from app.services.notification_service import send_personalized_notifications, send_broadcast_notification
-from app.services.categorization import recategorize_existing_articles
+from app.services.recategorization import recategorization_jobs
+from app.services.local_search import local_search_index
+from app.services.search_service import SEARCH_BACKEND, uses_local_index
+from app.services.categorization import category_cache
+from app.adapters.http_client import close_http_client
+from app.adapters.feed_parser import shutdown_parser_executor
+from app.adapters.rss_adapter import RSS_FEEDS
+from app.services.feed_scheduler import feed_scheduler, NEWSAPI_FEED_KEY, FEED_DEFAULT_INTERVAL
 import app.crud as crud
 from app.schemas import ArticleResponse
 
@@ -79,37 +86,59 @@ async def read_index_html():
 async def get_favicon():
     return {"message": "No favicon"}
 
+def _notification_dicts(articles):
+    """Convert articles to dict format for notifications."""
+    return [
+        {
+            "url": article.url,
+            "title": article.title,
+            "source": article.source,
+            "category": article.category,
+            "published_at": article.published_at.isoformat() if article.published_at else None
+        }
+        for article in articles
+    ]
+
 async def periodic_feed_update():
-    """Periodically fetches new articles and sends personalized notifications."""
+    """
+    Polls feeds as they come due on the adaptive schedule and sends personalized notifications.
+    Each wake-up fetches only the feeds whose next-due time has passed, and every batch of
+    new articles is pushed to users as soon as it is stored.
+    """
     while True:
-        await asyncio.sleep(300)  # Sleep for 5 minutes
-        logger.info("Running periodic feed update...")
+        await asyncio.sleep(feed_scheduler.seconds_until_next_due())
+        due = feed_scheduler.claim_due()
+        if not due:
+            continue
+        rss_due = [key for key in due if key != NEWSAPI_FEED_KEY]
+        logger.info(f"Running feed update for {len(due)} due feeds...")
         db = SessionLocal()
+
+        async def notify_new_articles(articles):
+            logger.info(f"Stored {len(articles)} new articles. Sending personalized notifications...")
+            # Send personalized notifications to users
+            await send_personalized_notifications(_notification_dicts(articles), db)
+            # Also send broadcast notification for backward compatibility
+            await send_broadcast_notification(f"Found {len(articles)} new articles", len(articles))
+
         try:
-            new_articles = await fetch_and_store_latest_articles(db=db, limit=100)
-            if new_articles:
-                logger.info(f"Found {len(new_articles)} new articles. Sending personalized notifications...")
-                
-                # Convert articles to dict format for notifications
-                article_dicts = []
-                for article in new_articles:
-                    article_dict = {
-                        "url": article.url,
-                        "title": article.title,
-                        "source": article.source,
-                        "category": article.category,
-                        "published_at": article.published_at.isoformat() if article.published_at else None
-                    }
-                    article_dicts.append(article_dict)
-                
-                # Send personalized notifications to users
-                await send_personalized_notifications(article_dicts, db)
-                
-                # Also send broadcast notification for backward compatibility
-                await send_broadcast_notification(f"Found {len(new_articles)} new articles", len(new_articles))
-                
-                # Update MeiliSearch index
+            result = await fetch_and_store_latest_articles(
+                db=db,
+                limit=100,
+                rss_feeds=rss_due,
+                include_newsapi=NEWSAPI_FEED_KEY in due,
+                on_new_articles=notify_new_articles,
+            )
+            logger.info(
+                f"Feed update stored {len(result.inserted)} new articles "
+                f"({result.near_duplicates} repeating known stories, {result.duplicates} duplicates skipped)"
+            )
+            purge_expired_articles(db)
+            if SEARCH_BACKEND == "meili":
+                # Incremental: only articles inserted, changed or purged since the last sync are sent
                 await populate_meilisearch_index()
+        except Exception as e:
+            logger.error(f"Error during feed update: {e}")
         finally:
             db.close()
 
@@ -121,6 +150,19 @@ async def startup_event():
         logger.info("Creating database tables...")
         create_db_and_tables()
         
+        # A recategorization job cut short by the last shutdown continues from its cursor;
+        # otherwise articles stored before per-category scores existed get them once
+        if not recategorization_jobs.resume():
+            recategorization_jobs.backfill_scores()
+        
+        # Every feed gets its own polling schedule; NewsAPI keeps a fixed cadence for its quota
+        feed_scheduler.register(RSS_FEEDS)
+        feed_scheduler.register([NEWSAPI_FEED_KEY], fixed_interval=FEED_DEFAULT_INTERVAL)
+        
+        if uses_local_index():
+            # Built in a worker thread; searches see it once it is ready
+            asyncio.create_task(local_search_index.warm_in_background())
+        
         # Create a new DB session
         db = SessionLocal()
         try:
@@ -130,20 +172,25 @@ async def startup_event():
         finally:
             db.close()
         
-        # Try to populate MeiliSearch index with retry logic
-        logger.info("Attempting to populate MeiliSearch index...")
-        for attempt in range(3):
-            try:
-                await populate_meilisearch_index()
-                logger.info("MeiliSearch index populated successfully!")
-                break
-            except Exception as e:
-                logger.warning(f"MeiliSearch index population attempt {attempt + 1} failed: {e}")
-                if attempt < 2:  # Don't sleep on the last attempt
-                    logger.info("Retrying in 5 seconds...")
-                    await asyncio.sleep(5)
-                else:
-                    logger.error("Failed to populate MeiliSearch index after 3 attempts. Search functionality may not work.")
+        # Try to populate MeiliSearch index with retry logic; other search backends don't use it
+        if SEARCH_BACKEND == "meili":
+            logger.info("Attempting to populate MeiliSearch index...")
+            for attempt in range(3):
+                try:
+                    await populate_meilisearch_index()
+                    logger.info("MeiliSearch index populated successfully!")
+                    break
+                except Exception as e:
+                    logger.warning(f"MeiliSearch index population attempt {attempt + 1} failed: {e}")
+                    if attempt < 2:  # Don't sleep on the last attempt
+                        logger.info("Retrying in 5 seconds...")
+                        await asyncio.sleep(5)
+                    else:
+                        fallback = (
+                            "Searches will be answered from the local index." if uses_local_index()
+                            else "Searches will fail until it is reachable."
+                        )
+                        logger.error(f"Failed to populate MeiliSearch index after 3 attempts. {fallback}")
         
         # Start the background task
         asyncio.create_task(periodic_feed_update())
@@ -154,14 +201,48 @@ async def startup_event():
         logger.error(f"Error during startup: {e}")
         raise
 
-@app.post("/api/admin/recategorize")
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Closing shared HTTP client...")
+    await close_http_client()
+    shutdown_parser_executor()
+    # Snapshot the local search index so the next start only catches up on recent changes
+    local_search_index.save()
+
+@app.post("/api/admin/recategorize", status_code=202)
 async def recategorize_articles():
-    """Recategorize all existing articles with improved categorization logic."""
+    """Start re-scoring all stored articles in the background (or resume an unfinished run)."""
     try:
-        updated_count = await recategorize_existing_articles()
-        return {"message": f"Successfully recategorized {updated_count} articles", "updated_count": updated_count}
+        return recategorization_jobs.start()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to recategorize articles: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to start recategorization: {str(e)}")
+
+@app.get("/api/admin/recategorize")
+async def get_recategorization_status():
+    """Progress, throughput and resume cursor of the current or last recategorization job."""
+    return recategorization_jobs.status()
+
+@app.post("/api/admin/search/reindex")
+async def reindex_search():
+    """Rebuild the search index in a new generation and swap it in once complete."""
+    try:
+        return await reindex_meilisearch_index()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search reindex failed: {str(e)}")
+
+@app.get("/api/admin/categorization-cache")
+async def get_categorization_cache():
+    """Hit/miss counters of the content-hash categorization cache."""
+    return category_cache.stats()
+
+@app.get("/api/admin/feed-schedule")
+async def get_feed_schedule():
+    """Show each feed's polling interval, next due time and activity (hot, normal, idle or backoff)."""
+    feeds = feed_scheduler.snapshot()
+    summary = {}
+    for feed in feeds:
+        summary[feed["activity"]] = summary.get(feed["activity"], 0) + 1
+    return {"feeds": feeds, "summary": summary}
 
 @app.get("/api/articles")
 async def get_articles(page: int = 1, limit: int = 20, category: str = None):
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Query, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.services.feed_service import get_all_articles, get_latest_articles
 from app.services.search_service import search_articles
+from app.services.categorization import category_names, min_category_score
 from app.database import get_db
 from app.services.auth_service import get_current_active_user, oauth2_scheme, get_current_user, get_current_optional_user
 from app import crud, schemas
@@ -20,14 +21,22 @@ router = APIRouter(tags=["feed"])
 async def get_feed(
     db: Session = Depends(get_db),
     limit: int = Query(20, le=100),
-    category: Optional[str] = Query(None, description="Optional category filter.")
+    category: Optional[str] = Query(None, description="Optional category filter."),
+    min_score: Optional[int] = Query(
+        None, ge=1, description="With a category, match every article scoring at least this much for it, not only its primary category. Scores are in the active categorizer's units (keyword hits, or percent for the model)."
+    ),
+    secondary: bool = Query(
+        False, description="With a category, also match articles the active categorizer scores above its own threshold for it."
+    ),
 ):
     """
     Get the latest articles from the feed.
     If a category is provided, it filters by that category.
     """
     if category:
-        articles = crud.get_articles_by_category(db=db, category=category, limit=limit)
+        if secondary and min_score is None:
+            min_score = min_category_score()
+        articles = crud.get_articles_by_category(db=db, category=category, limit=limit, min_score=min_score)
     else:
         articles = crud.get_articles(db=db, limit=limit)
     
@@ -62,7 +71,10 @@ async def get_personalized_feed(
     Get personalized feed based on user's followed topics and outlets.
     Requires user authentication.
     """
-    articles = crud.get_personalized_articles(db=db, user_id=current_user.id, limit=limit)
+    articles = crud.get_personalized_articles(
+        db=db, user_id=current_user.id, limit=limit,
+        categories=category_names(), min_category_score=min_category_score(),
+    )
     return articles
 
 
@@ -99,13 +111,14 @@ async def get_test_feed():
 
 @router.post("/feed/populate-search-index")
 async def populate_search_index(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    full: bool = Query(False, description="Re-send every article instead of only those changed since the last sync."),
 ):
-    """Manually populate the MeiliSearch index with articles from the database."""
+    """Manually sync the MeiliSearch index with articles from the database."""
     try:
         logger.info("Manually triggering search index population...")
-        await populate_meilisearch_index()
-        return {"message": "Search index populated successfully"}
+        counts = await populate_meilisearch_index(full=full)
+        return {"message": "Search index populated successfully", **counts}
     except Exception as e:
         logger.error(f"Error populating search index: {e}")
         raise HTTPException(status_code=500, detail=f"Error populating search index: {str(e)}")
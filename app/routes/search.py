@@ -1,33 +1,41 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
 from fastapi import APIRouter, Query
-from app.services.search_service import search_articles
+from app.services.search_service import search_page
+from app.services.search_filters import SearchFilters
 from app.schemas import ArticleResponse
 
 router = APIRouter(tags=["search"])
 
 
 @router.get("/search")
-async def search(q: str = Query(..., min_length=2), page: int = Query(1, ge=1), limit: int = Query(20, le=100)):
-    """Full‑text search endpoint."""
-    skip = (page - 1) * limit
-    search_results = await search_articles(q, limit + skip)
-    
-    # Apply pagination
-    paginated_results = search_results[skip:skip + limit]
-    
-    # Convert to ArticleResponse format
+async def search(
+    q: str = Query(..., min_length=2),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, le=100),
+    category: Optional[List[str]] = Query(None, description="Repeat to match any of several categories"),
+    source: Optional[List[str]] = Query(None, description="Repeat to match any of several sources"),
+    published_from: Optional[datetime] = Query(None),
+    published_to: Optional[datetime] = Query(None),
+    sort: Literal["relevance", "recent"] = Query("relevance"),
+):
+    """Full‑text search endpoint, with filters and facet counts computed by the search index."""
+    filters = SearchFilters(category or [], source or [], published_from, published_to)
+    results = await search_page(q, offset=(page - 1) * limit, limit=limit, filters=filters, sort=sort)
+
     articles = []
-    for result in paginated_results:
-        # MeiliSearch returns the document data directly
+    for result in results["hits"]:
         article_data = {
-            "url": result.get("url"),
-            "title": result.get("title"),
-            "source": result.get("source"),
-            "content": result.get("content"),
-            "published_at": result.get("published_at"),
-            "category": result.get("category"),
-            "image_url": result.get("image_url"),
+            **result,
             "is_saved": False  # Default value, would need to check user's saved articles
         }
         articles.append(article_data)
-    
-    return {"articles": articles}
+
+    return {
+        "articles": articles,
+        "page": page,
+        "limit": limit,
+        "estimatedTotalHits": results["estimatedTotalHits"],
+        "facetDistribution": results["facetDistribution"],
+    }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr, validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import re
 
@@ -58,9 +58,29 @@ class ArticleCreate(ArticleBase):
 
 class Article(ArticleBase):
     is_saved: bool = False
+    story_id: Optional[str] = Field(None, description="Canonical URL of the first article covering the same story")
 
     class Config:
         from_attributes = True
 
 class ArticleResponse(Article):
-    pass 
\ No newline at end of file
+    pass 
+
+class AdapterStats(BaseModel):
+    feeds: int = Field(0, description="Feeds or API requests scheduled for this adapter")
+    fetched: int = Field(0, description="Feeds fetched successfully")
+    unchanged: int = Field(0, description="Feeds skipped because they had not changed")
+    errors: int = Field(0, description="Feeds that failed to fetch or parse")
+    articles: int = Field(0, description="Articles read from the fetched feeds")
+    duplicates: int = Field(0, description="Articles skipped because they were already seen or stored")
+    near_duplicates: int = Field(0, description="Stored articles linked to an existing story instead of notified")
+    inserted: int = Field(0, description="Articles newly stored")
+
+class IngestResult(BaseModel):
+    inserted: List[Article] = Field(default_factory=list, description="Articles newly stored in this cycle")
+    duplicates: int = Field(0, description="Articles skipped as duplicates")
+    near_duplicates: int = Field(0, description="Inserted articles that repeat a story already covered")
+    errors: int = Field(0, description="Stage failures during the cycle")
+    failed_feeds: List[str] = Field(default_factory=list, description="Feeds with articles that could not be stored")
+    adapters: Dict[str, AdapterStats] = Field(default_factory=dict, description="Per-adapter counters")
+    duration_seconds: float = 0.0
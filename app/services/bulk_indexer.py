@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Iterable, Iterator, Tuple
+
+from app.adapters.meili_client import AsyncMeiliClient
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on one NDJSON payload; a single larger document is still sent on its own
+SEARCH_BULK_BATCH_BYTES = int(os.getenv("SEARCH_BULK_BATCH_BYTES", str(4 * 1024 * 1024)))
+# Batches uploaded or being indexed by MeiliSearch at once; bounds memory held for retries
+SEARCH_BULK_MAX_IN_FLIGHT = int(os.getenv("SEARCH_BULK_MAX_IN_FLIGHT", "4"))
+SEARCH_BULK_MAX_RETRIES = int(os.getenv("SEARCH_BULK_MAX_RETRIES", "3"))
+SEARCH_TASK_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TASK_TIMEOUT_SECONDS", "300"))
+
+_FINISHED = ("succeeded", "failed", "canceled")
+
+
+class BulkIndexError(Exception):
+    pass
+
+
+@dataclass
+class BulkIndexResult:
+    documents: int = 0
+    batches: int = 0
+    bytes: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "docs_per_second": round(self.docs_per_second, 1), "peak_rss_mb": peak_rss_mb()}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (0 where the platform cannot tell)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def ndjson_batches(documents: Iterable[dict], max_bytes: int = SEARCH_BULK_BATCH_BYTES) -> Iterator[Tuple[bytes, int]]:
+    """Group documents into NDJSON payloads of at most `max_bytes`, yielding (payload, document count)."""
+    lines, size = [], 0
+    for document in documents:
+        line = json.dumps(document, ensure_ascii=False).encode("utf-8") + b"\n"
+        if lines and size + len(line) > max_bytes:
+            yield b"".join(lines), len(lines)
+            lines, size = [], 0
+        lines.append(line)
+        size += len(line)
+    if lines:
+        yield b"".join(lines), len(lines)
+
+
+class BulkIndexer:
+    """
+    Streams documents into a MeiliSearch index as NDJSON batches.
+
+    Documents are pulled lazily from an iterator, so memory holds at most
+    `max_in_flight` payloads regardless of the corpus size. Each batch counts as
+    done only once MeiliSearch reports its task succeeded; failed uploads and
+    failed tasks are re-sent up to `max_retries` times before the run fails.
+    """
+
+    def __init__(self, client: AsyncMeiliClient, index_name: str, batch_bytes: int = SEARCH_BULK_BATCH_BYTES,
+                 max_in_flight: int = SEARCH_BULK_MAX_IN_FLIGHT, max_retries: int = SEARCH_BULK_MAX_RETRIES,
+                 task_timeout: float = SEARCH_TASK_TIMEOUT_SECONDS, poll_interval: float = 0.05,
+                 retry_backoff: float = 1.0):
+        self.client = client
+        self.index_name = index_name
+        self.batch_bytes = batch_bytes
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.task_timeout = task_timeout
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+
+    async def wait_for_task(self, task_uid: int) -> dict:
+        """Poll a MeiliSearch task until it finishes; returns the task."""
+        deadline = time.monotonic() + self.task_timeout
+        interval = self.poll_interval
+        while True:
+            task = await self.client.get_task(task_uid)
+            if task["status"] in _FINISHED:
+                return task
+            if time.monotonic() > deadline:
+                raise BulkIndexError(f"MeiliSearch task {task_uid} still {task['status']} after {self.task_timeout:.0f}s")
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 1.0)
+
+    async def _index_batch(self, payload: bytes, result: BulkIndexResult):
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                result.retries += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                info = await self.client.add_documents_ndjson(self.index_name, payload)
+                task = await self.wait_for_task(info["taskUid"])
+            except BulkIndexError:
+                raise
+            except Exception as e:
+                error = f"upload failed: {e}"
+            else:
+                if task["status"] == "succeeded":
+                    return
+                error = f"task {task['uid']} {task['status']}: {task.get('error')}"
+            logger.warning(f"Search batch attempt {attempt + 1}/{self.max_retries + 1} {error}")
+        raise BulkIndexError(f"Search batch failed after {self.max_retries + 1} attempts: {error}")
+
+    async def run(self, documents: Iterable[dict]) -> BulkIndexResult:
+        """Index every document from `documents` and wait until MeiliSearch has applied them all."""
+        result = BulkIndexResult()
+        start = time.perf_counter()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        in_flight = set()
+        failures = []
+
+        def settled(task: asyncio.Task):
+            in_flight.discard(task)
+            slots.release()
+            if not task.cancelled() and task.exception() is not None:
+                failures.append(task.exception())
+
+        try:
+            for payload, count in ndjson_batches(documents, self.batch_bytes):
+                await slots.acquire()
+                if failures:
+                    slots.release()
+                    break
+                task = asyncio.create_task(self._index_batch(payload, result))
+                task.add_done_callback(settled)
+                in_flight.add(task)
+                result.documents += count
+                result.batches += 1
+                result.bytes += len(payload)
+                # Let the upload start before the next batch is serialized
+                await asyncio.sleep(0)
+            if in_flight:
+                await asyncio.wait(set(in_flight))
+        finally:
+            for task in in_flight:
+                task.cancel()
+        if failures:
+            raise failures[0]
+        result.seconds = time.perf_counter() - start
+        return result
@@ -1,222 +1,627 @@
-from app.database import get_db
-from app.crud import update_article_category
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import Counter, OrderedDict, deque
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
 
-async def recategorize_existing_articles():
-    """
-    Recategorizes all existing articles in the database using the improved categorization system.
-    This should be run after updating the categorization logic.
-    """
-    db = get_db()
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# "keywords" (the compiled keyword table) or "model" (a trained text classifier)
+CATEGORIZER_BACKEND = os.getenv("CATEGORIZER_BACKEND", "keywords")
+CATEGORIZER_MODEL_PATH = os.getenv("CATEGORIZER_MODEL_PATH", "models/category-nb")
+# Distinct tokens whose keyword hits the batch categorizer remembers between calls
+CATEGORIZE_TOKEN_CACHE_SIZE = int(os.getenv("CATEGORIZE_TOKEN_CACHE_SIZE", "500000"))
+# Categorized texts remembered by content hash; 0 disables the cache
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", "100000"))
+# Keyword score that counts an article as belonging to a category besides its primary one
+# (2 = one whole-word keyword); the model backend has its own threshold, in percent
+KEYWORD_MIN_CATEGORY_SCORE = int(os.getenv("KEYWORD_MIN_CATEGORY_SCORE", "2"))
+
+CATEGORY_KEYWORDS = {
+    "Politics": [
+        # Government and elections
+        "president", "congress", "senate", "house", "representative", "senator", "governor", "mayor",
+        "election", "campaign", "vote", "voting", "ballot", "primary", "caucus", "democrat", "republican",
+        "liberal", "conservative", "progressive", "moderate", "independent", "party", "political",
+        
+        # Government actions
+        "legislation", "bill", "law", "act", "policy", "executive order", "veto", "sign", "approve",
+        "pass", "reject", "amendment", "constitution", "supreme court", "judge", "justice", "nomination",
+        "confirmation", "impeachment", "investigation", "hearing", "committee", "subpoena", "testimony",
+        
+        # International relations
+        "diplomatic", "diplomacy", "foreign policy", "embassy", "ambassador", "treaty", "agreement",
+        "sanction", "tariff", "trade war", "nato", "united nations", "un", "alliance", "partnership",
+        "summit", "meeting", "negotiation", "peace", "war", "conflict", "crisis", "tension",
+        
+        # Political events
+        "protest", "demonstration", "rally", "march", "activist", "lobby", "lobbyist", "corruption",
+        "scandal", "ethics", "ethics committee", "oversight", "whistleblower", "leak", "classified",
+        "national security", "defense", "military", "veteran", "veterans affairs", "homeland security",
+        
+        # Political figures and institutions
+        "white house", "capitol", "pentagon", "state department", "treasury", "justice department",
+        "fbi", "cia", "nsa", "intelligence", "secretary", "minister", "prime minister", "chancellor",
+        "parliament", "legislature", "assembly", "council", "commission", "agency", "department",
+        
+        # Political issues
+        "immigration", "border", "refugee", "asylum", "citizenship", "voter", "voting rights",
+        "gerrymandering", "redistricting", "electoral", "electoral college", "popular vote",
+        "campaign finance", "super pac", "dark money", "lobbying", "special interest", "pork barrel",
+        "earmark", "appropriation", "budget", "deficit", "debt ceiling", "government shutdown",
+        "federal", "state", "local", "municipal", "county", "district", "ward", "precinct"
+    ],
     
-    # Get all articles that need recategorization
-    articles = db.execute(
-        "SELECT id, title, content FROM articles WHERE category = 'General' OR category IS NULL"
-    ).fetchall()
+    "Technology": [
+        # Tech companies and products
+        "apple", "google", "microsoft", "amazon", "facebook", "meta", "twitter", "x", "tesla", "spacex",
+        "netflix", "spotify", "uber", "lyft", "airbnb", "zoom", "slack", "discord", "tiktok", "instagram",
+        "youtube", "linkedin", "snapchat", "whatsapp", "telegram", "signal", "github", "stack overflow",
+        
+        # Tech concepts
+        "artificial intelligence", "ai", "machine learning", "ml", "deep learning", "neural network",
+        "algorithm", "data", "big data", "analytics", "cloud", "cloud computing", "saas", "paas", "iaas",
+        "blockchain", "cryptocurrency", "bitcoin", "ethereum", "nft", "web3", "metaverse", "vr", "ar",
+        "virtual reality", "augmented reality", "mixed reality", "quantum computing", "5g", "6g",
+        
+        # Software and development
+        "software", "app", "application", "programming", "coding", "developer", "programmer", "coder",
+        "code", "bug", "debug", "deploy", "release", "version", "update", "patch", "security", "hack",
+        "cybersecurity", "malware", "virus", "phishing", "encryption", "password", "authentication",
+        
+        # Hardware and devices
+        "smartphone", "iphone", "android", "laptop", "computer", "pc", "mac", "tablet", "ipad",
+        "smartwatch", "wearable", "headphone", "earbud", "speaker", "camera", "drone", "robot",
+        "automation", "iot", "internet of things", "smart home", "smart city", "autonomous", "self-driving"
+    ],
     
-    updated_count = 0
-    for article in articles:
-        new_category = categorize_article(article.title, article.content or "")
-        
-        # Only update if the category changed
-        if new_category != "General":
-            update_article_category(db, article.id, new_category)
-            updated_count += 1
+    "Business": [
+        # Financial terms
+        "stock", "market", "trading", "investor", "investment", "portfolio", "fund", "mutual fund",
+        "etf", "bond", "dividend", "earnings", "revenue", "profit", "loss", "quarterly", "annual",
+        "report", "filing", "sec", "securities", "exchange", "nyse", "nasdaq", "dow", "s&p",
+        
+        # Business operations
+        "company", "corporation", "inc", "llc", "startup", "venture", "capital", "funding", "ipo",
+        "merger", "acquisition", "buyout", "takeover", "bankruptcy", "restructuring", "layoff",
+        "hiring", "recruitment", "hr", "human resources", "ceo", "executive", "board", "director",
+        
+        # Economic terms
+        "economy", "economic", "gdp", "inflation", "deflation", "recession", "depression", "growth",
+        "decline", "unemployment", "employment", "job", "career", "salary", "wage", "minimum wage",
+        "union", "strike", "labor", "workforce", "productivity", "efficiency", "innovation",
+        
+        # Banking and finance
+        "bank", "banking", "credit", "debit", "loan", "mortgage", "interest", "rate", "federal reserve",
+        "fed", "central bank", "monetary", "fiscal", "tax", "taxation", "irs", "audit", "accounting",
+        "bookkeeping", "balance sheet", "income statement", "cash flow", "budget", "forecast"
+    ],
+    
+    "Sports": [
+        # Major sports
+        "nba", "nfl", "mlb", "nhl", "soccer", "football", "basketball", "baseball", "hockey",
+        "tennis", "golf", "boxing", "mma", "ufc", "wrestling", "olympics", "olympic", "paralympic",
+        "world cup", "championship", "tournament", "playoff", "final", "semifinal", "quarterfinal",
+        
+        # Sports terms
+        "game", "match", "competition", "race", "athlete", "player", "coach", "team", "league",
+        "conference", "division", "season", "draft", "trade", "free agent", "contract", "salary cap",
+        "score", "win", "lose", "victory", "defeat", "tie", "overtime", "penalty", "foul", "referee",
+        
+        # Sports events
+        "super bowl", "world series", "stanley cup", "nba finals", "march madness", "final four",
+        "bowl game", "all-star", "pro bowl", "olympic games", "paralympic games", "world championship",
+        "national championship", "conference championship", "division championship"
+    ],
+    
+    "Health": [
+        # Medical terms
+        "hospital", "clinic", "doctor", "physician", "nurse", "patient", "treatment", "therapy",
+        "diagnosis", "symptom", "disease", "illness", "infection", "virus", "bacteria", "pathogen",
+        "vaccine", "vaccination", "immunization", "antibiotic", "medication", "drug", "prescription",
+        "pharmacy", "pharmacist", "clinical trial", "research", "study", "medical", "medicine",
+        
+        # Health conditions
+        "cancer", "diabetes", "heart", "cardiac", "stroke", "alzheimer", "dementia", "autism",
+        "depression", "anxiety", "mental health", "psychology", "psychiatry", "therapy", "counseling",
+        "addiction", "substance abuse", "recovery", "rehabilitation", "physical therapy", "occupational therapy",
+        
+        # Healthcare system
+        "healthcare", "health insurance", "medicare", "medicaid", "obamacare", "aca", "affordable care act",
+        "premium", "deductible", "copay", "coverage", "provider", "network", "hmo", "ppo", "deductible",
+        "emergency", "urgent care", "primary care", "specialist", "surgeon", "surgery", "operation"
+    ],
     
-    print(f"Recategorized {updated_count} articles")
-    return updated_count
+    "Science": [
+        # Scientific fields
+        "physics", "chemistry", "biology", "genetics", "dna", "rna", "protein", "molecule", "atom",
+        "particle", "quantum", "theoretical", "experimental", "laboratory", "lab", "research", "study",
+        "experiment", "hypothesis", "theory", "evidence", "data", "analysis", "statistics", "peer review",
+        
+        # Space and astronomy
+        "nasa", "space", "astronomy", "astronaut", "satellite", "rocket", "launch", "orbit", "planet",
+        "star", "galaxy", "universe", "cosmos", "solar system", "mars", "moon", "earth", "sun",
+        "telescope", "observatory", "mission", "rover", "probe", "spacecraft", "space station",
+        
+        # Environmental science
+        "climate", "climate change", "global warming", "environment", "environmental", "ecosystem",
+        "species", "biodiversity", "conservation", "pollution", "emission", "carbon", "greenhouse",
+        "renewable", "solar", "wind", "nuclear", "fossil fuel", "oil", "gas", "coal", "sustainability"
+    ],
+    
+    "Entertainment": [
+        # Movies and TV
+        "movie", "film", "cinema", "theater", "hollywood", "netflix", "hulu", "disney", "amazon prime",
+        "streaming", "television", "tv", "show", "series", "episode", "season", "premiere", "finale",
+        "actor", "actress", "director", "producer", "screenwriter", "script", "screenplay", "casting",
+        
+        # Music
+        "music", "song", "album", "artist", "singer", "band", "concert", "tour", "performance",
+        "grammy", "billboard", "chart", "hit", "single", "release", "debut", "collaboration", "duet",
+        "playlist", "streaming", "spotify", "apple music", "pandora", "radio", "dj", "producer",
+        
+        # Awards and events
+        "oscar", "academy award", "golden globe", "emmy", "tony", "grammy", "mtv", "billboard music award",
+        "red carpet", "premiere", "award show", "ceremony", "gala", "festival", "cannes", "sundance",
+        "celebrity", "star", "fame", "gossip", "tabloid", "paparazzi", "fan", "fandom", "convention"
+    ],
+    
+    "Weather": [
+        # Weather conditions
+        "weather", "forecast", "temperature", "humidity", "pressure", "wind", "rain", "snow", "sleet",
+        "hail", "storm", "thunderstorm", "lightning", "thunder", "cloud", "sunny", "cloudy", "rainy",
+        "snowy", "foggy", "misty", "drizzle", "shower", "downpour", "blizzard", "whiteout",
+        
+        # Severe weather
+        "hurricane", "typhoon", "cyclone", "tornado", "twister", "flood", "flash flood", "drought",
+        "heat wave", "cold snap", "freeze", "frost", "ice", "sleet", "hail", "wildfire", "bushfire",
+        "tsunami", "earthquake", "volcano", "eruption", "landslide", "avalanche", "mudslide",
+        
+        # Climate and environment
+        "climate", "climate change", "global warming", "greenhouse effect", "carbon dioxide", "co2",
+        "emission", "pollution", "air quality", "uv index", "pollen", "allergy", "seasonal", "spring",
+        "summer", "fall", "autumn", "winter", "season", "seasonal", "equinox", "solstice"
+    ]
+}
+
+def _build_automaton(keywords):
+    """
+    Compile keywords into an Aho-Corasick automaton.
+
+    Returns per-state transition dicts (only where they differ from the root's),
+    and per-state tuples of the keyword ids that end in that state.
+    """
+    goto = [{}]
+    outputs = [[]]
+    for keyword_id, keyword in enumerate(keywords):
+        state = 0
+        for char in keyword:
+            nxt = goto[state].get(char)
+            if nxt is None:
+                nxt = len(goto)
+                goto[state][char] = nxt
+                goto.append({})
+                outputs.append([])
+            state = nxt
+        outputs[state].append(keyword_id)
+
+    # Breadth-first: fail links, inherited outputs and full DFA transitions
+    fail = [0] * len(goto)
+    delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        delta[state] = {**delta[fail[state]], **goto[state]}
+        for char, nxt in goto[state].items():
+            fail[nxt] = delta[fail[state]].get(char, 0)
+            outputs[nxt].extend(outputs[fail[nxt]])
+            queue.append(nxt)
+
+    # Keep only transitions that differ from the root's to save memory
+    root = delta[0]
+    transitions = [root] + [
+        {char: nxt for char, nxt in delta[state].items() if root.get(char, 0) != nxt}
+        for state in range(1, len(goto))
+    ]
+    return transitions, [tuple(out) for out in outputs]
+
+
+class KeywordCategorizer:
+    """
+    Scores every category in one pass over the text.
+
+    Same rules as scanning the keyword lists one by one: a keyword scores 2 when it
+    appears as a whole space-delimited phrase, 1 when it only appears inside a
+    longer word, once per time it is listed under a category. Ties go to the
+    category listed first.
+    """
+
+    def __init__(self, category_keywords: Dict[str, List[str]]):
+        self.categories = list(category_keywords)
+        self.keywords = list(dict.fromkeys(kw for keywords in category_keywords.values() for kw in keywords))
+        keyword_ids = {keyword: i for i, keyword in enumerate(self.keywords)}
+        # keyword id -> [(category index, times listed)]
+        self.keyword_categories = [[] for _ in self.keywords]
+        for category_index, keywords in enumerate(category_keywords.values()):
+            for keyword, count in Counter(keywords).items():
+                self.keyword_categories[keyword_ids[keyword]].append((category_index, count))
+        self.lengths = [len(keyword) for keyword in self.keywords]
+        self.transitions, self.outputs = _build_automaton(self.keywords)
+
+    def keyword_hits(self, text: str) -> Dict[int, int]:
+        """Map each keyword id found in `text` to 2 (whole phrase) or 1 (substring only)."""
+        hits = {}
+        transitions, outputs, lengths = self.transitions, self.outputs, self.lengths
+        root = transitions[0]
+        last = len(text) - 1
+        state = 0
+        for end, char in enumerate(text):
+            state = transitions[state].get(char) or root.get(char, 0)
+            for keyword_id in outputs[state]:
+                if hits.get(keyword_id) == 2:
+                    continue
+                start = end - lengths[keyword_id]
+                bounded = (start < 0 or text[start] == " ") and (end == last or text[end + 1] == " ")
+                hits[keyword_id] = 2 if bounded else 1
+        return hits
+
+    def scores(self, text: str) -> List[int]:
+        scores = [0] * len(self.categories)
+        keyword_categories = self.keyword_categories
+        for keyword_id, weight in self.keyword_hits(text).items():
+            for category_index, count in keyword_categories[keyword_id]:
+                scores[category_index] += weight * count
+        return scores
+
+    def categorize(self, text: str) -> str:
+        scores = self.scores(text)
+        best = max(range(len(scores)), key=scores.__getitem__)
+        return self.categories[best] if scores[best] > 0 else "General"
+
+
+class BatchCategorizer:
+    """
+    Categorizes a chunk of articles per call with the same scores as `KeywordCategorizer`.
+
+    A keyword without spaces can only occur inside one space-delimited token, so each
+    distinct token is scanned once for the keywords it equals (2 points) or contains
+    (1 point), and the results are cached across calls. Sparse article x token and
+    token x keyword matrices then give every article's keyword hits in one product,
+    which is multiplied by the keyword x category weight matrix to score the chunk.
+    Multi-word keywords are confirmed against the text only for articles whose
+    tokens contain all of their words.
+    """
+
+    def __init__(self, category_keywords: Dict[str, List[str]], token_cache_size: int = CATEGORIZE_TOKEN_CACHE_SIZE):
+        self.categories = list(category_keywords)
+        self.keywords = list(dict.fromkeys(kw for keywords in category_keywords.values() for kw in keywords))
+
+        # Token-level terms: every keyword, plus the words of multi-word keywords
+        terms = list(self.keywords)
+        term_ids = {term: i for i, term in enumerate(terms)}
+        self.phrases: List[Tuple[int, str, List[int]]] = []
+        for keyword_id, keyword in enumerate(self.keywords):
+            if " " not in keyword:
+                continue
+            words = keyword.split(" ")
+            for word in words:
+                if word not in term_ids:
+                    term_ids[word] = len(terms)
+                    terms.append(word)
+            self.phrases.append((keyword_id, keyword, sorted({term_ids[word] for word in words})))
+        self.term_ids = term_ids
+        self.transitions, self.outputs = _build_automaton(terms)
+
+        # Phrase-word rows stay zero: only whole keywords score
+        self.weights = np.zeros((len(terms), len(self.categories)), dtype=np.int32)
+        for category_index, keywords in enumerate(category_keywords.values()):
+            for keyword in keywords:
+                self.weights[term_ids[keyword], category_index] += 1
+
+        self.token_cache_size = token_cache_size
+        self._token_hits: Dict[str, Tuple[int, Tuple[int, ...]]] = {}
+
+    def _scan_token(self, token: str) -> Tuple[int, Tuple[int, ...]]:
+        """Return the term the token equals (-1 if none) and every term it contains."""
+        transitions, outputs = self.transitions, self.outputs
+        root = transitions[0]
+        found = set()
+        state = 0
+        for char in token:
+            state = transitions[state].get(char) or root.get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return self.term_ids.get(token, -1), tuple(found)
+
+    def _token_matrices(self, tokens: List[str]):
+        """Token x term matrices: terms each token contains, and the term it equals."""
+        cache = self._token_hits
+        if len(cache) + len(tokens) > self.token_cache_size:
+            cache.clear()
+        contained_indices, contained_indptr = [], [0]
+        whole_rows, whole_terms = [], []
+        for row, token in enumerate(tokens):
+            entry = cache.get(token)
+            if entry is None:
+                entry = self._scan_token(token)
+                if len(cache) < self.token_cache_size:
+                    cache[token] = entry
+            whole, found = entry
+            contained_indices.extend(found)
+            contained_indptr.append(len(contained_indices))
+            if whole >= 0:
+                whole_rows.append(row)
+                whole_terms.append(whole)
+        shape = (len(tokens), len(self.term_ids))
+        contained = sparse.csr_matrix(
+            (np.ones(len(contained_indices), dtype=np.int32), contained_indices, contained_indptr), shape=shape
+        )
+        whole = sparse.csr_matrix((np.ones(len(whole_rows), dtype=np.int32), (whole_rows, whole_terms)), shape=shape)
+        return contained, whole
+
+    def scores(self, texts: List[str]) -> np.ndarray:
+        """Article x category score matrix for `texts`."""
+        if not texts:
+            return np.zeros((0, len(self.categories)), dtype=np.int32)
+        split_texts = [text.split(" ") for text in texts]
+        tokens = list(set(chain.from_iterable(split_texts)))
+        token_ids = dict(zip(tokens, range(len(tokens))))
+        token_columns = np.array(list(map(token_ids.__getitem__, chain.from_iterable(split_texts))))
+        doc_rows = np.repeat(np.arange(len(texts)), [len(words) for words in split_texts])
+        doc_tokens = sparse.csr_matrix(
+            (np.ones(len(token_columns), dtype=np.int32), (doc_rows, token_columns)), shape=(len(texts), len(tokens))
+        )
+
+        contained, whole = self._token_matrices(tokens)
+        # 1 point for a keyword inside some token, 2 once it is also a whole token
+        substring_hits = (doc_tokens @ contained) > 0
+        hits = substring_hits.astype(np.int32) + ((doc_tokens @ whole) > 0).astype(np.int32)
+
+        phrase_rows, phrase_terms, phrase_weights = [], [], []
+        if self.phrases:
+            by_term = substring_hits.tocsc()
+            for keyword_id, phrase, word_ids in self.phrases:
+                candidates = by_term.indices[by_term.indptr[word_ids[0]]:by_term.indptr[word_ids[0] + 1]]
+                for word_id in word_ids[1:]:
+                    if not len(candidates):
+                        break
+                    column = by_term.indices[by_term.indptr[word_id]:by_term.indptr[word_id + 1]]
+                    candidates = np.intersect1d(candidates, column, assume_unique=True)
+                for row in candidates.tolist():
+                    text = texts[row]
+                    if f" {phrase} " in f" {text} ":
+                        weight = 2
+                    elif phrase in text:
+                        weight = 1
+                    else:
+                        continue
+                    phrase_rows.append(row)
+                    phrase_terms.append(keyword_id)
+                    phrase_weights.append(weight)
+        if phrase_rows:
+            hits = hits + sparse.csr_matrix(
+                (np.array(phrase_weights, dtype=np.int32), (phrase_rows, phrase_terms)), shape=hits.shape
+            )
+
+        return np.asarray(hits @ self.weights)
+
+    def categorize(self, texts: List[str]) -> List[str]:
+        scores = self.scores(texts)
+        # argmax picks the first maximum, i.e. the category listed first, like max() over the dict
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(texts)), best]
+        return [
+            self.categories[index] if score > 0 else "General"
+            for index, score in zip(best.tolist(), best_scores.tolist())
+        ]
+
+
+def keyword_table_version(category_keywords: Dict[str, List[str]]) -> str:
+    """Stamp that changes whenever a category, keyword or their order (which breaks ties) changes."""
+    return hashlib.blake2b(json.dumps(category_keywords).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class CategoryCache:
+    """
+    Bounded LRU of (category, score vector) results keyed by a hash of the exact text
+    the categorizer scores.
+
+    Entries belong to one keyword-table version; a lookup under another version
+    drops them all, so an edited table never serves categories from the old one.
+
+    Thread-safe: ingest scores on the event loop while recategorization scores
+    chunks in an executor thread, both through the shared `category_cache`.
+    """
+
+    def __init__(self, capacity: int = CATEGORY_CACHE_SIZE):
+        self.capacity = capacity
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _use_version(self, version: str):
+        # Called with the lock held
+        if version != self.version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self.version = version
+
+    def get(self, key: bytes, version: str):
+        with self._lock:
+            self._use_version(version)
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: bytes, result, version: str):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._use_version(version)
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+category_cache = CategoryCache()
+
+
+class KeywordBackend:
+    """Keyword scoring: the automaton for single texts, the batch categorizer for chunks."""
+
+    def __init__(self, category_keywords: Dict[str, List[str]]):
+        self.categorizer = KeywordCategorizer(category_keywords)
+        self.batch_categorizer = BatchCategorizer(category_keywords)
+        self.categories = self.categorizer.categories
+        self.version = keyword_table_version(category_keywords)
+        self.min_category_score = KEYWORD_MIN_CATEGORY_SCORE
+
+    def score_texts(self, texts: List[str]) -> List[Tuple[str, Tuple[int, ...]]]:
+        """(category, per-category score) for each lowercased text."""
+        if len(texts) == 1:
+            rows = [self.categorizer.scores(texts[0])]
+            best = [max(range(len(rows[0])), key=rows[0].__getitem__)]
+        else:
+            matrix = self.batch_categorizer.scores(texts)
+            # argmax picks the first maximum, i.e. the category listed first, like max() over the dict
+            best = matrix.argmax(axis=1).tolist()
+            rows = matrix.tolist()
+        return [
+            (self.categories[index] if scores[index] > 0 else "General", tuple(scores))
+            for index, scores in zip(best, rows)
+        ]
+
+
+_keyword_backend: Optional[KeywordBackend] = None
+_backend = None
+
+
+def load_category_keywords(category_keywords: Dict[str, List[str]]):
+    """Compile a keyword table; cached results from another table stop being used."""
+    global _keyword_backend, _backend
+    keywords_active = _backend is _keyword_backend
+    _keyword_backend = KeywordBackend(category_keywords)
+    if keywords_active:
+        _backend = _keyword_backend
+
+
+def use_categorizer(backend: str = CATEGORIZER_BACKEND, model_path: str = CATEGORIZER_MODEL_PATH):
+    """
+    Select the categorizer: "keywords" or "model" (a trained `NaiveBayesClassifier` directory).
+    A model that cannot be loaded is logged and the keyword engine stays in use.
+    """
+    global _backend
+    if backend == "keywords":
+        _backend = _keyword_backend
+    elif backend == "model":
+        from app.services.text_classifier import NaiveBayesClassifier
+
+        try:
+            _backend = NaiveBayesClassifier.load(model_path)
+            logger.info(f"Categorizing with the model in {model_path} ({', '.join(_backend.categories)})")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load categorizer model from {model_path}: {e}; using keywords")
+            _backend = _keyword_backend
+    else:
+        raise ValueError(f"Unknown categorizer backend: {backend}")
+
+
+load_category_keywords(CATEGORY_KEYWORDS)
+use_categorizer()
+
+
+def _score_dict(categories: List[str], scores: Iterable[int]) -> Dict[str, int]:
+    return {category: score for category, score in zip(categories, scores) if score}
+
+
+def score_article(title: str, content: str = "") -> Tuple[str, Dict[str, int]]:
+    """The article's category and its non-zero score for every category."""
+    backend = _backend
+    text = (title + " " + content).lower()
+    key = category_cache.key(text)
+    result = category_cache.get(key, backend.version)
+    if result is None:
+        result = backend.score_texts([text])[0]
+        category_cache.put(key, result, backend.version)
+    return result[0], _score_dict(backend.categories, result[1])
+
 
 def categorize_article(title: str, content: str = "") -> str:
     """
     Categorizes an article based on keywords in its title and content.
     Uses improved matching to avoid false positives and better political detection.
     """
-    text_to_analyze = (title + " " + content).lower()
-    
-    # Create a more comprehensive and accurate categorization system
-    categories = {
-        "Politics": [
-            # Government and elections
-            "president", "congress", "senate", "house", "representative", "senator", "governor", "mayor",
-            "election", "campaign", "vote", "voting", "ballot", "primary", "caucus", "democrat", "republican",
-            "liberal", "conservative", "progressive", "moderate", "independent", "party", "political",
-            
-            # Government actions
-            "legislation", "bill", "law", "act", "policy", "executive order", "veto", "sign", "approve",
-            "pass", "reject", "amendment", "constitution", "supreme court", "judge", "justice", "nomination",
-            "confirmation", "impeachment", "investigation", "hearing", "committee", "subpoena", "testimony",
-            
-            # International relations
-            "diplomatic", "diplomacy", "foreign policy", "embassy", "ambassador", "treaty", "agreement",
-            "sanction", "tariff", "trade war", "nato", "united nations", "un", "alliance", "partnership",
-            "summit", "meeting", "negotiation", "peace", "war", "conflict", "crisis", "tension",
-            
-            # Political events
-            "protest", "demonstration", "rally", "march", "activist", "lobby", "lobbyist", "corruption",
-            "scandal", "ethics", "ethics committee", "oversight", "whistleblower", "leak", "classified",
-            "national security", "defense", "military", "veteran", "veterans affairs", "homeland security",
-            
-            # Political figures and institutions
-            "white house", "capitol", "pentagon", "state department", "treasury", "justice department",
-            "fbi", "cia", "nsa", "intelligence", "secretary", "minister", "prime minister", "chancellor",
-            "parliament", "legislature", "assembly", "council", "commission", "agency", "department",
-            
-            # Political issues
-            "immigration", "border", "refugee", "asylum", "citizenship", "voter", "voting rights",
-            "gerrymandering", "redistricting", "electoral", "electoral college", "popular vote",
-            "campaign finance", "super pac", "dark money", "lobbying", "special interest", "pork barrel",
-            "earmark", "appropriation", "budget", "deficit", "debt ceiling", "government shutdown",
-            "federal", "state", "local", "municipal", "county", "district", "ward", "precinct"
-        ],
-        
-        "Technology": [
-            # Tech companies and products
-            "apple", "google", "microsoft", "amazon", "facebook", "meta", "twitter", "x", "tesla", "spacex",
-            "netflix", "spotify", "uber", "lyft", "airbnb", "zoom", "slack", "discord", "tiktok", "instagram",
-            "youtube", "linkedin", "snapchat", "whatsapp", "telegram", "signal", "github", "stack overflow",
-            
-            # Tech concepts
-            "artificial intelligence", "ai", "machine learning", "ml", "deep learning", "neural network",
-            "algorithm", "data", "big data", "analytics", "cloud", "cloud computing", "saas", "paas", "iaas",
-            "blockchain", "cryptocurrency", "bitcoin", "ethereum", "nft", "web3", "metaverse", "vr", "ar",
-            "virtual reality", "augmented reality", "mixed reality", "quantum computing", "5g", "6g",
-            
-            # Software and development
-            "software", "app", "application", "programming", "coding", "developer", "programmer", "coder",
-            "code", "bug", "debug", "deploy", "release", "version", "update", "patch", "security", "hack",
-            "cybersecurity", "malware", "virus", "phishing", "encryption", "password", "authentication",
-            
-            # Hardware and devices
-            "smartphone", "iphone", "android", "laptop", "computer", "pc", "mac", "tablet", "ipad",
-            "smartwatch", "wearable", "headphone", "earbud", "speaker", "camera", "drone", "robot",
-            "automation", "iot", "internet of things", "smart home", "smart city", "autonomous", "self-driving"
-        ],
-        
-        "Business": [
-            # Financial terms
-            "stock", "market", "trading", "investor", "investment", "portfolio", "fund", "mutual fund",
-            "etf", "bond", "dividend", "earnings", "revenue", "profit", "loss", "quarterly", "annual",
-            "report", "filing", "sec", "securities", "exchange", "nyse", "nasdaq", "dow", "s&p",
-            
-            # Business operations
-            "company", "corporation", "inc", "llc", "startup", "venture", "capital", "funding", "ipo",
-            "merger", "acquisition", "buyout", "takeover", "bankruptcy", "restructuring", "layoff",
-            "hiring", "recruitment", "hr", "human resources", "ceo", "executive", "board", "director",
-            
-            # Economic terms
-            "economy", "economic", "gdp", "inflation", "deflation", "recession", "depression", "growth",
-            "decline", "unemployment", "employment", "job", "career", "salary", "wage", "minimum wage",
-            "union", "strike", "labor", "workforce", "productivity", "efficiency", "innovation",
-            
-            # Banking and finance
-            "bank", "banking", "credit", "debit", "loan", "mortgage", "interest", "rate", "federal reserve",
-            "fed", "central bank", "monetary", "fiscal", "tax", "taxation", "irs", "audit", "accounting",
-            "bookkeeping", "balance sheet", "income statement", "cash flow", "budget", "forecast"
-        ],
-        
-        "Sports": [
-            # Major sports
-            "nba", "nfl", "mlb", "nhl", "soccer", "football", "basketball", "baseball", "hockey",
-            "tennis", "golf", "boxing", "mma", "ufc", "wrestling", "olympics", "olympic", "paralympic",
-            "world cup", "championship", "tournament", "playoff", "final", "semifinal", "quarterfinal",
-            
-            # Sports terms
-            "game", "match", "competition", "race", "athlete", "player", "coach", "team", "league",
-            "conference", "division", "season", "draft", "trade", "free agent", "contract", "salary cap",
-            "score", "win", "lose", "victory", "defeat", "tie", "overtime", "penalty", "foul", "referee",
-            
-            # Sports events
-            "super bowl", "world series", "stanley cup", "nba finals", "march madness", "final four",
-            "bowl game", "all-star", "pro bowl", "olympic games", "paralympic games", "world championship",
-            "national championship", "conference championship", "division championship"
-        ],
-        
-        "Health": [
-            # Medical terms
-            "hospital", "clinic", "doctor", "physician", "nurse", "patient", "treatment", "therapy",
-            "diagnosis", "symptom", "disease", "illness", "infection", "virus", "bacteria", "pathogen",
-            "vaccine", "vaccination", "immunization", "antibiotic", "medication", "drug", "prescription",
-            "pharmacy", "pharmacist", "clinical trial", "research", "study", "medical", "medicine",
-            
-            # Health conditions
-            "cancer", "diabetes", "heart", "cardiac", "stroke", "alzheimer", "dementia", "autism",
-            "depression", "anxiety", "mental health", "psychology", "psychiatry", "therapy", "counseling",
-            "addiction", "substance abuse", "recovery", "rehabilitation", "physical therapy", "occupational therapy",
-            
-            # Healthcare system
-            "healthcare", "health insurance", "medicare", "medicaid", "obamacare", "aca", "affordable care act",
-            "premium", "deductible", "copay", "coverage", "provider", "network", "hmo", "ppo", "deductible",
-            "emergency", "urgent care", "primary care", "specialist", "surgeon", "surgery", "operation"
-        ],
-        
-        "Science": [
-            # Scientific fields
-            "physics", "chemistry", "biology", "genetics", "dna", "rna", "protein", "molecule", "atom",
-            "particle", "quantum", "theoretical", "experimental", "laboratory", "lab", "research", "study",
-            "experiment", "hypothesis", "theory", "evidence", "data", "analysis", "statistics", "peer review",
-            
-            # Space and astronomy
-            "nasa", "space", "astronomy", "astronaut", "satellite", "rocket", "launch", "orbit", "planet",
-            "star", "galaxy", "universe", "cosmos", "solar system", "mars", "moon", "earth", "sun",
-            "telescope", "observatory", "mission", "rover", "probe", "spacecraft", "space station",
-            
-            # Environmental science
-            "climate", "climate change", "global warming", "environment", "environmental", "ecosystem",
-            "species", "biodiversity", "conservation", "pollution", "emission", "carbon", "greenhouse",
-            "renewable", "solar", "wind", "nuclear", "fossil fuel", "oil", "gas", "coal", "sustainability"
-        ],
-        
-        "Entertainment": [
-            # Movies and TV
-            "movie", "film", "cinema", "theater", "hollywood", "netflix", "hulu", "disney", "amazon prime",
-            "streaming", "television", "tv", "show", "series", "episode", "season", "premiere", "finale",
-            "actor", "actress", "director", "producer", "screenwriter", "script", "screenplay", "casting",
-            
-            # Music
-            "music", "song", "album", "artist", "singer", "band", "concert", "tour", "performance",
-            "grammy", "billboard", "chart", "hit", "single", "release", "debut", "collaboration", "duet",
-            "playlist", "streaming", "spotify", "apple music", "pandora", "radio", "dj", "producer",
-            
-            # Awards and events
-            "oscar", "academy award", "golden globe", "emmy", "tony", "grammy", "mtv", "billboard music award",
-            "red carpet", "premiere", "award show", "ceremony", "gala", "festival", "cannes", "sundance",
-            "celebrity", "star", "fame", "gossip", "tabloid", "paparazzi", "fan", "fandom", "convention"
-        ],
-        
-        "Weather": [
-            # Weather conditions
-            "weather", "forecast", "temperature", "humidity", "pressure", "wind", "rain", "snow", "sleet",
-            "hail", "storm", "thunderstorm", "lightning", "thunder", "cloud", "sunny", "cloudy", "rainy",
-            "snowy", "foggy", "misty", "drizzle", "shower", "downpour", "blizzard", "whiteout",
-            
-            # Severe weather
-            "hurricane", "typhoon", "cyclone", "tornado", "twister", "flood", "flash flood", "drought",
-            "heat wave", "cold snap", "freeze", "frost", "ice", "sleet", "hail", "wildfire", "bushfire",
-            "tsunami", "earthquake", "volcano", "eruption", "landslide", "avalanche", "mudslide",
-            
-            # Climate and environment
-            "climate", "climate change", "global warming", "greenhouse effect", "carbon dioxide", "co2",
-            "emission", "pollution", "air quality", "uv index", "pollen", "allergy", "seasonal", "spring",
-            "summer", "fall", "autumn", "winter", "season", "seasonal", "equinox", "solstice"
-        ]
-    }
+    return score_article(title, content)[0]
 
 
-    category_scores = {}
-    
-    for category, keywords in categories.items():
-        score = 0
-        for keyword in keywords:
-        
-            if f" {keyword} " in f" {text_to_analyze} ":
-                score += 2 
-            elif keyword in text_to_analyze:
-                score += 1  
-        category_scores[category] = score
-    
-  
-    if category_scores:
-        best_category = max(category_scores, key=category_scores.get)
-        if category_scores[best_category] > 0:
-            return best_category
-    
-    return "General"
+def score_articles(articles: Iterable[Tuple[str, str]]) -> List[Tuple[str, Dict[str, int]]]:
+    """Batch `score_article` for many (title, content) pairs at once."""
+    backend = _backend
+    texts = [(title + " " + (content or "")).lower() for title, content in articles]
+    keys = [category_cache.key(text) for text in texts]
+    results = [category_cache.get(key, backend.version) for key in keys]
+    # Repeated texts within the chunk are scored once
+    missing = {key: text for key, text, result in zip(keys, texts, results) if result is None}
+    if missing:
+        scored = dict(zip(missing, backend.score_texts(list(missing.values()))))
+        for key, result in scored.items():
+            category_cache.put(key, result, backend.version)
+        results = [result or scored[key] for key, result in zip(keys, results)]
+    return [(category, _score_dict(backend.categories, scores)) for category, scores in results]
+
+
+def categorize_articles(articles: Iterable[Tuple[str, str]]) -> List[str]:
+    """Categorize many (title, content) pairs at once; same results as `categorize_article` per pair."""
+    return [category for category, _ in score_articles(articles)]
+
+
+def category_names() -> List[str]:
+    """Categories of the active categorizer, in tie-breaking order."""
+    return list(_backend.categories)
+
+
+def min_category_score() -> int:
+    """
+    Stored score at which the active categorizer counts an article as belonging to a
+    category, in its own units: keyword hits, or model probability in percent.
+    """
+    return _backend.min_category_score
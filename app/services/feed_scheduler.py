@@ -0,0 +1,156 @@
+import os
+import random
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# Bounds for a single feed's polling interval, in seconds
+FEED_MIN_INTERVAL = int(os.getenv("FEED_MIN_INTERVAL", "120"))
+FEED_MAX_INTERVAL = int(os.getenv("FEED_MAX_INTERVAL", "3600"))
+FEED_DEFAULT_INTERVAL = int(os.getenv("FEED_DEFAULT_INTERVAL", "300"))
+# Ceiling for exponential backoff after consecutive errors
+FEED_MAX_BACKOFF = int(os.getenv("FEED_MAX_BACKOFF", "21600"))
+# +/- fraction applied to every next-due time so feeds don't fire in lockstep
+FEED_JITTER = float(os.getenv("FEED_JITTER", "0.1"))
+# Unchanged polls stretch the interval by this factor
+FEED_IDLE_DECAY = float(os.getenv("FEED_IDLE_DECAY", "1.25"))
+# The update loop never wakes more often than this, so due feeds are fetched in small batches
+FEED_SCHEDULER_TICK = int(os.getenv("FEED_SCHEDULER_TICK", "60"))
+
+NEWSAPI_FEED_KEY = "newsapi"
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def estimate_publish_rate(published: Iterable[datetime]) -> Optional[float]:
+    """Estimate items per second from the publish times of the entries in one feed body."""
+    times = sorted(set(t for t in published if t))
+    if len(times) < 2:
+        return None
+    span = (times[-1] - times[0]).total_seconds()
+    if span <= 0:
+        return None
+    return (len(times) - 1) / span
+
+
+class FeedScheduler:
+    """
+    Gives every feed its own next-due time.
+
+    The interval tracks the feed's observed publish rate (one poll per expected
+    new item), never drops below the publisher's TTL / sy:updatePeriod hint,
+    grows while the feed is unchanged and backs off exponentially on errors.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.feeds: Dict[str, dict] = {}
+
+    def register(self, feed_keys: Iterable[str], fixed_interval: Optional[int] = None):
+        """Add feeds to the schedule, spreading their first due times across one interval."""
+        new_keys = [key for key in feed_keys if key not in self.feeds]
+        now = self.clock()
+        interval = fixed_interval or FEED_DEFAULT_INTERVAL
+        for i, key in enumerate(new_keys):
+            self.feeds[key] = {
+                "interval": interval,
+                "fixed": fixed_interval is not None,
+                "next_due": now + interval * (i + 1) / len(new_keys),
+                "last_fetched": None,
+                "last_status": None,
+                "consecutive_errors": 0,
+                "publish_rate": None,
+                "hint_seconds": None,
+            }
+
+    def _reschedule(self, state: dict, interval: float):
+        jitter = random.uniform(-FEED_JITTER, FEED_JITTER) * interval
+        state["next_due"] = self.clock() + interval + jitter
+
+    def claim_due(self) -> List[str]:
+        """
+        Return feeds that are due now and provisionally push them one interval out,
+        so a failed cycle cannot make the loop spin on the same feeds.
+        """
+        now = self.clock()
+        due = [key for key, state in self.feeds.items() if state["next_due"] <= now]
+        for key in due:
+            self._reschedule(self.feeds[key], self.feeds[key]["interval"])
+        return due
+
+    def seconds_until_next_due(self) -> float:
+        if not self.feeds:
+            return FEED_DEFAULT_INTERVAL
+        wait = min(state["next_due"] for state in self.feeds.values()) - self.clock()
+        return max(wait, FEED_SCHEDULER_TICK)
+
+    def record_result(self, feed_key: str, result: dict):
+        """Update a feed's cadence from one fetch outcome (see `fetch_rss_articles`)."""
+        if feed_key not in self.feeds:
+            self.register([feed_key])
+        state = self.feeds[feed_key]
+        status = result.get("status", "ok")
+        state["last_status"] = status
+        state["last_fetched"] = self.clock()
+
+        if status == "error":
+            state["consecutive_errors"] += 1
+            backoff = state["interval"] * (2 ** state["consecutive_errors"])
+            self._reschedule(state, min(backoff, FEED_MAX_BACKOFF))
+            return
+
+        state["consecutive_errors"] = 0
+        if state["fixed"]:
+            self._reschedule(state, state["interval"])
+            return
+
+        hint = max(result.get("ttl_seconds") or 0, result.get("update_period_seconds") or 0)
+        if hint:
+            state["hint_seconds"] = hint
+
+        if status == "unchanged":
+            interval = state["interval"] * FEED_IDLE_DECAY
+        else:
+            rate = estimate_publish_rate(result.get("published") or [])
+            if rate:
+                state["publish_rate"] = rate
+                interval = 1 / rate
+            else:
+                interval = FEED_DEFAULT_INTERVAL
+
+        floor = max(FEED_MIN_INTERVAL, min(state["hint_seconds"] or 0, FEED_MAX_INTERVAL))
+        state["interval"] = _clamp(interval, floor, FEED_MAX_INTERVAL)
+        self._reschedule(state, state["interval"])
+
+    def snapshot(self) -> List[dict]:
+        """Schedule state for the admin endpoint, soonest-due first."""
+        now = self.clock()
+        rows = []
+        for key, state in self.feeds.items():
+            interval = state["interval"]
+            if state["consecutive_errors"]:
+                activity = "backoff"
+            elif interval <= FEED_MIN_INTERVAL * 2:
+                activity = "hot"
+            elif interval >= FEED_MAX_INTERVAL / 2:
+                activity = "idle"
+            else:
+                activity = "normal"
+            rows.append({
+                "feed": key,
+                "activity": activity,
+                "interval_seconds": round(interval, 1),
+                "next_due_in_seconds": round(state["next_due"] - now, 1),
+                "last_fetched": datetime.utcfromtimestamp(state["last_fetched"]).isoformat() if state["last_fetched"] else None,
+                "last_status": state["last_status"],
+                "consecutive_errors": state["consecutive_errors"],
+                "publish_rate_per_hour": round(state["publish_rate"] * 3600, 2) if state["publish_rate"] else None,
+                "hint_seconds": state["hint_seconds"],
+            })
+        rows.sort(key=lambda row: row["next_due_in_seconds"])
+        return rows
+
+
+feed_scheduler = FeedScheduler()
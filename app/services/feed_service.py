@@ -1,73 +1,103 @@
-import asyncio
-from datetime import datetime
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
 from sqlalchemy.orm import Session
-from app.adapters.newsapi_adapter import fetch_newsapi_articles
-from app.adapters.rss_adapter import fetch_rss_articles
-from app.services.categorization import categorize_article
+from app.adapters.rss_adapter import RSS_FEEDS
+from app.adapters.feed_validators import validator_store
+from app.adapters.newsapi_adapter import newsapi_quota
+from app.services.ingest_pipeline import IngestPipeline
+from app.services import search_service
+from app.services.local_search import local_search_index
+from app.services.near_duplicates import story_index
+from app.services.url_filter import known_urls
 from app.database import Article
+from app.schemas import IngestResult
 from app import crud
 
+logger = logging.getLogger(__name__)
 
-async def fetch_and_store_latest_articles(db: Session, limit: int = 20):
-    """Fetch and merge articles from all adapters, deduplicate & sort."""
-    newsapi_task = fetch_newsapi_articles(limit=limit)
-    rss_task = fetch_rss_articles(limit=limit)
+# Articles published longer ago than this are deleted (saved ones are kept); 0 keeps everything
+ARTICLE_RETENTION_DAYS = int(os.getenv("ARTICLE_RETENTION_DAYS", "0"))
 
-    results = await asyncio.gather(newsapi_task, rss_task, return_exceptions=True)
-    articles = [
-        item for sub in results if not isinstance(sub, Exception) for item in sub
-    ]
 
-    # Deduplicate articles from adapters first, based on URL
-    unique_articles_dict = {art["url"]: art for art in articles}
-    articles = list(unique_articles_dict.values())
+async def fetch_and_store_latest_articles(
+    db: Session,
+    limit: int = 20,
+    rss_feeds: Optional[List[str]] = None,
+    include_newsapi: bool = True,
+    on_new_articles: Optional[Callable[[List[Article]], Awaitable[None]]] = None,
+) -> IngestResult:
+    """
+    Fetch articles from all adapters and store the new ones through the staged ingest pipeline.
+    `rss_feeds` restricts the RSS fetch to the given feed URLs (all feeds when None);
+    per-feed outcomes are reported to the feed scheduler. `on_new_articles` is awaited
+    with each batch of newly stored articles as soon as it is committed, leaving out
+    near-duplicates of stories that were already announced.
+
+    Returns an IngestResult with only the articles that were actually inserted,
+    the number of skipped duplicates and per-adapter counters.
+    """
+    if not validator_store.loaded:
+        validator_store.load(db)
+    if include_newsapi and not newsapi_quota.loaded:
+        newsapi_quota.load(db)
+    if not known_urls.ready:
+        backfilled = crud.backfill_canonical_urls(db)
+        if backfilled:
+            logger.info(f"Backfilled canonical URLs for {backfilled} articles")
+        known_urls.warm(db)
+    if not story_index.ready:
+        story_index.warm(db)
 
-    # Sort by published_at descending
-    articles.sort(key=lambda x: x.get("published_at") or "", reverse=True)
+    pipeline = IngestPipeline(
+        db=db,
+        limit=limit,
+        rss_feeds=RSS_FEEDS if rss_feeds is None else rss_feeds,
+        include_newsapi=include_newsapi,
+        on_persisted=on_new_articles,
+    )
+    try:
+        result = await pipeline.run()
+    finally:
+        if include_newsapi:
+            # Count the cycle's NewsAPI requests even when storing its articles failed
+            try:
+                newsapi_quota.save(db)
+            except Exception as e:
+                logger.error(f"Error saving NewsAPI usage: {e}")
+                db.rollback()
 
-    # Check which articles already exist in the database
-    article_urls = [art["url"] for art in articles]
-    existing_urls = {
-        res[0] for res in db.query(Article.url).filter(Article.url.in_(article_urls))
-    }
+    # Persist feed cache validators only once the articles they cover are stored,
+    # so conditional GETs survive restarts without hiding unsaved entries; feeds
+    # whose articles failed to store are fetched and parsed again next cycle
+    validator_store.discard(result.failed_feeds)
+    try:
+        validator_store.save(db)
+    except Exception as e:
+        logger.error(f"Error saving feed validators: {e}")
+        db.rollback()
 
-    new_articles_to_add = []
-    
-    for article_data in articles:
-        if article_data["url"] not in existing_urls:
-            # Use NewsAPI's built-in category for NewsAPI articles, custom categorization for RSS
-            if article_data.get("source_type") == "newsapi" and article_data.get("category"):
-                # Use NewsAPI's built-in category
-                category = article_data["category"]
-            else:
-                # Apply custom categorization for RSS articles or articles without category
-                category = categorize_article(article_data["title"], article_data.get("summary", ""))
-            
-            # Handle None published_at values
-            published_at = None
-            if article_data.get("published_at"):
-                try:
-                    published_at = datetime.fromisoformat(article_data["published_at"].replace("Z", "+00:00"))
-                except (ValueError, AttributeError):
-                    published_at = None
-            
-            new_article = Article(
-                url=article_data["url"],
-                title=article_data["title"],
-                source=article_data["source"],
-                content=article_data.get("summary", ""),
-                published_at=published_at,
-                category=category, # Use the determined category
-                image_url=article_data.get("image_url"),  # Store the image URL
-            )
-            new_articles_to_add.append(new_article)
+    return result
 
-    if new_articles_to_add:
-        db.add_all(new_articles_to_add)
-        db.commit()
 
-    # After storing, fetch the latest to return them as ORM objects
-    return get_latest_articles(db, limit)
+def purge_expired_articles(db: Session, retention_days: int = ARTICLE_RETENTION_DAYS) -> int:
+    """
+    Apply the retention window; the search index sync drops the purged articles. Without
+    MeiliSearch nothing else reads the tombstones, so only this purge's are kept.
+    """
+    if retention_days <= 0:
+        return 0
+    started = datetime.utcnow()
+    purged = crud.purge_articles_published_before(db, started - timedelta(days=retention_days))
+    if purged:
+        local_search_index.remove(crud.get_deleted_article_urls(db, since=started))
+        logger.info(f"Purged {purged} articles older than {retention_days} days")
+    if search_service.SEARCH_BACKEND != "meili":
+        # The MeiliSearch sync prunes what it has applied; a local index snapshot older
+        # than the pruned tombstones no longer matches the article count and is rebuilt
+        crud.prune_deleted_articles(db, before=started)
+    return purged
 
 
 def get_all_articles(db: Session):
@@ -2,58 +2,251 @@ import asyncio
 import os
 import logging
 import hashlib
-from app.services.feed_service import get_all_articles
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud
 from app.database import SessionLocal
-import meilisearch
+from app.adapters.meili_client import MeiliError, meili_client as client
+from app.services.bulk_indexer import BulkIndexer, BulkIndexError
+from app.services.search_filters import SEARCH_FACETS, epoch_seconds
 
 logger = logging.getLogger(__name__)
-client = meilisearch.Client("http://search:7700", os.getenv("MEILI_MASTER_KEY", "a_master_key"))
+
+INDEX_NAME = "articles"
+# Generations built by a reindex, e.g. articles_20240501120000
+_GENERATION = re.compile(rf"^{INDEX_NAME}_\d{{14}}$")
+# Rows fetched per round trip while streaming articles out of the database
+SEARCH_SYNC_FETCH_SIZE = int(os.getenv("SEARCH_SYNC_FETCH_SIZE", "1000"))
+# Each sync re-reads this far behind its high-water mark, so rows committed by a transaction
+# that started before the last sync (and so carry an older updated_at) are not missed
+SEARCH_SYNC_OVERLAP_SECONDS = int(os.getenv("SEARCH_SYNC_OVERLAP_SECONDS", "300"))
+# A reindex catches up this many times on writes made meanwhile before a document count
+# that still differs from the database is taken as a broken build
+REINDEX_CATCH_UP_ROUNDS = 3
+
+# Settings the articles index must have. Checked before a process first syncs articles (only
+# what differs is updated) and given to every reindex generation; `published_ts` is
+# published_at in epoch seconds, for date filters and sorting
+SEARCH_INDEX_SETTINGS = {
+    "filterableAttributes": [*SEARCH_FACETS, "published_ts"],
+    "sortableAttributes": ["published_ts"],
+}
+# Whether this process has already brought the live index's settings in line
+_settings_checked = False
+
+# Incremental syncs and reindexes both move the high-water mark, so they never overlap
+_sync_lock = asyncio.Lock()
 
 def sanitize_id(url):
     """Convert URL to a valid MeiliSearch document ID by using a hash."""
     return hashlib.md5(url.encode()).hexdigest()
 
-async def populate_meilisearch_index():
-    logger.info("Starting MeiliSearch index population...")
-    db = SessionLocal()
+def article_document(article) -> dict:
+    return {
+        "id": sanitize_id(article.url),  # Use sanitized URL hash as ID
+        "url": article.url,              # Keep original URL as a field
+        "title": article.title,
+        "source": article.source,
+        "content": article.content,
+        "published_at": article.published_at.isoformat() if article.published_at else None,
+        "published_ts": epoch_seconds(article.published_at) if article.published_at else None,
+        "category": article.category,
+        "image_url": article.image_url,
+    }
+
+async def _wait(indexer: BulkIndexer, info: dict, action: str):
+    task = await indexer.wait_for_task(info["taskUid"])
+    if task["status"] != "succeeded":
+        raise BulkIndexError(f"{action} failed: {task.get('error')}")
+
+async def _apply_changes(indexer: BulkIndexer, db: Session, since: Optional[datetime]):
+    """Delete tombstoned articles from the indexer's index, then upsert articles changed since `since`."""
+    # Deletes first: an article purged and later re-ingested must end up indexed
+    deleted_urls = crud.get_deleted_article_urls(db, since)
+    if deleted_urls:
+        info = await client.delete_documents(indexer.index_name, [sanitize_id(url) for url in deleted_urls])
+        await _wait(indexer, info, "Deleting purged articles")
+    documents = (article_document(row) for row in crud.iter_articles_changed_since(db, since, SEARCH_SYNC_FETCH_SIZE))
+    result = await indexer.run(documents)
+    return result, len(deleted_urls)
+
+def _mark_synced(db: Session, started: datetime):
+    state = crud.get_search_sync_state(db, INDEX_NAME)
+    state.high_water = started
+    state.synced_at = datetime.utcnow()
+    db.commit()
+    crud.prune_deleted_articles(db, before=started - timedelta(seconds=2 * SEARCH_SYNC_OVERLAP_SECONDS))
+
+async def populate_meilisearch_index(full: bool = False, db: Optional[Session] = None) -> dict:
+    """
+    Bring the search index up to date with the database.
+
+    Only articles inserted or changed since the last successful sync are upserted, and
+    articles removed by retention are deleted, so a cycle costs O(changes) rather than
+    O(all articles). `full` re-sends every article, e.g. for a freshly created index.
+    The first sync with articles to send also applies SEARCH_INDEX_SETTINGS, and re-sends
+    everything when they changed, since older documents lack fields the settings use.
+    Articles are streamed from the database into NDJSON batches and the high-water mark
+    only moves once MeiliSearch has applied every batch. Returns the document counts
+    and throughput.
+    """
+    logger.info("Starting MeiliSearch index sync...")
+    own_session = db is None
+    db = db or SessionLocal()
     try:
-        # Fetch articles from the database
-        logger.info("Fetching articles from database...")
-        all_articles = get_all_articles(db)
-        logger.info(f"Found {len(all_articles)} articles in database")
-
-        # Convert ORM objects to dicts
-        articles_dict = [
-            {
-                "id": sanitize_id(article.url),  # Use sanitized URL hash as ID
-                "url": article.url,              # Keep original URL as a field
-                "title": article.title,
-                "source": article.source,
-                "content": article.content,
-                "published_at": article.published_at.isoformat() if article.published_at else None,
-                "category": article.category,
-            }
-            for article in all_articles
-        ]
-
-        logger.info(f"Converted {len(articles_dict)} articles to dict format")
-
-        if articles_dict:
-            logger.info("Adding documents to MeiliSearch index...")
-            try:
-                index = client.index("articles")
-                # Clear existing documents first
-                index.delete_all_documents()
-                # Add new documents
-                result = index.add_documents(articles_dict, primary_key="id")
-                logger.info(f"Successfully added documents to index. Result: {result}")
-            except Exception as e:
-                logger.error(f"Error adding documents to MeiliSearch: {e}")
-                raise
-        else:
-            logger.warning("No articles found to index")
+        async with _sync_lock:
+            global _settings_checked
+            if not _settings_checked and crud.count_articles(db):
+                full = await apply_index_settings() or full
+                _settings_checked = True
+            state = crud.get_search_sync_state(db, INDEX_NAME)
+            started = datetime.utcnow()
+            since = None
+            if not full and state.high_water is not None:
+                since = state.high_water - timedelta(seconds=SEARCH_SYNC_OVERLAP_SECONDS)
+            result, deleted = await _apply_changes(BulkIndexer(client, INDEX_NAME), db, since)
+            _mark_synced(db, started)
+        stats = result.as_dict()
+        stats.pop("documents")
+        logger.info(
+            f"MeiliSearch sync {'(full) ' if since is None else ''}upserted {result.documents} "
+            f"and deleted {deleted} documents in {result.batches} batches "
+            f"({stats['docs_per_second']:.0f} docs/s, {result.retries} retries, peak RSS {stats['peak_rss_mb']} MiB)"
+        )
+        return {"upserted": result.documents, "deleted": deleted, **stats}
     except Exception as e:
         logger.error(f"Error in populate_meilisearch_index: {e}")
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+async def _live_settings() -> Optional[dict]:
+    """Settings of the live index, or None when it does not exist yet."""
+    try:
+        return await client.get_settings(INDEX_NAME)
+    except MeiliError as e:
+        if e.code == "index_not_found":
+            return None
         raise
+
+def _settings_drift(live: dict) -> dict:
+    """The declared settings `live` does not already have; attribute lists compare as sets."""
+    drift = {}
+    for name, wanted in SEARCH_INDEX_SETTINGS.items():
+        current = live.get(name)
+        if isinstance(wanted, list) and isinstance(current, list):
+            if set(wanted) != set(current):
+                drift[name] = wanted
+        elif current != wanted:
+            drift[name] = wanted
+    return drift
+
+async def apply_index_settings() -> bool:
+    """
+    Bring the live index in line with SEARCH_INDEX_SETTINGS, creating it if needed. Returns
+    True when anything changed; the documents may then lack fields the new settings use,
+    so the caller should re-send every article.
+    """
+    indexer = BulkIndexer(client, INDEX_NAME)
+    live = await _live_settings()
+    if live is None:
+        await _wait(indexer, await client.create_index(INDEX_NAME), f"Creating {INDEX_NAME}")
+        live = {}
+    drift = _settings_drift(live)
+    if not drift:
+        return False
+    logger.info(f"Updating {INDEX_NAME} index settings: {', '.join(drift)}")
+    await _wait(indexer, await client.update_settings(INDEX_NAME, drift), f"Updating {INDEX_NAME} settings")
+    return True
+
+async def reindex_meilisearch_index(db: Optional[Session] = None) -> dict:
+    """
+    Rebuild the search index from scratch without serving a partial index.
+
+    Every article is loaded into a new generation (`articles_<timestamp>`) created with
+    the live index's settings plus SEARCH_INDEX_SETTINGS. Writes committed meanwhile are
+    applied to it as well, and its document count must then match the database within
+    REINDEX_CATCH_UP_ROUNDS catch-ups. Only after that is it swapped in under the live
+    name, in one atomic MeiliSearch task. Searches hit the old index until that moment. The previous generation and any left by failed runs are deleted.
+    """
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        async with _sync_lock:
+            global _settings_checked
+            shadow = f"{INDEX_NAME}_{datetime.utcnow():%Y%m%d%H%M%S}"
+            result, caught_up, documents = await _build_and_swap(db, shadow)
+            # The swapped-in index was created with the declared settings
+            _settings_checked = True
+            dropped = await _drop_old_generations()
     finally:
-        db.close()
+        if own_session:
+            db.close()
+    stats = result.as_dict()
+    logger.info(
+        f"Swapped in a rebuilt {INDEX_NAME} index with {documents} documents "
+        f"({stats['docs_per_second']:.0f} docs/s, {caught_up} caught up, {dropped} old generations dropped)"
+    )
+    stats.pop("documents")
+    return {"documents": documents, "caught_up": caught_up, "dropped_generations": dropped, **stats}
+
+async def _build_and_swap(db: Session, shadow: str):
+    indexer = BulkIndexer(client, shadow)
+    try:
+        logger.info(f"Rebuilding MeiliSearch index into {shadow}...")
+        settings = await _live_settings()
+        await _wait(indexer, await client.create_index(shadow), f"Creating {shadow}")
+        await _wait(indexer, await client.update_settings(shadow, {**(settings or {}), **SEARCH_INDEX_SETTINGS}),
+                    f"Copying settings to {shadow}")
+
+        started = datetime.utcnow()
+        documents = (article_document(row) for row in crud.iter_articles_changed_since(db, None, SEARCH_SYNC_FETCH_SIZE))
+        result = await indexer.run(documents)
+        # Catch up on articles written or purged while the copy was built; ingest may keep
+        # writing during a catch-up, so a count that differs gets another round first
+        caught_up = 0
+        since = started
+        for _ in range(REINDEX_CATCH_UP_ROUNDS):
+            round_started = datetime.utcnow()
+            changes, _ = await _apply_changes(indexer, db, since - timedelta(seconds=SEARCH_SYNC_OVERLAP_SECONDS))
+            caught_up += changes.documents
+            expected = crud.count_articles(db)
+            indexed = (await client.get_stats(shadow))["numberOfDocuments"]
+            if indexed == expected:
+                break
+            since = round_started
+        else:
+            raise BulkIndexError(f"{shadow} holds {indexed} documents but the database has {expected} articles")
+
+        if settings is None:
+            # Swapping needs both indexes to exist
+            await _wait(indexer, await client.create_index(INDEX_NAME), f"Creating {INDEX_NAME}")
+        await _wait(indexer, await client.swap_indexes([[INDEX_NAME, shadow]]), f"Swapping in {shadow}")
+        _mark_synced(db, started)
+        return result, caught_up, expected
+    except Exception as e:
+        logger.error(f"Reindex into {shadow} failed, {INDEX_NAME} left untouched: {e}")
+        db.rollback()
+        try:
+            await client.delete_index(shadow)
+        except Exception:
+            pass
+        raise
+
+async def _drop_old_generations() -> int:
+    """Delete every reindex generation; after a swap the shadow name holds the previous one."""
+    dropped = 0
+    try:
+        for entry in await client.list_indexes():
+            if _GENERATION.match(entry["uid"]):
+                await client.delete_index(entry["uid"])
+                dropped += 1
+    except Exception as e:
+        logger.warning(f"Could not drop old {INDEX_NAME} generations: {e}")
+    return dropped
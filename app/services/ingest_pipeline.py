@@ -0,0 +1,374 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.adapters.feed_parser import FEED_PARSER_WORKERS, parse_feed_async
+from app.adapters.newsapi_adapter import fetch_newsapi_articles
+from app.adapters.rss_adapter import fetch_rss_feed_text
+from app.adapters.url_canonical import canonicalize_url
+from app import crud
+from app.database import Article
+from app.schemas import AdapterStats, IngestResult
+from app.schemas import Article as ArticleSchema
+from app.services.categorization import score_article
+from app.services.feed_scheduler import feed_scheduler, NEWSAPI_FEED_KEY
+from app.services.local_search import LocalSearchIndex, local_search_index
+from app.services.near_duplicates import NearDuplicateIndex, minhash_signature, story_index
+from app.services.url_filter import KnownURLFilter, known_urls
+
+logger = logging.getLogger(__name__)
+
+# Per-stage worker counts
+INGEST_FETCH_CONCURRENCY = int(os.getenv("INGEST_FETCH_CONCURRENCY", "8"))
+INGEST_PARSE_CONCURRENCY = int(os.getenv("INGEST_PARSE_CONCURRENCY", str(FEED_PARSER_WORKERS)))
+INGEST_NORMALIZE_CONCURRENCY = int(os.getenv("INGEST_NORMALIZE_CONCURRENCY", "1"))
+INGEST_CATEGORIZE_CONCURRENCY = int(os.getenv("INGEST_CATEGORIZE_CONCURRENCY", "2"))
+INGEST_PUBLISH_CONCURRENCY = int(os.getenv("INGEST_PUBLISH_CONCURRENCY", "1"))
+# Capacity of each queue between stages; a full queue blocks the stage feeding it
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "200"))
+# The persist stage writes a batch when it is full or has waited this long
+INGEST_PERSIST_BATCH_SIZE = int(os.getenv("INGEST_PERSIST_BATCH_SIZE", "50"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "0.5"))
+# Canonical URLs per existence check for articles the URL filter could not rule out
+INGEST_DEDUP_BATCH_SIZE = int(os.getenv("INGEST_DEDUP_BATCH_SIZE", "200"))
+# Rows per INSERT ... ON CONFLICT statement
+INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "500"))
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+
+def parse_published_at(value) -> Optional[datetime]:
+    """Handle None and malformed published_at values from the adapters."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+
+
+class IngestPipeline:
+    """
+    Streams one ingest cycle through bounded queues:
+
+        fetch -> parse -> normalize -> dedup -> cluster -> categorize -> persist -> publish
+
+    Each stage runs its own workers, so articles from fast feeds are stored and
+    handed to `on_persisted` (notifications, indexing) while slow feeds are
+    still downloading, and memory is bounded by the queue sizes rather than
+    the size of the whole cycle. Articles the cluster stage links to an
+    existing story are stored but not handed to `on_persisted`.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        limit: int = 20,
+        rss_feeds: Optional[List[str]] = None,
+        include_newsapi: bool = True,
+        on_persisted: Optional[Callable[[List[Article]], Awaitable[None]]] = None,
+        on_feed_result: Optional[Callable[[str, dict], None]] = feed_scheduler.record_result,
+        url_filter: KnownURLFilter = known_urls,
+        story_index: NearDuplicateIndex = story_index,
+        search_index: LocalSearchIndex = local_search_index,
+    ):
+        self.db = db
+        self.limit = limit
+        self.jobs = list(rss_feeds or [])
+        if include_newsapi:
+            self.jobs.append(NEWSAPI_FEED_KEY)
+        self.on_persisted = on_persisted
+        self.on_feed_result = on_feed_result
+        self.url_filter = url_filter
+        self.story_index = story_index
+        self.search_index = search_index
+        self._seen_keys = set()
+        # Stories clustered this cycle but not stored yet, so copies in the same cycle find
+        # each other while `story_index` only ever holds stored stories
+        self._pending_stories = NearDuplicateIndex(threshold=story_index.threshold)
+        # Pending story ID -> the copy that leads it instead, for stories whose first article failed to store
+        self._lost_stories: Dict[str, Optional[str]] = {}
+        self.inserted: List[Article] = []
+        self.errors = 0
+        # Feeds with articles that failed a stage before they were stored
+        self.failed_feeds = set()
+        self.adapters: Dict[str, AdapterStats] = {}
+        for job in self.jobs:
+            self._stats(self._adapter(job)).feeds += 1
+
+    @staticmethod
+    def _adapter(feed: str) -> str:
+        return "newsapi" if feed == NEWSAPI_FEED_KEY else "rss"
+
+    def _stats(self, adapter: str) -> AdapterStats:
+        return self.adapters.setdefault(adapter, AdapterStats())
+
+    def _report(self, feed: str, result: dict):
+        stats = self._stats(self._adapter(feed))
+        if result["status"] == "error":
+            stats.errors += 1
+        elif result["status"] == "unchanged":
+            stats.unchanged += 1
+        if self.on_feed_result:
+            self.on_feed_result(feed, result)
+
+    # Stage handlers: each takes one item and returns the items for the next stage
+
+    async def _fetch(self, feed: str) -> list:
+        if feed == NEWSAPI_FEED_KEY:
+            try:
+                articles = await fetch_newsapi_articles(limit=self.limit)
+            except Exception:
+                self._report(feed, {"status": "error"})
+                raise
+            self._report(feed, {"status": "ok"})
+            self._stats("newsapi").fetched += 1
+            return [{"feed": feed, "articles": articles}]
+
+        try:
+            text = await fetch_rss_feed_text(feed)
+        except Exception as e:
+            self._report(feed, {"status": "error", "error": e})
+            raise
+        if text is None:
+            self._report(feed, {"status": "unchanged"})
+            return []
+        self._stats("rss").fetched += 1
+        return [{"feed": feed, "text": text}]
+
+    async def _parse(self, item: dict) -> list:
+        if "articles" in item:
+            for article_data in item["articles"]:
+                article_data.setdefault("source_type", "newsapi")
+                article_data["feed"] = item["feed"]
+            return item["articles"]
+        try:
+            parsed = await parse_feed_async(item["text"], self.limit)
+        except Exception as e:
+            self._report(item["feed"], {"status": "error", "error": e})
+            raise
+        articles = parsed.pop("articles")
+        self._report(item["feed"], {"status": "ok", **parsed})
+        for article_data in articles:
+            article_data["feed"] = item["feed"]
+        return articles
+
+    async def _normalize(self, article_data: dict) -> list:
+        stats = self._stats(article_data.get("source_type", "rss"))
+        stats.articles += 1
+        # Deduplicate across feeds within the cycle, based on canonical URL
+        key = article_data.get("canonical_url") or canonicalize_url(article_data["url"])
+        if key in self._seen_keys:
+            stats.duplicates += 1
+            return []
+        self._seen_keys.add(key)
+        article_data["canonical_url"] = key
+        article_data["published_at"] = parse_published_at(article_data.get("published_at"))
+        article_data["summary"] = article_data.get("summary") or ""
+        return [article_data]
+
+    async def _dedup(self, batch: List[dict]) -> list:
+        # Only keys the filter cannot rule out need an existence check in the database
+        maybe_stored = [a["canonical_url"] for a in batch if self.url_filter.might_contain(a["canonical_url"])]
+        stored = set()
+        if maybe_stored:
+            stored = {
+                res[0] for res in self.db.query(Article.canonical_url).filter(Article.canonical_url.in_(maybe_stored))
+            }
+        new = []
+        for article_data in batch:
+            if article_data["canonical_url"] in stored:
+                self._stats(article_data.get("source_type", "rss")).duplicates += 1
+            else:
+                new.append(article_data)
+        return new
+
+    async def _cluster(self, article_data: dict) -> list:
+        # Link wire copy carried by several outlets to the story it repeats
+        key = article_data["canonical_url"]
+        signature = minhash_signature(article_data["title"], article_data["summary"])
+        story_id = key
+        if signature is not None:
+            story_id = self.story_index.find(signature) or self._pending_stories.find(signature) or key
+            self._pending_stories.add(key, signature, story_id)
+        article_data["minhash"] = signature
+        article_data["story_id"] = story_id
+        return [article_data]
+
+    async def _categorize(self, article_data: dict) -> list:
+        category, article_data["category_scores"] = score_article(article_data["title"], article_data["summary"])
+        # Use NewsAPI's built-in category for NewsAPI articles, custom categorization for RSS
+        if not (article_data.get("source_type") == "newsapi" and article_data.get("category")):
+            article_data["category"] = category
+        return [article_data]
+
+    async def _persist(self, batch: List[dict]) -> list:
+        for article_data in batch:
+            story_id = article_data.get("story_id")
+            if story_id in self._lost_stories:
+                # The story's first article was not stored, so the first copy that is leads it
+                leader = self._lost_stories[story_id] or article_data["canonical_url"]
+                self._lost_stories[story_id] = article_data["story_id"] = leader
+        rows = [
+            {
+                "url": article_data["url"],
+                "canonical_url": article_data["canonical_url"],
+                "title": article_data["title"],
+                "source": article_data["source"],
+                "content": article_data["summary"],
+                "published_at": article_data["published_at"],
+                "category": article_data["category"],
+                "native_category": article_data.get("native_category"),
+                "image_url": article_data.get("image_url"),
+                "minhash": article_data.get("minhash"),
+                "story_id": article_data.get("story_id"),
+            }
+            for article_data in batch
+        ]
+        try:
+            new_articles = crud.insert_new_articles(
+                self.db, rows, batch_size=INGEST_UPSERT_BATCH_SIZE,
+                category_scores={a["url"]: a["category_scores"] for a in batch if "category_scores" in a},
+            )
+        except Exception:
+            self.db.rollback()
+            failed = {article_data["canonical_url"] for article_data in batch}
+            for story_id, leader in self._lost_stories.items():
+                if leader in failed:
+                    self._lost_stories[story_id] = None
+            for article_data in batch:
+                if article_data.get("story_id") == article_data["canonical_url"]:
+                    self._lost_stories[article_data["canonical_url"]] = None
+            raise
+        inserted_keys = {article.canonical_url for article in new_articles}
+        self.url_filter.add(inserted_keys)
+        for article in new_articles:
+            if article.minhash is not None:
+                self.story_index.add(article.canonical_url, bytes(article.minhash), article.story_id)
+        self.search_index.add_articles(new_articles)
+        for article_data in batch:
+            stats = self._stats(article_data.get("source_type", "rss"))
+            if article_data["canonical_url"] in inserted_keys:
+                stats.inserted += 1
+                if article_data.get("story_id") not in (None, article_data["canonical_url"]):
+                    stats.near_duplicates += 1
+            else:
+                stats.duplicates += 1
+        if not new_articles:
+            return []
+        self.inserted.extend(new_articles)
+        return [new_articles]
+
+    async def _publish(self, articles: List[Article]) -> list:
+        # Only the first article of each story is announced
+        leaders = [a for a in articles if a.story_id in (None, a.canonical_url)]
+        if self.on_persisted and leaders:
+            await self.on_persisted(leaders)
+        return []
+
+    # Stage runners
+
+    def _record_failure(self, name: str, item, error: Exception):
+        self.errors += 1
+        logger.error(f"Ingest {name} stage failed: {error}")
+        items = item if isinstance(item, list) else [item]
+        self.failed_feeds.update(i["feed"] for i in items if isinstance(i, dict) and "feed" in i)
+
+    async def _run_stage(self, name: str, handler, concurrency: int, inbox: asyncio.Queue,
+                         outbox: Optional[asyncio.Queue]):
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    # Hand the marker on to the next worker of this stage
+                    await inbox.put(_DONE)
+                    return
+                try:
+                    for out in await handler(item):
+                        if outbox is not None:
+                            await outbox.put(out)
+                except Exception as e:
+                    self._record_failure(name, item, e)
+
+        await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+        if outbox is not None:
+            await outbox.put(_DONE)
+
+    async def _run_batch_stage(self, name: str, handler, batch_size: int, inbox: asyncio.Queue,
+                               outbox: asyncio.Queue):
+        """Single worker that groups items into batches by size or flush interval."""
+        batch = []
+        deadline = None
+        done = False
+        while not done:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = await asyncio.wait_for(inbox.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+            if item is _DONE:
+                done = True
+            elif item is not None:
+                batch.append(item)
+                deadline = deadline or time.monotonic() + INGEST_FLUSH_INTERVAL
+
+            if batch and (done or item is None or len(batch) >= batch_size):
+                try:
+                    for out in await handler(batch):
+                        await outbox.put(out)
+                except Exception as e:
+                    self._record_failure(name, batch, e)
+                batch = []
+                deadline = None
+        await outbox.put(_DONE)
+
+    async def run(self) -> IngestResult:
+        """
+        Run the cycle to completion and return what it inserted, skipped and fetched.
+        Feeds whose articles did not all make it through persist are listed in
+        `failed_feeds`, so the caller can fetch them again instead of caching them.
+        """
+        start = time.perf_counter()
+        queues = [asyncio.Queue(maxsize=INGEST_QUEUE_SIZE) for _ in range(8)]
+        feeds, texts, raw, normalized, unseen, clustered, categorized, persisted = queues
+
+        async def feed_jobs():
+            for job in self.jobs:
+                await feeds.put(job)
+            await feeds.put(_DONE)
+
+        await asyncio.gather(
+            feed_jobs(),
+            self._run_stage("fetch", self._fetch, INGEST_FETCH_CONCURRENCY, feeds, texts),
+            self._run_stage("parse", self._parse, INGEST_PARSE_CONCURRENCY, texts, raw),
+            self._run_stage("normalize", self._normalize, INGEST_NORMALIZE_CONCURRENCY, raw, normalized),
+            self._run_batch_stage("dedup", self._dedup, INGEST_DEDUP_BATCH_SIZE, normalized, unseen),
+            # One worker, so copies of a story arriving in the same cycle see each other
+            self._run_stage("cluster", self._cluster, 1, unseen, clustered),
+            self._run_stage("categorize", self._categorize, INGEST_CATEGORIZE_CONCURRENCY, clustered, categorized),
+            self._run_batch_stage("persist", self._persist, INGEST_PERSIST_BATCH_SIZE, categorized, persisted),
+            self._run_stage("publish", self._publish, INGEST_PUBLISH_CONCURRENCY, persisted, None),
+        )
+        result = IngestResult(
+            inserted=[ArticleSchema.model_validate(article) for article in self.inserted],
+            duplicates=sum(stats.duplicates for stats in self.adapters.values()),
+            near_duplicates=sum(stats.near_duplicates for stats in self.adapters.values()),
+            errors=self.errors,
+            failed_feeds=sorted(self.failed_feeds),
+            adapters=self.adapters,
+            duration_seconds=round(time.perf_counter() - start, 3),
+        )
+        logger.info(
+            f"Ingest cycle finished in {result.duration_seconds:.2f}s: "
+            f"{len(result.inserted)} inserted ({result.near_duplicates} repeating known stories), "
+            f"{result.duplicates} duplicates, {result.errors} errors"
+        )
+        if result.failed_feeds:
+            logger.warning(f"Articles from {len(result.failed_feeds)} feeds were not stored: {result.failed_feeds}")
+        return result
@@ -0,0 +1,479 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import shutil
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.database import Article, SessionLocal
+from app.services.index_populator import SEARCH_SYNC_OVERLAP_SECONDS
+from app.services.search_filters import SEARCH_FACETS, SearchFilters, epoch_seconds
+
+logger = logging.getLogger(__name__)
+
+# Directory the index is snapshotted to and memory-mapped from at startup; empty disables snapshots
+SEARCH_LOCAL_INDEX_PATH = os.getenv("SEARCH_LOCAL_INDEX_PATH", "")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SNAPSHOT_VERSION = 2
+# Publish time of undated documents; sorts after every real date
+_NO_DATE = -2 ** 62
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def article_text(title: Optional[str], content: Optional[str]) -> str:
+    # The title is indexed twice, which weighs title matches above body matches
+    return f"{title or ''} {title or ''} {content or ''}"
+
+
+def index_article(index: "BM25Index", article):
+    """Add an article (or a row with the same columns) to `index`."""
+    index.add(article.url, article_text(article.title, article.content), article.published_at,
+              {"category": article.category, "source": article.source})
+
+
+class BM25Index:
+    """
+    Inverted index over URL-keyed documents, ranked with Okapi BM25.
+
+    Postings are flat arrays: a compacted base segment (int32 doc ids and uint16 term
+    frequencies, one contiguous run per term, memory-mappable from a snapshot) plus an
+    append-only delta of `array.array` runs for documents added since. Removing a
+    document only flags its id; `compact` folds the delta into the base and drops
+    the removed documents' postings. Doc ids are never reused, so they stay aligned
+    with `urls` across compactions and snapshots.
+
+    Each document also keeps a code per facet (SEARCH_FACETS; code 0 means no value)
+    and its publish time, so filters, facet counts and recency sorting run on arrays.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.urls: List[str] = []
+        self.doc_ids: Dict[str, int] = {}
+        self.total_length = 0
+        self._terms: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._tfs = np.zeros(0, dtype=np.uint16)
+        self._delta: Dict[str, Tuple[array, array]] = {}
+        self._delta_postings = 0
+        # Documents removed since the last compaction, whose postings are still in place
+        self._stale = 0
+        # Per-document arrays with spare capacity, grown by doubling
+        self._lengths = np.zeros(1024, dtype=np.uint32)
+        self._deleted = np.zeros(1024, dtype=np.uint8)
+        self._published = np.full(1024, _NO_DATE, dtype=np.int64)
+        self._facets = {name: np.zeros(1024, dtype=np.int32) for name in SEARCH_FACETS}
+        self._facet_values: Dict[str, List[str]] = {name: [""] for name in SEARCH_FACETS}
+        self._facet_codes: Dict[str, Dict[str, int]] = {name: {"": 0} for name in SEARCH_FACETS}
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def postings(self) -> int:
+        return len(self._docs) + self._delta_postings
+
+    def _grow(self, size: int):
+        if size > len(self._lengths):
+            capacity = max(size, 2 * len(self._lengths))
+
+            def extend(values, fill=0):
+                return np.concatenate([values, np.full(capacity - len(values), fill, dtype=values.dtype)])
+
+            self._lengths = extend(self._lengths)
+            self._deleted = extend(self._deleted)
+            self._published = extend(self._published, _NO_DATE)
+            self._facets = {name: extend(codes) for name, codes in self._facets.items()}
+
+    def _facet_code(self, name: str, value: Optional[str]) -> int:
+        codes = self._facet_codes[name]
+        code = codes.get(value or "")
+        if code is None:
+            code = codes[value] = len(self._facet_values[name])
+            self._facet_values[name].append(value)
+        return code
+
+    def add(self, url: str, text: str, published_at: Optional[datetime] = None,
+            facets: Optional[Dict[str, Optional[str]]] = None):
+        """Index (or re-index) the document at `url`, with its publish time and facet values."""
+        self.remove(url)
+        tokens = tokenize(text)
+        doc_id = len(self.urls)
+        self.urls.append(url)
+        self.doc_ids[url] = doc_id
+        self._grow(doc_id + 1)
+        self._lengths[doc_id] = len(tokens)
+        if published_at is not None:
+            self._published[doc_id] = epoch_seconds(published_at)
+        for name, value in (facets or {}).items():
+            self._facets[name][doc_id] = self._facet_code(name, value)
+        self.total_length += len(tokens)
+        counts = Counter(tokens)
+        for term, tf in counts.items():
+            run = self._delta.get(term)
+            if run is None:
+                run = self._delta[term] = (array("i"), array("H"))
+            run[0].append(doc_id)
+            run[1].append(min(tf, 65535))
+        self._delta_postings += len(counts)
+
+    def set_facet(self, url: str, name: str, value: Optional[str]) -> bool:
+        """Change one facet value of an indexed document without re-indexing its text."""
+        doc_id = self.doc_ids.get(url)
+        if doc_id is None:
+            return False
+        self._facets[name][doc_id] = self._facet_code(name, value)
+        return True
+
+    def remove(self, url: str) -> bool:
+        doc_id = self.doc_ids.pop(url, None)
+        if doc_id is None:
+            return False
+        self._deleted[doc_id] = 1
+        self._stale += 1
+        self.total_length -= int(self._lengths[doc_id])
+        return True
+
+    def _runs(self, term: str):
+        index = self._terms.get(term)
+        if index is not None:
+            start, end = self._offsets[index], self._offsets[index + 1]
+            yield self._docs[start:end], self._tfs[start:end]
+        run = self._delta.get(term)
+        if run is not None:
+            yield np.frombuffer(run[0], dtype=np.int32), np.frombuffer(run[1], dtype=np.uint16)
+
+    def _live_runs(self, term: str):
+        # Postings of removed documents are skipped so scores don't depend on when compaction ran
+        for docs, tfs in self._runs(term):
+            if self._stale:
+                keep = self._deleted[docs] == 0
+                docs, tfs = docs[keep], tfs[keep]
+            if len(docs):
+                yield docs, tfs
+
+    def _filter(self, docs: np.ndarray, filters: SearchFilters) -> np.ndarray:
+        keep = np.ones(len(docs), dtype=bool)
+        for name, values in (("category", filters.categories), ("source", filters.sources)):
+            if values:
+                codes = [self._facet_codes[name][value] for value in values if value in self._facet_codes[name]]
+                keep &= np.isin(self._facets[name][docs], codes)
+        if filters.published_from or filters.published_to:
+            published = self._published[docs]
+            keep &= published != _NO_DATE
+            if filters.published_from:
+                keep &= published >= epoch_seconds(filters.published_from)
+            if filters.published_to:
+                keep &= published <= epoch_seconds(filters.published_to)
+        return keep
+
+    def _distribution(self, docs: np.ndarray, facets: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        distribution = {}
+        for name in facets:
+            counts = np.bincount(self._facets[name][docs], minlength=len(self._facet_values[name]))
+            values = self._facet_values[name]
+            distribution[name] = dict(sorted((values[code], int(counts[code])) for code in np.flatnonzero(counts) if code))
+        return distribution
+
+    def search(self, query: str, offset: int = 0, limit: int = 20, filters: Optional[SearchFilters] = None,
+               sort: str = "relevance", facets: Iterable[str] = ()
+               ) -> Tuple[List[Tuple[str, float]], int, Dict[str, Dict[str, int]]]:
+        """
+        (url, score) pairs of one page of the best (or with sort="recent", newest) matches,
+        the number of matching documents, and their value counts for each of `facets`.
+        """
+        live = len(self.doc_ids)
+        terms = set(tokenize(query))
+        if not terms or not live:
+            return [], 0, {name: {} for name in facets}
+        average_length = max(self.total_length / live, 1.0)
+        doc_parts, score_parts = [], []
+        for term in terms:
+            runs = list(self._live_runs(term))
+            if not runs:
+                continue
+            frequency = sum(len(docs) for docs, _ in runs)
+            idf = math.log(1 + (live - frequency + 0.5) / (frequency + 0.5))
+            for docs, tfs in runs:
+                tf = tfs.astype(np.float32)
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[docs] / average_length)
+                doc_parts.append(docs)
+                score_parts.append(idf * tf * (self.k1 + 1) / (tf + norm))
+        if not doc_parts:
+            return [], 0, {name: {} for name in facets}
+        docs = np.concatenate(doc_parts)
+        scores = np.concatenate(score_parts)
+        if len(doc_parts) > 1:
+            if len(docs) * 16 > len(self.urls):
+                # Many candidates: summing into a dense per-document array beats sorting them
+                scores = np.bincount(docs, weights=scores, minlength=len(self.urls))
+                docs = np.flatnonzero(scores)
+                scores = scores[docs]
+            else:
+                docs, inverse = np.unique(docs, return_inverse=True)
+                scores = np.bincount(inverse, weights=scores)
+        if filters:
+            keep = self._filter(docs, filters)
+            docs, scores = docs[keep], scores[keep]
+        distribution = self._distribution(docs, facets)
+        total = len(docs)
+        wanted = min(offset + limit, total)
+        if offset >= total:
+            return [], total, distribution
+        keys = self._published[docs] if sort == "recent" else scores
+        if wanted < total:
+            top = np.argpartition(-keys, wanted - 1)[:wanted]
+            docs, scores, keys = docs[top], scores[top], keys[top]
+        # Best key first; among equal keys the most recently added document wins
+        order = np.lexsort((-docs, -keys))[offset:wanted]
+        return [(self.urls[doc], float(scores[i])) for i, doc in zip(order, docs[order])], total, distribution
+
+    def compact(self):
+        """Fold the delta into the base segment, dropping postings of removed documents."""
+        terms, offsets, doc_parts, tf_parts = {}, [0], [], []
+        for term in self._terms.keys() | self._delta.keys():
+            runs = list(self._live_runs(term))
+            if not runs:
+                continue
+            docs = np.concatenate([docs for docs, _ in runs]) if len(runs) > 1 else runs[0][0]
+            tfs = np.concatenate([tfs for _, tfs in runs]) if len(runs) > 1 else runs[0][1]
+            terms[term] = len(terms)
+            doc_parts.append(docs)
+            tf_parts.append(tfs)
+            offsets.append(offsets[-1] + len(docs))
+        self._terms = terms
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._docs = np.concatenate(doc_parts).astype(np.int32, copy=False) if doc_parts else np.zeros(0, np.int32)
+        self._tfs = np.concatenate(tf_parts).astype(np.uint16, copy=False) if tf_parts else np.zeros(0, np.uint16)
+        self._delta = {}
+        self._delta_postings = 0
+        self._stale = 0
+
+    def save(self, path: str, **meta):
+        """Compact and write a snapshot directory, replacing any previous one in one rename."""
+        self.compact()
+        staging = f"{path}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        size = len(self.urls)
+        np.save(os.path.join(staging, "offsets.npy"), self._offsets)
+        np.save(os.path.join(staging, "docs.npy"), self._docs)
+        np.save(os.path.join(staging, "tfs.npy"), self._tfs)
+        np.save(os.path.join(staging, "lengths.npy"), self._lengths[:size])
+        np.save(os.path.join(staging, "deleted.npy"), self._deleted[:size])
+        np.save(os.path.join(staging, "published.npy"), self._published[:size])
+        for name, codes in self._facets.items():
+            np.save(os.path.join(staging, f"facet_{name}.npy"), codes[:size])
+        with open(os.path.join(staging, "terms.txt"), "w") as f:
+            f.write("\n".join(self._terms))
+        with open(os.path.join(staging, "urls.txt"), "w") as f:
+            f.write("\n".join(self.urls))
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({"version": _SNAPSHOT_VERSION, "k1": self.k1, "b": self.b,
+                       "facet_values": self._facet_values, **meta}, f)
+        previous = f"{path}.old"
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, previous)
+        os.rename(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["BM25Index", dict]:
+        """Load a snapshot; postings stay memory-mapped until the next compaction."""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != _SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported search index snapshot version {meta.get('version')}")
+        index = cls(meta["k1"], meta["b"])
+        # Plain ndarray views of the mapping index faster than np.memmap objects
+        index._offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r").view(np.ndarray)
+        index._docs = np.load(os.path.join(path, "docs.npy"), mmap_mode="r").view(np.ndarray)
+        index._tfs = np.load(os.path.join(path, "tfs.npy"), mmap_mode="r").view(np.ndarray)
+        with open(os.path.join(path, "terms.txt")) as f:
+            index._terms = {term: i for i, term in enumerate(f.read().split("\n")) if term}
+        with open(os.path.join(path, "urls.txt")) as f:
+            index.urls = f.read().split("\n") if os.path.getsize(os.path.join(path, "urls.txt")) else []
+        lengths = np.load(os.path.join(path, "lengths.npy"))
+        deleted = np.load(os.path.join(path, "deleted.npy"))
+        index._grow(len(index.urls) + 1)
+        index._lengths[:len(lengths)] = lengths
+        index._deleted[:len(deleted)] = deleted
+        index._published[:len(lengths)] = np.load(os.path.join(path, "published.npy"))
+        for name in SEARCH_FACETS:
+            index._facets[name][:len(lengths)] = np.load(os.path.join(path, f"facet_{name}.npy"))
+            index._facet_values[name] = meta["facet_values"][name]
+            index._facet_codes[name] = {value: code for code, value in enumerate(index._facet_values[name])}
+        index.doc_ids = {url: i for i, url in enumerate(index.urls) if not deleted[i]}
+        index.total_length = int(lengths[deleted == 0].sum())
+        return index, meta
+
+
+def snippet(text: Optional[str], query: str, words: int) -> Optional[str]:
+    """About `words` words of `text` around the first query term, with … where it was cut."""
+    if not text:
+        return text
+    terms = set(tokenize(query))
+    tokens = text.split()
+    first = next((i for i, token in enumerate(tokens) if terms.intersection(tokenize(token))), 0)
+    start = max(0, min(first - words // 2, len(tokens) - words))
+    end = start + words
+    return ("…" if start > 0 else "") + " ".join(tokens[start:end]) + ("…" if end < len(tokens) else "")
+
+
+class LocalSearchIndex:
+    """
+    The application's BM25 index of stored articles.
+
+    Warmed from a snapshot plus the articles changed since it was written (or
+    built from the database), then kept current by the ingest pipeline, the
+    retention purge and recategorization. Results are hydrated from the database.
+    Until it is warmed, updates are ignored and `ready` is False.
+    """
+
+    def __init__(self, snapshot_path: str = SEARCH_LOCAL_INDEX_PATH, session_factory=SessionLocal):
+        self.snapshot_path = snapshot_path
+        self.session_factory = session_factory
+        self.index = BM25Index()
+        self.ready = False
+
+    def _load_snapshot(self, db: Session) -> Optional[BM25Index]:
+        if not (self.snapshot_path and os.path.exists(os.path.join(self.snapshot_path, "meta.json"))):
+            return None
+        try:
+            index, meta = BM25Index.load(self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable search index snapshot at {self.snapshot_path}: {e}")
+            return None
+        self._catch_up(db, index, datetime.fromisoformat(meta["saved_at"]))
+        if len(index) != crud.count_articles(db):
+            # Deletions older than the kept tombstones were missed; start over
+            logger.info("Search index snapshot is out of date; rebuilding it")
+            return None
+        return index
+
+    @staticmethod
+    def _catch_up(db: Session, index: BM25Index, since: datetime):
+        # Same overlap as the MeiliSearch sync, for commits that land out of timestamp order
+        since -= timedelta(seconds=SEARCH_SYNC_OVERLAP_SECONDS)
+        for row in crud.iter_articles_changed_since(db, since):
+            index_article(index, row)
+        for url in crud.get_deleted_article_urls(db, since):
+            index.remove(url)
+
+    def _build(self, db: Session, started: datetime) -> BM25Index:
+        """The snapshot if it is usable, otherwise every stored article, snapshotted as of `started`."""
+        index = self._load_snapshot(db)
+        if index is None:
+            index = BM25Index()
+            for row in crud.iter_articles_changed_since(db, None):
+                index_article(index, row)
+            index.compact()
+            if self.snapshot_path:
+                index.save(self.snapshot_path, saved_at=started.isoformat(), documents=len(index))
+        return index
+
+    def _install(self, db: Session, index: BM25Index, started: datetime):
+        # Articles stored or purged while the index was being built
+        self._catch_up(db, index, started)
+        self.index = index
+        self.ready = True
+        logger.info(f"Warmed local search index with {len(self.index)} articles ({self.index.postings} postings)")
+
+    def warm(self, db: Session):
+        started = datetime.utcnow()
+        self._install(db, self._build(db, started), started)
+
+    async def warm_in_background(self):
+        """
+        Like `warm`, but the build runs in a worker thread. The catch-up and the swap run
+        on the event loop, where the other updates come from, so none are lost in between.
+        """
+        started = datetime.utcnow()
+
+        def build():
+            db = self.session_factory()
+            try:
+                return self._build(db, started)
+            finally:
+                db.close()
+
+        try:
+            index = await asyncio.get_running_loop().run_in_executor(None, build)
+        except Exception as e:
+            logger.error(f"Could not build the local search index: {e}")
+            return
+        db = self.session_factory()
+        try:
+            self._install(db, index, started)
+        finally:
+            db.close()
+
+    def save(self):
+        if self.ready and self.snapshot_path:
+            self.index.save(self.snapshot_path, saved_at=datetime.utcnow().isoformat(), documents=len(self.index))
+
+    def add_articles(self, articles: Iterable[Article]):
+        if self.ready:
+            for article in articles:
+                index_article(self.index, article)
+
+    def update_categories(self, changes: Iterable[Tuple[str, str]]):
+        """Apply (url, category) changes to the category facet, e.g. after recategorization."""
+        if self.ready:
+            for url, category in changes:
+                self.index.set_facet(url, "category", category)
+
+    def remove(self, urls: Iterable[str]):
+        if self.ready:
+            for url in urls:
+                self.index.remove(url)
+
+    def search(self, q: str, offset: int = 0, limit: int = 20, snippet_words: int = 30,
+               filters: Optional[SearchFilters] = None, sort: str = "relevance") -> dict:
+        """One page of results in the same shape as the MeiliSearch backend returns."""
+        ranked, total, distribution = self.index.search(q, offset, limit, filters, sort, SEARCH_FACETS)
+        if not ranked:
+            return {"hits": [], "estimatedTotalHits": total, "facetDistribution": distribution}
+        db = self.session_factory()
+        try:
+            urls = [url for url, _ in ranked]
+            articles = {article.url: article for article in db.query(Article).filter(Article.url.in_(urls))}
+        finally:
+            db.close()
+        hits = []
+        for url in urls:
+            article = articles.get(url)
+            if article is None:
+                continue
+            hits.append({
+                "url": article.url,
+                "title": article.title,
+                "source": article.source,
+                "published_at": article.published_at.isoformat() if article.published_at else None,
+                "category": article.category,
+                "image_url": article.image_url,
+                "content": snippet(article.content, q, snippet_words),
+            })
+        return {"hits": hits, "estimatedTotalHits": total, "facetDistribution": distribution}
+
+
+local_search_index = LocalSearchIndex()
@@ -0,0 +1,171 @@
+import hashlib
+import html
+import logging
+import os
+import re
+import struct
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import Article
+
+logger = logging.getLogger(__name__)
+
+# Estimated Jaccard similarity of title+summary above which two articles are the same story
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+# Texts with fewer words than this are too short to fingerprint reliably and are never matched
+NEAR_DUP_MIN_TOKENS = int(os.getenv("NEAR_DUP_MIN_TOKENS", "8"))
+# Most recent signatures kept in memory; older stories age out of matching
+NEAR_DUP_CAPACITY = int(os.getenv("NEAR_DUP_CAPACITY", "100000"))
+
+# 32 min-hashes in 8 LSH bands of 4: stories at 0.7 similarity share a band ~89% of the time,
+# at 0.8 ~98%, while unrelated stories (~0.3) become candidates ~6% of the time.
+# Each feature is hashed once; the 64-byte digest supplies all 32 16-bit hash values.
+MINHASH_PERMUTATIONS = 32
+MINHASH_BANDS = 8
+_ROWS_PER_BAND = MINHASH_PERMUTATIONS // MINHASH_BANDS
+_SIGNATURE = struct.Struct(f"<{MINHASH_PERMUTATIONS}H")
+
+_TAG = re.compile(r"<[^>]+>")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _features(title: str, summary: str = "") -> Optional[set]:
+    text = html.unescape(_TAG.sub(" ", f"{title or ''} {summary or ''}")).lower()
+    tokens = _TOKEN.findall(text)
+    if len(tokens) < NEAR_DUP_MIN_TOKENS:
+        return None
+    features = set(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return features
+
+
+def minhash_signature(title: str, summary: str = "") -> Optional[bytes]:
+    """
+    MinHash signature of an article's words and word pairs, packed into 64 bytes.
+
+    Returns None when the text is too short to fingerprint.
+    """
+    features = _features(title, summary)
+    if features is None:
+        return None
+    hashes = [
+        _SIGNATURE.unpack(hashlib.blake2b(feature.encode("utf-8"), digest_size=64).digest())
+        for feature in features
+    ]
+    return _SIGNATURE.pack(*(min(column) for column in zip(*hashes)))
+
+
+def estimate_similarity(a: bytes, b: bytes) -> float:
+    """Fraction of matching min-hashes, an unbiased estimate of the Jaccard similarity."""
+    return sum(x == y for x, y in zip(_SIGNATURE.unpack(a), _SIGNATURE.unpack(b))) / MINHASH_PERMUTATIONS
+
+
+def _band_keys(signature: bytes):
+    width = _ROWS_PER_BAND * _SIGNATURE.size // MINHASH_PERMUTATIONS
+    for band in range(MINHASH_BANDS):
+        yield hash(signature[band * width:(band + 1) * width])
+
+
+class NearDuplicateIndex:
+    """
+    In-memory LSH index of recent story signatures, keyed by canonical URL.
+
+    Each MinHash signature is cut into bands; a lookup only compares against
+    stories that share at least one band exactly, so its cost depends on the
+    bucket sizes rather than on how many stories are indexed.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, capacity: int = NEAR_DUP_CAPACITY):
+        self.threshold = threshold
+        self.capacity = capacity
+        # One bucket map per band: band key -> URL, or a list of URLs on collision
+        self._buckets: List[Dict[int, object]] = [{} for _ in range(MINHASH_BANDS)]
+        # url -> (signature, story_id), oldest first
+        self._entries: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self.ready = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _candidates(self, signature: bytes):
+        seen = set()
+        for buckets, key in zip(self._buckets, _band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is None:
+                continue
+            for url in (bucket,) if isinstance(bucket, str) else bucket:
+                if url not in seen:
+                    seen.add(url)
+                    yield url
+
+    def find(self, signature: bytes) -> Optional[str]:
+        """Return the story ID of the most similar indexed story above the threshold, if any."""
+        best = None
+        best_similarity = self.threshold
+        for url in self._candidates(signature):
+            other, story_id = self._entries[url]
+            similarity = estimate_similarity(signature, other)
+            if similarity >= best_similarity:
+                best, best_similarity = story_id, similarity
+        return best
+
+    def add(self, url: str, signature: bytes, story_id: Optional[str] = None):
+        if url in self._entries:
+            return
+        self._entries[url] = (signature, story_id or url)
+        for buckets, key in zip(self._buckets, _band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = url
+            elif isinstance(bucket, str):
+                buckets[key] = [bucket, url]
+            else:
+                bucket.append(url)
+        while len(self._entries) > self.capacity:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        url, (signature, _) = self._entries.popitem(last=False)
+        for buckets, key in zip(self._buckets, _band_keys(signature)):
+            bucket = buckets[key]
+            if isinstance(bucket, str):
+                del buckets[key]
+            else:
+                bucket.remove(url)
+                if len(bucket) == 1:
+                    buckets[key] = bucket[0]
+
+    def assign(self, url: str, title: str, summary: str = "") -> Tuple[Optional[bytes], str]:
+        """
+        Fingerprint an incoming article and index it.
+
+        Returns its signature (None if the text is too short) and the story ID it
+        belongs to: an existing story's ID for a near-duplicate, otherwise `url` itself.
+        """
+        signature = minhash_signature(title, summary)
+        if signature is None:
+            return None, url
+        story_id = self.find(signature) or url
+        self.add(url, signature, story_id)
+        return signature, story_id
+
+    def warm(self, db: Session):
+        """Load the most recent stored signatures, oldest first so eviction order is preserved."""
+        rows = (
+            db.query(func.coalesce(Article.canonical_url, Article.url), Article.minhash, Article.story_id)
+            .filter(Article.minhash.isnot(None))
+            .order_by(Article.published_at.desc())
+            .limit(self.capacity)
+            .all()
+        )
+        for url, signature, story_id in reversed(rows):
+            self.add(url, bytes(signature), story_id)
+        self.ready = True
+        logger.info(f"Warmed near-duplicate index with {len(self)} story signatures")
+
+
+story_index = NearDuplicateIndex()
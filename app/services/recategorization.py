@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app import crud
+from app.database import Article, ArticleCategory, RecategorizationJob, SessionLocal
+from app.services.categorization import score_articles
+from app.services.local_search import LocalSearchIndex, local_search_index
+
+logger = logging.getLogger(__name__)
+
+# Articles re-scored and written back per transaction
+RECATEGORIZE_CHUNK_SIZE = int(os.getenv("RECATEGORIZE_CHUNK_SIZE", "500"))
+
+
+class RecategorizationRunner:
+    """
+    Re-scores every stored article in the background after a keyword change,
+    updating its stored per-category scores and, unless the provider labelled
+    it, its category.
+
+    Articles are read in primary-key order, one chunk per transaction. The changed
+    categories and the job's cursor are committed together, so a job interrupted by
+    a restart or an error resumes after the last chunk it finished.
+    """
+
+    def __init__(self, session_factory=SessionLocal, chunk_size: int = RECATEGORIZE_CHUNK_SIZE,
+                 search_index: LocalSearchIndex = local_search_index):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.search_index = search_index
+        self._task: Optional[asyncio.Task] = None
+        self._job_id: Optional[int] = None
+        # Throughput of the current run only; persisted counters span restarts
+        self._run_started: Optional[float] = None
+        self._run_processed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> dict:
+        """Start a job, or resume the last unfinished one. Returns immediately with its status."""
+        if self.running:
+            return self.status()
+        db = self.session_factory()
+        try:
+            job = self._unfinished_job(db)
+            if job is None:
+                job = RecategorizationJob(total=db.query(func.count(Article.url)).scalar())
+                db.add(job)
+            job.status = "running"
+            job.error = None
+            db.commit()
+            self._job_id = job.id
+        finally:
+            db.close()
+        self._task = asyncio.create_task(self.run(self._job_id))
+        return self.status()
+
+    def resume(self) -> bool:
+        """Pick up a job that was running when the process stopped. Returns True if one was found."""
+        db = self.session_factory()
+        try:
+            job = self._unfinished_job(db, statuses=("running",))
+        finally:
+            db.close()
+        if job is None:
+            return False
+        logger.info(f"Resuming recategorization job {job.id} after {job.processed} articles")
+        self.start()
+        return True
+
+    def backfill_scores(self) -> bool:
+        """
+        Start one full pass when stored articles have no per-category scores and no job has
+        ever run, i.e. on the first start after scores were introduced. The job rows are the
+        persisted marker: once any job exists this is a no-op. Returns True if a job started.
+        """
+        db = self.session_factory()
+        try:
+            if db.query(RecategorizationJob.id).first() is not None:
+                return False
+            unscored = db.query(Article.url).filter(
+                ~db.query(ArticleCategory.article_url).filter(ArticleCategory.article_url == Article.url).exists()
+            ).first()
+        finally:
+            db.close()
+        if unscored is None:
+            return False
+        logger.info("Backfilling per-category scores of stored articles")
+        self.start()
+        return True
+
+    def _unfinished_job(self, db, statuses=("running", "failed")) -> Optional[RecategorizationJob]:
+        return (
+            db.query(RecategorizationJob)
+            .filter(RecategorizationJob.status.in_(statuses))
+            .order_by(RecategorizationJob.id.desc())
+            .first()
+        )
+
+    async def run(self, job_id: int):
+        self._job_id = job_id
+        self._run_started = time.monotonic()
+        self._run_processed = 0
+        db = self.session_factory()
+        try:
+            loop = asyncio.get_running_loop()
+            while True:
+                # Scoring and the bulk UPDATE run off the event loop, one chunk at a time
+                count, changes = await loop.run_in_executor(None, self.process_chunk, db, job_id)
+                if not count:
+                    break
+                # Back on the loop, where the local index's other updates happen
+                self.search_index.update_categories(changes)
+                self._run_processed += count
+        except Exception as e:
+            logger.error(f"Recategorization job {job_id} failed: {e}")
+            db.rollback()
+            job = db.get(RecategorizationJob, job_id)
+            job.status = "failed"
+            job.error = str(e)
+            db.commit()
+        finally:
+            db.close()
+
+    def process_chunk(self, db, job_id: int) -> Tuple[int, List[Tuple[str, str]]]:
+        """
+        Re-score the next chunk and commit it with the advanced cursor. Returns the number
+        of articles read and the (url, category) changes committed.
+        """
+        job = db.get(RecategorizationJob, job_id)
+        rows = crud.get_article_texts_after(db, job.cursor, self.chunk_size)
+        now = datetime.utcnow()
+        if not rows:
+            job.status = "completed"
+            job.finished_at = now
+            job.updated_at = now
+            db.commit()
+            logger.info(f"Recategorization job {job_id} finished: {job.updated} of {job.processed} articles changed")
+            return 0, []
+        results = score_articles((row.title or "", row.content or "") for row in rows)
+        # Articles labelled by their provider (NewsAPI category requests) keep that label,
+        # as at ingest; their scores are still refreshed
+        changes = [
+            (row.url, category) for row, (category, _) in zip(rows, results)
+            if row.native_category is None and category != row.category
+        ]
+        crud.bulk_update_categories(db, changes)
+        crud.replace_category_scores(db, {row.url: scores for row, (_, scores) in zip(rows, results)})
+        job.cursor = rows[-1].url
+        job.processed += len(rows)
+        job.updated += len(changes)
+        # Articles stored since the job started extend the range still to scan
+        job.total = max(job.total, job.processed)
+        job.updated_at = now
+        db.commit()
+        return len(rows), changes
+
+    def status(self) -> dict:
+        """Progress of the current or most recent job."""
+        db = self.session_factory()
+        try:
+            query = db.query(RecategorizationJob)
+            if self._job_id is not None:
+                job = query.filter(RecategorizationJob.id == self._job_id).first()
+            else:
+                job = query.order_by(RecategorizationJob.id.desc()).first()
+        finally:
+            db.close()
+        if job is None:
+            return {"status": "idle"}
+        rate = None
+        if self._run_started is not None and job.id == self._job_id:
+            elapsed = time.monotonic() - self._run_started
+            rate = round(self._run_processed / elapsed, 1) if elapsed > 0 else None
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "processed": job.processed,
+            "updated": job.updated,
+            "total": job.total,
+            "progress": round(job.processed / job.total, 4) if job.total else 1.0,
+            "articles_per_second": rate,
+            "cursor": job.cursor,
+            "error": job.error,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+
+recategorization_jobs = RecategorizationRunner()
@@ -0,0 +1,34 @@
+import calendar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+# Fields every search backend counts matches by (facetDistribution)
+SEARCH_FACETS = ["category", "source"]
+SEARCH_SORTS = ("relevance", "recent")
+
+
+def naive_utc(value: datetime) -> datetime:
+    """`value` as the naive UTC datetime articles are stored with; naive input is taken as UTC."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def epoch_seconds(value: datetime) -> int:
+    return calendar.timegm(naive_utc(value).timetuple())
+
+
+@dataclass
+class SearchFilters:
+    """
+    Restrictions a search backend applies before ranking and paging. Values within a field
+    are alternatives (any category listed); the fields themselves must all hold. The date
+    bounds are inclusive, and articles without a date never match a date bound.
+    """
+
+    categories: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    published_from: Optional[datetime] = None
+    published_to: Optional[datetime] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.categories or self.sources or self.published_from or self.published_to)
@@ -1,26 +1,179 @@
-import meilisearch
+import asyncio
+import logging
 import os
 from typing import List, Optional
 
-client = meilisearch.Client(
-    "http://search:7700",
-    os.getenv("MEILI_MASTER_KEY", "your_secure_meili_master_key")
-)
+from app import crud
+from app.adapters.meili_client import MeiliError, meili_client as client
+from app.database import SessionLocal
+from app.services.local_search import LocalSearchIndex, local_search_index
+from app.services.search_filters import SEARCH_FACETS, SearchFilters, epoch_seconds
+
+logger = logging.getLogger(__name__)
 
 INDEX_NAME = "articles"
+# Fields a search result page shows; full article bodies are never sent back
+SEARCH_RESULT_FIELDS = ["url", "title", "source", "published_at", "category", "image_url"]
+# Words of article content kept around the match as a snippet
+SEARCH_SNIPPET_WORDS = int(os.getenv("SEARCH_SNIPPET_WORDS", "30"))
+# "meili" searches MeiliSearch; "local" only uses the in-process index; "postgres" uses
+# PostgreSQL full-text search and needs no MeiliSearch at all
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "meili")
+# With "meili", also keep the in-process index so searches fail over to it while MeiliSearch
+# is unreachable; it costs memory and a scan of the stored articles at startup
+SEARCH_LOCAL_FAILOVER = os.getenv("SEARCH_LOCAL_FAILOVER", "false").lower() == "true"
+# Cap on counted matches, like MeiliSearch's pagination.maxTotalHits
+SEARCH_MAX_TOTAL_HITS = int(os.getenv("SEARCH_MAX_TOTAL_HITS", "1000"))
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def meili_filter(filters: SearchFilters) -> List[str]:
+    """MeiliSearch filter expressions (ANDed) for `filters`, over the index's filterable attributes."""
+    expressions = []
+    for name, values in (("category", filters.categories), ("source", filters.sources)):
+        if values:
+            expressions.append(f"{name} IN [{', '.join(_quote(value) for value in values)}]")
+    if filters.published_from:
+        expressions.append(f"published_ts >= {epoch_seconds(filters.published_from)}")
+    if filters.published_to:
+        expressions.append(f"published_ts <= {epoch_seconds(filters.published_to)}")
+    return expressions
+
+
+class MeiliSearchBackend:
+    name = "meili"
+
+    async def search(self, q: str, offset: int, limit: int,
+                     attributes_to_search_on: Optional[List[str]] = None,
+                     filters: Optional[SearchFilters] = None, sort: str = "relevance") -> dict:
+        search_params = {
+            "offset": offset,
+            "limit": limit,
+            "attributesToRetrieve": SEARCH_RESULT_FIELDS,
+            "attributesToCrop": ["content"],
+            "cropLength": SEARCH_SNIPPET_WORDS,
+            "facets": SEARCH_FACETS,
+        }
+        if attributes_to_search_on:
+            search_params["attributesToSearchOn"] = attributes_to_search_on
+        if filters:
+            search_params["filter"] = meili_filter(filters)
+        if sort == "recent":
+            search_params["sort"] = ["published_ts:desc"]
+
+        search_result = await client.search(INDEX_NAME, q, **search_params)
+        hits = []
+        for hit in search_result.get("hits", []):
+            article = {field: hit.get(field) for field in SEARCH_RESULT_FIELDS}
+            article["content"] = hit.get("_formatted", {}).get("content")
+            hits.append(article)
+        return {
+            "hits": hits,
+            "estimatedTotalHits": search_result.get("estimatedTotalHits", len(hits)),
+            "facetDistribution": search_result.get("facetDistribution", {}),
+        }
+
+
+class LocalSearchBackend:
+    """The in-process BM25 index; it searches titles and content together."""
+
+    name = "local"
+
+    def __init__(self, index: LocalSearchIndex = local_search_index):
+        self.index = index
+
+    @property
+    def available(self) -> bool:
+        return self.index.ready
+
+    async def search(self, q: str, offset: int, limit: int,
+                     attributes_to_search_on: Optional[List[str]] = None,
+                     filters: Optional[SearchFilters] = None, sort: str = "relevance") -> dict:
+        return self.index.search(q, offset, limit, SEARCH_SNIPPET_WORDS, filters, sort)
+
+
+class PostgresSearchBackend:
+    """
+    The articles table's tsvector column and GIN index; it searches every weighted field.
+    Queries run in a worker thread so they don't block the event loop.
+    """
+
+    name = "postgres"
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def _search(self, q: str, offset: int, limit: int, filters: Optional[SearchFilters], sort: str) -> dict:
+        db = self.session_factory()
+        try:
+            rows, total, distribution = crud.search_articles_fulltext(
+                db, q, offset, limit, SEARCH_SNIPPET_WORDS, SEARCH_MAX_TOTAL_HITS, filters, sort
+            )
+            hits = []
+            for article, content in rows:
+                hit = {field: getattr(article, field) for field in SEARCH_RESULT_FIELDS}
+                if article.published_at:
+                    hit["published_at"] = article.published_at.isoformat()
+                hit["content"] = content
+                hits.append(hit)
+        finally:
+            db.close()
+        return {"hits": hits, "estimatedTotalHits": total, "facetDistribution": distribution}
+
+    async def search(self, q: str, offset: int, limit: int,
+                     attributes_to_search_on: Optional[List[str]] = None,
+                     filters: Optional[SearchFilters] = None, sort: str = "relevance") -> dict:
+        return await asyncio.get_running_loop().run_in_executor(None, self._search, q, offset, limit, filters, sort)
+
+
+meili_backend = MeiliSearchBackend()
+local_backend = LocalSearchBackend()
+postgres_backend = PostgresSearchBackend()
+# Backends that answer on their own, selected with SEARCH_BACKEND
+_standalone_backends = {"local": local_backend, "postgres": postgres_backend}
+
+
+def uses_local_index() -> bool:
+    """Whether this process keeps the in-process index: as its backend, or as MeiliSearch's failover."""
+    return SEARCH_BACKEND == "local" or (SEARCH_BACKEND == "meili" and SEARCH_LOCAL_FAILOVER)
+
+
+async def search_page(
+    q: str,
+    offset: int = 0,
+    limit: int = 20,
+    attributes_to_search_on: Optional[List[str]] = None,
+    filters: Optional[SearchFilters] = None,
+    sort: str = "relevance",
+) -> dict:
+    """
+    One page of results with the backend doing the paging, so a deep page costs the
+    same as the first. Hits carry the result fields plus a content snippet.
+
+    `filters` and `sort` ("relevance" or "recent") are applied inside the backend, and
+    `facetDistribution` counts the filtered matches by category and source.
+
+    With the MeiliSearch backend and SEARCH_LOCAL_FAILOVER, the local index answers when
+    MeiliSearch cannot.
+    """
+    args = (q, offset, limit, attributes_to_search_on, filters, sort)
+    if SEARCH_BACKEND in _standalone_backends:
+        return await _standalone_backends[SEARCH_BACKEND].search(*args)
+    try:
+        return await meili_backend.search(*args)
+    except MeiliError as e:
+        if not local_backend.available:
+            raise
+        logger.warning(f"MeiliSearch unavailable ({e}); answering from the local search index")
+        return await local_backend.search(*args)
+
 
 async def search_articles(
-    q: str, 
-    limit: int = 20, 
+    q: str,
+    limit: int = 20,
     attributes_to_search_on: Optional[List[str]] = None
 ) -> List[dict]:
-    index = client.index(INDEX_NAME)
-    
-    search_params = {
-        "limit": limit
-    }
-    if attributes_to_search_on:
-        search_params["attributesToSearchOn"] = attributes_to_search_on
-        
-    search_result = index.search(q, search_params)
-    return search_result.get("hits", [])
+    return (await search_page(q, 0, limit, attributes_to_search_on))["hits"]
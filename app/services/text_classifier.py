@@ -0,0 +1,224 @@
+"""
+Trainable TF-IDF + multinomial Naive Bayes categorizer.
+
+Train from articles whose category NewsAPI assigned (or a JSON-lines file of
+{"title", "summary", "category"} records) and save the model directory:
+
+    python -m app.services.text_classifier --output models/category-nb
+    python -m app.services.text_classifier --dataset labelled.jsonl --output models/category-nb
+
+Select it with CATEGORIZER_BACKEND=model and CATEGORIZER_MODEL_PATH.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# Hashed feature space for words and word pairs; no vocabulary has to be stored
+CLASSIFIER_FEATURES = 2 ** 18
+# Probability in percent that counts an article as belonging to a category besides its primary one
+MODEL_MIN_CATEGORY_SCORE = int(os.getenv("MODEL_MIN_CATEGORY_SCORE", "20"))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def feature_ids(text: str, num_features: int = CLASSIFIER_FEATURES) -> List[int]:
+    """Hashed ids of the words and adjacent word pairs of a lowercased text."""
+    hashes = [zlib.crc32(token.encode("utf-8")) for token in _TOKEN.findall(text)]
+    # A pair's id mixes its words' hashes, which is stable across processes like crc32 itself
+    pairs = [(a * 0x9E3779B1 + b) & 0xFFFFFFFF for a, b in zip(hashes, hashes[1:])]
+    return [h % num_features for h in hashes + pairs]
+
+
+class NaiveBayesClassifier:
+    """
+    Multinomial Naive Bayes over sublinear, L2-normalized TF-IDF vectors of hashed features.
+
+    The model is three arrays (idf, per-class feature log-probabilities and class log
+    priors) saved as .npy files, so `load` memory-maps them instead of reading them in.
+    Scores are class probabilities in percent, which is what gets stored per category,
+    so its secondary-category threshold is a percentage too.
+    """
+
+    min_category_score = MODEL_MIN_CATEGORY_SCORE
+
+    def __init__(self, categories: List[str], idf: np.ndarray, weights: np.ndarray, bias: np.ndarray,
+                 version: Optional[str] = None):
+        self.categories = list(categories)
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.num_features = idf.shape[0]
+        # Cache stamp; computed once at training time so loading never reads the whole mapping
+        self.version = version or self._fingerprint()
+
+    def _fingerprint(self) -> str:
+        digest = hashlib.blake2b(json.dumps(self.categories).encode("utf-8"), digest_size=8)
+        for array in (self.idf, self.weights, self.bias):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def train(cls, samples: Iterable[Tuple[str, str]], num_features: int = CLASSIFIER_FEATURES,
+              alpha: float = 0.01) -> "NaiveBayesClassifier":
+        """Fit on (lowercased text, category) pairs."""
+        texts, labels = [], []
+        for text, label in samples:
+            texts.append(text)
+            labels.append(label)
+        if not texts:
+            raise ValueError("No labelled articles to train on")
+        categories = sorted(set(labels))
+        counts = cls._count_matrix(texts, num_features)
+        document_frequency = np.bincount(counts.indices, minlength=num_features)
+        idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        vectors = cls._tfidf(counts, idf)
+
+        label_ids = np.array([categories.index(label) for label in labels])
+        membership = sparse.csr_matrix(
+            (np.ones(len(labels)), (label_ids, np.arange(len(labels)))), shape=(len(categories), len(labels))
+        )
+        feature_mass = np.asarray((membership @ vectors).todense()) + alpha
+        weights = np.log(feature_mass / feature_mass.sum(axis=1, keepdims=True)).T.astype(np.float32)
+        bias = np.log(np.bincount(label_ids, minlength=len(categories)) / len(labels)).astype(np.float32)
+        return cls(categories, idf, np.ascontiguousarray(weights), bias)
+
+    @staticmethod
+    def _count_matrix(texts: List[str], num_features: int) -> sparse.csr_matrix:
+        indptr, indices = [0], []
+        for text in texts:
+            indices.extend(feature_ids(text, num_features))
+            indptr.append(len(indices))
+        counts = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr), shape=(len(texts), num_features)
+        )
+        counts.sum_duplicates()
+        return counts
+
+    @staticmethod
+    def _tfidf(counts: sparse.csr_matrix, idf: np.ndarray) -> sparse.csr_matrix:
+        vectors = counts.copy()
+        vectors.data = (1 + np.log(vectors.data)) * idf[vectors.indices]
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ vectors
+
+    def probabilities(self, texts: List[str]) -> np.ndarray:
+        """Article x category probability matrix for lowercased texts."""
+        if not texts:
+            return np.zeros((0, len(self.categories)), dtype=np.float32)
+        vectors = self._tfidf(self._count_matrix(texts, self.num_features), self.idf)
+        joint = vectors @ self.weights + self.bias
+        joint -= joint.max(axis=1, keepdims=True)
+        exp = np.exp(joint)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def probability(self, text: str) -> np.ndarray:
+        """Category probabilities for one text, without building a sparse matrix."""
+        counted = Counter(feature_ids(text, self.num_features))
+        if not counted:
+            exp = np.exp(self.bias - self.bias.max())
+            return exp / exp.sum()
+        ids = np.fromiter(counted.keys(), dtype=np.int64, count=len(counted))
+        counts = np.fromiter(counted.values(), dtype=np.float32, count=len(counted))
+        values = (1 + np.log(counts)) * self.idf[ids]
+        values /= math.sqrt(float(values @ values))
+        joint = values @ self.weights[ids] + self.bias
+        exp = np.exp(joint - joint.max())
+        return exp / exp.sum()
+
+    def score_texts(self, texts: List[str]) -> List[Tuple[str, Tuple[int, ...]]]:
+        """(category, per-category percent) for each lowercased text."""
+        if len(texts) == 1:
+            matrix = self.probability(texts[0])[np.newaxis, :]
+        else:
+            matrix = self.probabilities(texts)
+        percents = np.rint(matrix * 100).astype(np.int32)
+        best = matrix.argmax(axis=1).tolist()
+        return [(self.categories[index], tuple(row)) for index, row in zip(best, percents.tolist())]
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "idf.npy"), self.idf)
+        np.save(os.path.join(path, "weights.npy"), self.weights)
+        np.save(os.path.join(path, "bias.npy"), self.bias)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"categories": self.categories, "num_features": self.num_features, "version": self.version}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesClassifier":
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(
+            meta["categories"],
+            # Plain ndarray views of the mapping index faster than np.memmap objects
+            np.load(os.path.join(path, "idf.npy"), mmap_mode="r").view(np.ndarray),
+            np.load(os.path.join(path, "weights.npy"), mmap_mode="r").view(np.ndarray),
+            np.load(os.path.join(path, "bias.npy")),
+            version=meta["version"],
+        )
+
+
+def load_dataset(path: str) -> List[Tuple[str, str]]:
+    """(lowercased text, category) pairs from a JSON-lines file of title/summary/category records."""
+    samples = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                text = (record.get("title") or "") + " " + (record.get("summary") or "")
+                samples.append((text.lower(), record["category"]))
+    return samples
+
+
+def load_labelled_articles(db, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+    """(lowercased text, category) pairs for stored articles that carry NewsAPI's own category."""
+    from app.database import Article
+
+    query = (
+        db.query(Article.title, Article.content, Article.native_category)
+        .filter(Article.native_category.isnot(None))
+        .order_by(Article.published_at.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    return [(((title or "") + " " + (content or "")).lower(), label) for title, content, label in query]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.getenv("CATEGORIZER_MODEL_PATH", "models/category-nb"))
+    parser.add_argument("--dataset", help="JSON-lines file of title/summary/category records (default: the database)")
+    parser.add_argument("--limit", type=int, help="Most recent labelled articles to train on")
+    parser.add_argument("--alpha", type=float, default=0.01)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.dataset:
+        samples = load_dataset(args.dataset)
+    else:
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            samples = load_labelled_articles(db, args.limit)
+        finally:
+            db.close()
+    model = NaiveBayesClassifier.train(samples, alpha=args.alpha)
+    model.save(args.output)
+    logger.info(f"Trained on {len(samples)} articles ({', '.join(model.categories)}), saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
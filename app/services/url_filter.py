@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import math
+import os
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from app.database import Article
+
+logger = logging.getLogger(__name__)
+
+# Expected number of stored URLs and target false-positive rate for the filter
+URL_FILTER_CAPACITY = int(os.getenv("URL_FILTER_CAPACITY", "1000000"))
+URL_FILTER_ERROR_RATE = float(os.getenv("URL_FILTER_ERROR_RATE", "0.01"))
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    `might_contain` never returns False for an added item, so a negative answer
+    means "definitely not seen"; a positive answer has to be confirmed elsewhere.
+    """
+
+    def __init__(self, capacity: int = URL_FILTER_CAPACITY, error_rate: float = URL_FILTER_ERROR_RATE):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, item: str):
+        bits = self.bits
+        for pos in self._positions(item):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def might_contain(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    __contains__ = might_contain
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.bits)
+
+    @property
+    def saturated(self) -> bool:
+        """True once more items were added than the filter was sized for."""
+        return self.count > self.capacity
+
+
+class KnownURLFilter:
+    """
+    Bloom filter of the canonical URLs already in the `articles` table.
+
+    Warmed from the database at startup and updated on every insert, it lets the
+    ingest path skip the existence check for stories that are definitely new.
+    """
+
+    def __init__(self, capacity: int = URL_FILTER_CAPACITY, error_rate: float = URL_FILTER_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = None
+
+    @property
+    def ready(self) -> bool:
+        return self.bloom is not None and not self.bloom.saturated
+
+    def warm(self, db: Session, chunk_size: int = 10000):
+        """(Re)build the filter from every stored canonical URL, sized for at least twice the current table."""
+        stored = db.query(Article.url).count()
+        self.bloom = BloomFilter(max(self.capacity, stored * 2), self.error_rate)
+        query = db.query(Article.canonical_url).filter(Article.canonical_url.isnot(None))
+        for (canonical_url,) in query.yield_per(chunk_size):
+            self.bloom.add(canonical_url)
+        logger.info(
+            f"Warmed URL filter with {self.bloom.count} URLs "
+            f"({self.bloom.size_bytes / 1024 / 1024:.1f} MiB, {self.bloom.num_hashes} hashes)"
+        )
+
+    def add(self, urls: Iterable[str]):
+        if self.bloom is not None:
+            self.bloom.update(urls)
+
+    def might_contain(self, url: str) -> bool:
+        # Without a filter every URL has to be checked against the database
+        return self.bloom is None or self.bloom.might_contain(url)
+
+
+known_urls = KnownURLFilter()
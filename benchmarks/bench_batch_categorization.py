@@ -0,0 +1,79 @@
+"""
+Throughput of the batch categorizer against per-article `categorize_article`
+calls, at bulk-recategorization sizes.
+
+    python -m benchmarks.bench_batch_categorization --sizes 100000 1000000
+
+Articles are drawn from the recorded NewsAPI fixture; `--novel-rate` replaces that
+fraction of words with never-seen tokens (names, numbers) so the token cache sees a
+growing vocabulary as it would on a real archive.
+"""
+import argparse
+import random
+import time
+
+from app.services import categorization
+from app.services.categorization import CATEGORY_KEYWORDS, BatchCategorizer, categorize_article
+from tests.categorization_reference import sample_articles
+
+
+def generate_articles(count, novel_rate, seed=5):
+    rng = random.Random(seed)
+    base = sample_articles(min(count, 20000))
+    for index in range(count):
+        title, summary = base[index % len(base)]
+        words = f"{title} {summary}".split()
+        for position in range(len(words)):
+            if rng.random() < novel_rate:
+                words[position] = f"{rng.choice('bdgkmprstvz')}{rng.getrandbits(24):x}"
+        yield " ".join(words[:12]), " ".join(words[12:])
+
+
+def _chunks(articles, size):
+    chunk = []
+    for article in articles:
+        chunk.append(article)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--novel-rate", type=float, default=0.02)
+    parser.add_argument("--scalar-sample", type=int, default=20000,
+                        help="articles timed with the scalar function to estimate its throughput")
+    args = parser.parse_args()
+    # Time the scorers themselves, not the content-hash cache
+    categorization.category_cache.capacity = 0
+
+    for size in args.sizes:
+        categorizer = BatchCategorizer(CATEGORY_KEYWORDS)
+        batch_seconds = scalar_seconds = 0.0
+        scalar_count = mismatches = 0
+        for chunk in _chunks(generate_articles(size, args.novel_rate), args.chunk_size):
+            texts = [(title + " " + summary).lower() for title, summary in chunk]
+            start = time.perf_counter()
+            categories = categorizer.categorize(texts)
+            batch_seconds += time.perf_counter() - start
+            if scalar_count < args.scalar_sample:
+                start = time.perf_counter()
+                expected = [categorize_article(title, summary) for title, summary in chunk]
+                scalar_seconds += time.perf_counter() - start
+                scalar_count += len(chunk)
+                mismatches += sum(a != b for a, b in zip(categories, expected))
+        batch_rate = size / batch_seconds
+        scalar_rate = scalar_count / scalar_seconds
+        print(f"{size:,} articles in chunks of {args.chunk_size:,} "
+              f"({len(categorizer._token_hits):,} distinct tokens cached)")
+        print(f"  categorize_article: {scalar_rate:10,.0f} articles/s (first {scalar_count:,})")
+        print(f"  batch:              {batch_rate:10,.0f} articles/s, {batch_seconds:.1f} s total "
+              f"({batch_rate / scalar_rate:.1f}x), {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Throughput and peak memory of a full search reindex: the old approach (every
+article in one list and one JSON payload) against the streaming NDJSON bulk
+indexer. Runs offline against a SQLite file and a stub MeiliSearch client.
+
+    python -m benchmarks.bench_bulk_indexer --articles 200000
+
+Each approach runs in its own process so their peak RSS figures are independent.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.database import Article, Base
+from app.services.bulk_indexer import BulkIndexer, peak_rss_mb
+from app.services.index_populator import article_document
+
+
+class StubMeili:
+    """Accepts every payload and reports its task as succeeded on the first poll."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def add_documents(self, index, documents):
+        self.bytes += len(json.dumps(documents).encode("utf-8"))
+
+    async def add_documents_ndjson(self, index, payload, primary_key="id"):
+        self.bytes += len(payload)
+        return {"taskUid": 0}
+
+    async def get_task(self, uid):
+        return {"uid": uid, "status": "succeeded"}
+
+
+def build_database(path, articles, content_bytes):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    body = ("lorem ipsum dolor sit amet " * (content_bytes // 27 + 1))[:content_bytes]
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for start in range(0, articles, 10000):
+            conn.execute(insert(Article), [
+                {"url": f"https://example.com/story/{i}", "title": f"Story number {i}", "content": body,
+                 "source": "Bench", "category": "General", "published_at": now, "updated_at": now}
+                for i in range(start, min(start + 10000, articles))
+            ])
+
+
+def run_mode(path, mode, batch_bytes):
+    db = sessionmaker(bind=create_engine(f"sqlite:///{path}"))()
+    client = StubMeili()
+    start = time.perf_counter()
+    if mode == "list":
+        documents = [article_document(article) for article in db.query(Article).all()]
+        client.add_documents("articles", documents)
+        count = len(documents)
+    else:
+        indexer = BulkIndexer(client, "articles", batch_bytes=batch_bytes, poll_interval=0)
+        rows = crud.iter_articles_changed_since(db, None)
+        count = asyncio.run(indexer.run(article_document(row) for row in rows)).documents
+    seconds = time.perf_counter() - start
+    print(json.dumps({"documents": count, "seconds": seconds, "bytes": client.bytes, "peak_rss_mb": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=200_000)
+    parser.add_argument("--content-bytes", type=int, default=1000)
+    parser.add_argument("--batch-bytes", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--mode", choices=("list", "stream"), help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.db, args.mode, args.batch_bytes)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        build_database(path, args.articles, args.content_bytes)
+        print(f"{args.articles:,} articles of ~{args.content_bytes} bytes written in {time.perf_counter() - start:.1f}s")
+        for mode, label in (("list", "one list + one payload"), ("stream", "streaming NDJSON batches")):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_bulk_indexer", "--mode", mode, "--db", path,
+                 "--batch-bytes", str(args.batch_bytes)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"  {label:26s}: {stats['documents'] / stats['seconds']:8,.0f} docs/s, "
+                  f"{stats['bytes'] / 2 ** 20:6.0f} MiB sent, peak RSS {stats['peak_rss_mb']:6.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Per-article cost of the compiled keyword categorizer against the original
+per-keyword substring scan.
+
+    python -m benchmarks.bench_categorization --articles 5000
+"""
+import argparse
+import time
+
+from app.services import categorization
+from app.services.categorization import categorize_article
+from tests.categorization_reference import legacy_categorize_article, sample_articles
+
+
+def _time(func, articles):
+    start = time.perf_counter()
+    results = [func(title, summary) for title, summary in articles]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=5000)
+    args = parser.parse_args()
+
+    articles = sample_articles(args.articles)
+    categorization.category_cache.capacity = 0
+    chars = sum(len(t) + len(s) + 1 for t, s in articles) / len(articles)
+    legacy_seconds, legacy = _time(legacy_categorize_article, articles)
+    compiled_seconds, compiled = _time(categorize_article, articles)
+    mismatches = sum(a != b for a, b in zip(legacy, compiled))
+    print(f"{len(articles):,} articles, {chars:.0f} chars on average")
+    print(f"  keyword scan: {legacy_seconds / len(articles) * 1e6:8.1f} us/article")
+    print(f"  automaton:    {compiled_seconds / len(articles) * 1e6:8.1f} us/article "
+          f"({legacy_seconds / compiled_seconds:.1f}x faster), {mismatches} mismatches")
+
+    # Republished copy: the same texts again, answered from the content-hash cache
+    categorization.category_cache.capacity = len(articles)
+    _time(categorize_article, articles)
+    cached_seconds, _ = _time(categorize_article, articles)
+    print(f"  cached:       {cached_seconds / len(articles) * 1e6:8.1f} us/article")
+
+
+if __name__ == "__main__":
+    main()
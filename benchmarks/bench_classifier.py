@@ -0,0 +1,117 @@
+"""
+Accuracy and latency of the trained TF-IDF + Naive Bayes categorizer against
+the keyword engine, by k-fold cross-validation on NewsAPI-labelled articles.
+
+    python -m benchmarks.bench_classifier                      # recorded NewsAPI fixture
+    python -m benchmarks.bench_classifier --dataset labelled.jsonl
+    python -m benchmarks.bench_classifier --from-db            # articles with native_category
+
+The recorded fixture is 42 templated headlines ("technology story 3 ..."), so
+its accuracy line only shows the harness works; use --dataset or --from-db for
+real accuracy figures. Latency figures are meaningful either way.
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from app.services.categorization import KeywordBackend, CATEGORY_KEYWORDS
+from app.services.text_classifier import NaiveBayesClassifier, load_dataset, load_labelled_articles
+
+FIXTURE = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "newsapi_recorded_responses.json"
+
+
+def fixture_samples():
+    """(lowercased text, category) pairs from the recorded NewsAPI category responses."""
+    samples = []
+    for query, response in json.loads(FIXTURE.read_text()).items():
+        category = parse_qs(query).get("category")
+        if not category:
+            continue
+        for item in response.get("articles", []):
+            text = (item.get("title") or "") + " " + (item.get("description") or "")
+            samples.append((text.lower(), category[0].capitalize()))
+    return samples
+
+
+def _folds(samples, k, seed):
+    shuffled = list(samples)
+    random.Random(seed).shuffle(shuffled)
+    for fold in range(k):
+        test = shuffled[fold::k]
+        train = [sample for i, sample in enumerate(shuffled) if i % k != fold]
+        yield train, test
+
+
+def _per_article_us(score_texts, texts, batch):
+    start = time.perf_counter()
+    if batch:
+        score_texts(texts)
+    else:
+        for text in texts:
+            score_texts([text])
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", help="JSON-lines file of title/summary/category records")
+    parser.add_argument("--from-db", action="store_true", help="Use stored articles that carry NewsAPI's category")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--alpha", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.dataset:
+        samples = load_dataset(args.dataset)
+    elif args.from_db:
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            samples = load_labelled_articles(db)
+        finally:
+            db.close()
+    else:
+        samples = fixture_samples()
+    labels = Counter(label for _, label in samples)
+    print(f"{len(samples):,} labelled articles: " + ", ".join(f"{k} {v}" for k, v in sorted(labels.items())))
+
+    keywords = KeywordBackend(CATEGORY_KEYWORDS)
+    keyword_correct = model_correct = 0
+    train_seconds = 0.0
+    for train, test in _folds(samples, args.folds, args.seed):
+        start = time.perf_counter()
+        model = NaiveBayesClassifier.train(train, alpha=args.alpha)
+        train_seconds += time.perf_counter() - start
+        texts = [text for text, _ in test]
+        gold = [label for _, label in test]
+        keyword_correct += sum(c == g for (c, _), g in zip(keywords.score_texts(texts), gold))
+        model_correct += sum(c == g for (c, _), g in zip(model.score_texts(texts), gold))
+
+    print(f"  accuracy ({args.folds}-fold): keywords {keyword_correct / len(samples):.1%}, "
+          f"model {model_correct / len(samples):.1%}")
+
+    model = NaiveBayesClassifier.train(samples, alpha=args.alpha)
+    with tempfile.TemporaryDirectory() as path:
+        model.save(path)
+        size = sum(f.stat().st_size for f in Path(path).iterdir())
+        start = time.perf_counter()
+        model = NaiveBayesClassifier.load(path)
+        load_ms = (time.perf_counter() - start) * 1e3
+        texts = [text for text, _ in samples] * max(1, 2000 // len(samples))
+        model.score_texts(texts[:10])
+        print(f"  model: trained in {train_seconds / args.folds * 1e3:.0f} ms per fold, "
+              f"{size / 2 ** 20:.1f} MiB on disk, memory-mapped in {load_ms:.1f} ms")
+        for name, backend in (("keywords", keywords), ("model", model)):
+            single = _per_article_us(backend.score_texts, texts, batch=False)
+            batch = _per_article_us(backend.score_texts, texts, batch=True)
+            print(f"  {name:8s} latency: {single:6.1f} us/article one at a time, {batch:6.1f} us/article batched")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compare feed-cycle wall time and opened sockets between a fresh
+httpx.AsyncClient per feed (the old behavior) and the shared pooled client.
+
+Runs entirely offline against a local stub feed server:
+
+    python -m benchmarks.bench_http_client --feeds 30 --cycles 5
+"""
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from app.adapters import http_client
+
+RSS_BODY = (
+    '<?xml version="1.0"?><rss version="2.0"><channel><title>Stub</title>'
+    + "".join(
+        f"<item><title>Item {i}</title><link>http://stub.local/{i}</link>"
+        f"<description>Summary {i}</description></item>"
+        for i in range(50)
+    )
+    + "</channel></rss>"
+).encode()
+
+
+class StubFeedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        # Called once per accepted TCP connection
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class StubFeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        time.sleep(0.005)  # simulated server think time
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(RSS_BODY)))
+        self.end_headers()
+        self.wfile.write(RSS_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+async def _per_feed_client_cycle(urls):
+    async def fetch_one(url):
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.get(url)
+            resp.raise_for_status()
+            return resp.text
+
+    return await asyncio.gather(*(fetch_one(u) for u in urls))
+
+
+async def _shared_client_cycle(urls):
+    async def fetch_one(url):
+        resp = await http_client.fetch(url, timeout=10)
+        resp.raise_for_status()
+        return resp.text
+
+    return await asyncio.gather(*(fetch_one(u) for u in urls))
+
+
+async def _run(cycle, urls, cycles):
+    timings = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        await cycle(urls)
+        timings.append(time.perf_counter() - start)
+    await http_client.close_http_client()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--feeds", type=int, default=30)
+    parser.add_argument("--cycles", type=int, default=5)
+    args = parser.parse_args()
+
+    server = StubFeedServer(("127.0.0.1", 0), StubFeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    # Spread feeds over a few "hosts" the way RSS_FEEDS does
+    hosts = ["127.0.0.1", "localhost"]
+    urls = [f"http://{hosts[i % len(hosts)]}:{port}/feed/{i}.xml" for i in range(args.feeds)]
+
+    print(f"{args.feeds} feeds x {args.cycles} cycles")
+    for name, cycle in (("per-feed client", _per_feed_client_cycle), ("shared client", _shared_client_cycle)):
+        server.connections = 0
+        timings = asyncio.run(_run(cycle, urls, args.cycles))
+        print(
+            f"{name:>16}: first cycle {timings[0] * 1000:7.1f} ms, "
+            f"steady cycle {sum(timings[1:]) / max(len(timings) - 1, 1) * 1000:7.1f} ms, "
+            f"sockets opened {server.connections}"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Build cost, memory and query latency of the in-process BM25 search index over a
+synthetic corpus whose word frequencies follow a Zipf distribution, like news text:
+
+    python -m benchmarks.bench_local_search --articles 1000000
+
+Reports indexing throughput, postings size, snapshot save and memory-mapped load
+times, and p50/p99 latency for 1-, 2- and 3-term queries (rare, common and mixed
+terms) on the first page and on a deep page.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.local_search import BM25Index
+
+
+def corpus(articles, words, vocabulary, seed=7):
+    rng = np.random.default_rng(seed)
+    terms = np.array([f"w{i}" for i in range(vocabulary)], dtype=object)
+    for start in range(0, articles, 10000):
+        count = min(10000, articles - start)
+        ids = (rng.zipf(1.2, size=(count, words)) - 1) % vocabulary
+        for i, row in enumerate(ids):
+            yield f"https://example.com/story/{start + i}", " ".join(terms[row])
+
+
+def latency(index, queries, offset, limit=20):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, offset, limit)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.median(timings) * 1e3, timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=60, help="words per article")
+    parser.add_argument("--vocabulary", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    index = BM25Index()
+    start = time.perf_counter()
+    for url, text in corpus(args.articles, args.words, args.vocabulary):
+        index.add(url, text)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    index.compact()
+    compacted = time.perf_counter() - start
+    postings_mb = (index._docs.nbytes + index._tfs.nbytes + index._offsets.nbytes) / 2 ** 20
+    print(f"{args.articles:,} articles of {args.words} words: indexed in {built:.1f}s "
+          f"({args.articles / built:,.0f} docs/s), compacted in {compacted:.1f}s")
+    print(f"  {index.postings:,} postings over {len(index._terms):,} terms: {postings_mb:.0f} MiB of arrays")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search")
+        start = time.perf_counter()
+        index.save(path, saved_at="")
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        index, _ = BM25Index.load(path)
+        loaded = time.perf_counter() - start
+        print(f"  snapshot saved in {saved:.1f}s, memory-mapped back in {loaded:.1f}s")
+
+        # Rank 0-20 words appear in most articles; rank 1000+ words in a handful
+        rng = np.random.default_rng(11)
+        common = [f"w{i}" for i in rng.integers(0, 20, args.queries * 3)]
+        rare = [f"w{i}" for i in rng.integers(1000, 20000, args.queries * 3)]
+        cases = {
+            "1 rare term": rare[:args.queries],
+            "1 common term": common[:args.queries],
+            "2 terms, mixed": [f"{r} {c}" for r, c in zip(rare, common[args.queries:])][:args.queries],
+            "3 terms, mixed": [f"{a} {b} {c}" for a, b, c in zip(rare, rare[args.queries:], common)][:args.queries],
+        }
+        for label, queries in cases.items():
+            first = latency(index, queries, 0)
+            deep = latency(index, queries, 1000)
+            print(f"  {label:15s}: page 1 p50 {first[0]:7.2f} ms, p99 {first[1]:7.2f} ms; "
+                  f"offset 1000 p50 {deep[0]:7.2f} ms, p99 {deep[1]:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
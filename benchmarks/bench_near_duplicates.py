@@ -0,0 +1,95 @@
+"""
+Per-article lookup cost of the near-duplicate LSH index with many stored signatures.
+
+    python -m benchmarks.bench_near_duplicates --stored 1000000
+"""
+import argparse
+import itertools
+import random
+import resource
+import statistics
+import time
+
+from app.services.near_duplicates import NearDuplicateIndex, minhash_signature
+
+
+def _vocabulary(size):
+    words = [f"w{i}" for i in range(size)]
+    # Zipf-like frequencies, like real headlines; cumulative so rng.choices doesn't rebuild them per call
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(size)))
+    return words, weights
+
+
+def _article(rng, words, weights, length=45):
+    tokens = rng.choices(words, cum_weights=weights, k=length)
+    return " ".join(tokens[:12]), " ".join(tokens[12:])
+
+
+def _wire_copy(rng, words, weights, article, edit_fraction):
+    """Rewrite a few words, as outlets do when they run the same agency copy."""
+    tokens = f"{article[0]} {article[1]}".split()
+    for i in rng.sample(range(len(tokens)), int(len(tokens) * edit_fraction)):
+        tokens[i] = rng.choices(words, cum_weights=weights)[0]
+    return " ".join(tokens[:12]), " ".join(tokens[12:])
+
+
+def _rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(stored, queries, edit_fraction, seed):
+    rng = random.Random(seed)
+    words, weights = _vocabulary(50_000)
+    index = NearDuplicateIndex(capacity=stored)
+    originals = []
+
+    rss_before = _rss_mib()
+    start = time.perf_counter()
+    for i in range(stored):
+        article = _article(rng, words, weights)
+        index.add(f"https://stored.example/{i}", minhash_signature(*article))
+        if i < queries:
+            originals.append((f"https://stored.example/{i}", article))
+        if i and i % 100_000 == 0:
+            print(f"  indexed {i:,} signatures...")
+    build_seconds = time.perf_counter() - start
+    print(
+        f"Indexed {stored:,} signatures in {build_seconds:.0f}s "
+        f"({build_seconds / stored * 1e6:.0f} us each incl. MinHash), ~{_rss_mib() - rss_before:.0f} MiB"
+    )
+
+    copies = [(url, minhash_signature(*_wire_copy(rng, words, weights, article, edit_fraction))) for url, article in originals]
+    fresh = [minhash_signature(*_article(rng, words, weights)) for _ in range(queries)]
+
+    timings, found, false_matches = [], 0, 0
+    for url, signature in copies:
+        start = time.perf_counter()
+        story = index.find(signature)
+        timings.append(time.perf_counter() - start)
+        found += story == url
+    for signature in fresh:
+        start = time.perf_counter()
+        story = index.find(signature)
+        timings.append(time.perf_counter() - start)
+        false_matches += story is not None
+
+    timings.sort()
+    print(
+        f"Lookup over {stored:,} stored: mean {statistics.mean(timings) * 1e6:.1f} us, "
+        f"p50 {timings[len(timings) // 2] * 1e6:.1f} us, p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us; "
+        f"wire copies ({edit_fraction:.0%} of words changed) found {found / queries:.1%}, unrelated articles matched {false_matches / queries:.2%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stored", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--edit-fraction", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.stored, args.queries, args.edit_fraction, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Search latency under parallel load: the synchronous meilisearch client called
+from async code (the old search path, which blocks the event loop for every
+round trip) against the async client on the shared httpx pool.
+
+Runs offline against a local stub MeiliSearch that answers after a fixed delay:
+
+    python -m benchmarks.bench_search_concurrency --concurrency 1 8 32 64
+
+Each round fires `concurrency` searches at once and measures every search from
+the moment it was issued, the way concurrent API requests would see it.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import socket
+import statistics
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import meilisearch
+
+from app.adapters import http_client
+from app.adapters.meili_client import AsyncMeiliClient
+
+HITS = json.dumps({"hits": [{"id": str(i), "title": f"Story {i}"} for i in range(20)]}).encode()
+
+
+class StubSearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    delay = 0.005
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.delay)  # simulated search time
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(HITS)))
+        self.end_headers()
+        self.wfile.write(HITS)
+
+    def log_message(self, *args):
+        pass
+
+
+async def _round(search, concurrency):
+    issued = time.perf_counter()
+
+    async def one(i):
+        await search(f"query {i}")
+        return time.perf_counter() - issued
+
+    return await asyncio.gather(*(one(i) for i in range(concurrency)))
+
+
+async def measure(search, concurrency, rounds):
+    await _round(search, concurrency)  # warm the connections
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        latencies.extend(await _round(search, concurrency))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.median(latencies) * 1e3, p99 * 1e3, len(latencies) / elapsed
+
+
+def serve(port_queue, delay):
+    StubSearchHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSearchHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # The stub runs in its own process so its threads don't compete for this one's GIL
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(ports, args.delay_ms / 1000), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{ports.get(timeout=10)}"
+
+    blocking_index = meilisearch.Client(url, "key").index("articles")
+    async_client = AsyncMeiliClient(url, "key")
+
+    async def blocking_search(q):
+        return blocking_index.search(q, {"limit": 20})
+
+    async def async_search(q):
+        return await async_client.search("articles", q, limit=20)
+
+    async def run():
+        print(f"stub search time {args.delay_ms:.0f} ms, {args.rounds} rounds per level")
+        for concurrency in args.concurrency:
+            for label, search in (("sync client", blocking_search), ("async client", async_search)):
+                p50, p99, rate = await measure(search, concurrency, args.rounds)
+                print(f"  {concurrency:3d} parallel, {label:12s}: p50 {p50:7.1f} ms, p99 {p99:7.1f} ms, {rate:6.0f} searches/s")
+        await http_client.close_http_client()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Memory, false-positive rate and throughput of the known-URL Bloom filter.
+
+    python -m benchmarks.bench_url_filter --sizes 1000000 10000000
+"""
+import argparse
+import sys
+import time
+
+from app.services.url_filter import BloomFilter, URL_FILTER_ERROR_RATE
+
+
+def _urls(prefix, n):
+    return (f"https://www.example-news.com/{prefix}/2024/05/01/story-{i}?ref=rss" for i in range(n))
+
+
+def _set_bytes(n, sample=100_000):
+    """Estimate what an exact Python set of n URL strings would take."""
+    sample = min(sample, n)
+    urls = set(_urls("seen", sample))
+    per_item = (sys.getsizeof(urls) + sum(sys.getsizeof(u) for u in urls)) / sample
+    return per_item * n
+
+
+def run(n, error_rate, probes):
+    bloom = BloomFilter(capacity=n, error_rate=error_rate)
+    start = time.perf_counter()
+    bloom.update(_urls("seen", n))
+    add_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    false_positives = sum(bloom.might_contain(u) for u in _urls("unseen", probes))
+    lookup_seconds = time.perf_counter() - start
+
+    print(
+        f"{n:>11,} URLs: filter {bloom.size_bytes / 2**20:6.1f} MiB "
+        f"(exact set ~{_set_bytes(n) / 2**20:7.0f} MiB), k={bloom.num_hashes}, "
+        f"false positives {false_positives / probes:.3%} (target {error_rate:.1%}), "
+        f"add {n / add_seconds / 1000:.0f}k/s, lookup {probes / lookup_seconds / 1000:.0f}k/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--error-rate", type=float, default=URL_FILTER_ERROR_RATE)
+    parser.add_argument("--probes", type=int, default=200_000)
+    args = parser.parse_args()
+    for n in args.sizes:
+        run(n, args.error_rate, args.probes)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import os
 import asyncio
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
 # Set an environment variable to signal that we are in test mode
@@ -14,8 +15,9 @@ from app.database import Base, get_db
 # Use an in-memory SQLite database for testing to ensure no file-based issues
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
+# One shared connection, so work handed to executor threads sees the same database
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -5,6 +5,22 @@ from datetime import datetime
 
 from app.adapters.newsapi_adapter import fetch_category, fetch_newsapi_articles
 from app.adapters.rss_adapter import fetch_rss_articles
+from app.adapters.feed_validators import validator_store
+from app.adapters import feed_parser
+
+@pytest.fixture(autouse=True)
+def reset_validator_store():
+    """Feed validators are process-wide; start every test with an empty cache."""
+    validator_store.clear()
+    yield
+    validator_store.clear()
+
+@pytest.fixture(autouse=True)
+def thread_parser_pool(monkeypatch):
+    """Parse in threads so patched feedparser functions are visible to the parser workers."""
+    monkeypatch.setattr(feed_parser, "FEED_PARSER_EXECUTOR", "thread")
+    yield
+    feed_parser.shutdown_parser_executor()
 
 @pytest.mark.asyncio
 async def test_fetch_category_success():
@@ -165,6 +181,81 @@ async def test_fetch_rss_articles_parse_error():
         mock_response.text = "mock RSS content"
         mock_get.return_value = mock_response
         
+        results = {}
         with patch('feedparser.parse', side_effect=Exception("Parse error")):
-            with pytest.raises(Exception, match="Parse error"):
-                await fetch_rss_articles(limit=10) 
\ No newline at end of file
+            articles = await fetch_rss_articles(
+                limit=10, on_feed_result=lambda url, result: results.__setitem__(url, result["status"])
+            )
+
+        # Each feed that failed to parse is reported and skipped, and keeps no new validators
+        assert articles == []
+        assert results and set(results.values()) == {"error"}
+        assert all(validator_store.get(url) is None for url in results)
+
+@pytest.mark.asyncio
+async def test_fetch_rss_articles_skips_parse_on_304():
+    """A 304 Not Modified response should skip feedparser entirely."""
+    with patch('httpx.AsyncClient.get') as mock_get:
+        mock_response = Mock()
+        mock_response.status_code = 304
+        mock_get.return_value = mock_response
+
+        with patch('feedparser.parse') as mock_parse:
+            articles = await fetch_rss_articles(limit=10)
+
+    assert articles == []
+    mock_parse.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_fetch_rss_articles_skips_parse_on_same_body():
+    """A second poll returning an identical body should not be reparsed."""
+    mock_feed = Mock()
+    mock_feed.entries = []
+    mock_feed.feed = {"title": "RSS Source"}
+
+    with patch('httpx.AsyncClient.get') as mock_get:
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.text = "<rss>same</rss>"
+        mock_response.headers = {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+        mock_get.return_value = mock_response
+
+        with patch('feedparser.parse', return_value=mock_feed) as mock_parse:
+            await fetch_rss_articles(limit=10)
+            first_pass_calls = mock_parse.call_count
+            await fetch_rss_articles(limit=10)
+
+    assert first_pass_calls > 0
+    assert mock_parse.call_count == first_pass_calls
+
+@pytest.mark.asyncio
+async def test_fetch_rss_articles_sends_conditional_headers():
+    """Stored validators should be sent back as If-None-Match / If-Modified-Since."""
+    from app.adapters.rss_adapter import RSS_FEEDS
+    feed_url = RSS_FEEDS[0]
+    validator_store.update(feed_url, etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+    with patch('httpx.AsyncClient.get') as mock_get:
+        mock_response = Mock()
+        mock_response.status_code = 304
+        mock_get.return_value = mock_response
+        await fetch_rss_articles(limit=10)
+
+    sent = [c for c in mock_get.call_args_list if c.args[0] == feed_url][0]
+    assert sent.kwargs["headers"] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+
+def test_feed_validator_store_persists(db_session):
+    """Validators saved to the database should be restored by a fresh store."""
+    from app.adapters.feed_validators import FeedValidatorStore
+    store = FeedValidatorStore()
+    store.update("http://feed.test/rss", etag='"e1"', body_hash="h1")
+    store.save(db_session)
+
+    restored = FeedValidatorStore()
+    restored.load(db_session)
+    assert restored.get("http://feed.test/rss")["etag"] == '"e1"'
+    assert restored.get("http://feed.test/rss")["body_hash"] == "h1"
+    assert restored.conditional_headers("http://feed.test/rss") == {"If-None-Match": '"e1"'}
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.bulk_indexer import BulkIndexer, BulkIndexError, ndjson_batches
+
+
+class FakeMeili:
+    """Client stub whose tasks finish on their second poll, failing the first `failures` of them."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.uploads = []
+        self.polls = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def add_documents_ndjson(self, index, payload, primary_key="id"):
+        self.uploads.append(payload)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return {"taskUid": len(self.uploads)}
+
+    async def get_task(self, uid):
+        self.polls[uid] = self.polls.get(uid, 0) + 1
+        if self.polls[uid] < 2:
+            return {"uid": uid, "status": "processing"}
+        self.in_flight -= 1
+        if uid <= self.failures:
+            return {"uid": uid, "status": "failed", "error": {"code": "internal"}}
+        return {"uid": uid, "status": "succeeded"}
+
+
+def _documents(count):
+    return ({"id": str(i), "title": f"Article {i}"} for i in range(count))
+
+
+def _indexer(client, **kwargs):
+    return BulkIndexer(client, "articles", poll_interval=0, retry_backoff=0, **kwargs)
+
+
+def test_batches_respect_the_byte_limit():
+    batches = list(ndjson_batches(_documents(100), max_bytes=300))
+    assert sum(count for _, count in batches) == 100
+    assert all(len(payload) <= 300 for payload, _ in batches)
+    lines = [json.loads(line) for payload, _ in batches for line in payload.splitlines()]
+    assert [doc["id"] for doc in lines] == [str(i) for i in range(100)]
+    # A document larger than the limit still goes out, on its own
+    assert list(ndjson_batches([{"id": "x" * 50}], max_bytes=10))[0][1] == 1
+
+
+def test_run_streams_all_documents_with_bounded_in_flight():
+    client = FakeMeili()
+    result = asyncio.run(_indexer(client, batch_bytes=200, max_in_flight=2).run(_documents(50)))
+    assert result.documents == 50
+    assert result.batches == len(client.uploads) > 2
+    assert client.peak_in_flight <= 2
+    assert result.retries == 0
+    assert result.as_dict()["peak_rss_mb"] > 0
+
+
+def test_failed_tasks_are_retried():
+    client = FakeMeili(failures=1)
+    result = asyncio.run(_indexer(client, batch_bytes=10 ** 6).run(_documents(10)))
+    assert result.retries == 1
+    assert len(client.uploads) == 2
+    assert client.uploads[0] == client.uploads[1]
+
+
+def test_gives_up_after_max_retries():
+    client = FakeMeili(failures=10)
+    with pytest.raises(BulkIndexError, match="after 3 attempts"):
+        asyncio.run(_indexer(client, batch_bytes=10 ** 6, max_retries=2).run(_documents(10)))
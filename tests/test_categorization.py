@@ -1,4 +1,5 @@
 from app.services.categorization import categorize_article
+from tests.categorization_reference import legacy_categorize_article, sample_articles
 
 def test_categorize_technology():
     assert categorize_article("Apple launches new AI chip", "") == "Technology"
@@ -35,4 +36,137 @@ def test_categorize_entertainment():
 
 def test_categorize_general():
     assert categorize_article("Random headline with no keywords", "") == "General"
-    assert categorize_article("A day in the life", "") == "General" 
\ No newline at end of file
+    assert categorize_article("A day in the life", "") == "General"
+
+
+def _stress_corpus():
+    import random
+    from app.services.categorization import CATEGORY_KEYWORDS
+
+    # Recorded headlines plus synthetic text that stresses the matching rules: keywords
+    # glued to punctuation or inside longer words, multi-word phrases, text edges and ties
+    rng = random.Random(11)
+    keywords = sorted({kw for kws in CATEGORY_KEYWORDS.values() for kw in kws})
+    fillers = ["the", "said", "under", "a", "of", "x-ray", "co2.", "(ai)", "u.s.", "", " ", "\n"]
+    corpus = sample_articles(300)
+    for _ in range(2000):
+        pieces = []
+        for _ in range(rng.randint(1, 12)):
+            piece = rng.choice(keywords) if rng.random() < 0.5 else rng.choice(fillers)
+            if rng.random() < 0.2:
+                piece = piece[rng.randint(0, len(piece)):]  # keyword fragments
+            pieces.append(piece + rng.choice(["", " ", ",", ".", "s", "-"]))
+        text = rng.choice([" ", ""]).join(pieces)
+        corpus.append((text[:40].upper(), text[40:]))
+    return corpus
+
+
+def test_compiled_categorizer_matches_keyword_scan():
+    for title, summary in _stress_corpus():
+        assert categorize_article(title, summary) == legacy_categorize_article(title, summary), (title, summary)
+
+
+def test_batch_categorizer_matches_scalar(monkeypatch):
+    from app.services import categorization
+    from app.services.categorization import CategoryCache, categorize_articles
+
+    # Without the result cache, so both sides really score every text
+    monkeypatch.setattr(categorization, "category_cache", CategoryCache(capacity=0))
+    corpus = _stress_corpus()
+    expected = [categorize_article(title, summary) for title, summary in corpus]
+    assert categorize_articles(corpus) == expected
+    # Second pass is served from the token cache
+    assert categorize_articles(corpus) == expected
+    assert categorize_articles([]) == []
+
+
+def test_batch_scores_match_scalar(monkeypatch):
+    from app.services import categorization
+    from app.services.categorization import CategoryCache, score_article, score_articles
+
+    monkeypatch.setattr(categorization, "category_cache", CategoryCache(capacity=0))
+    corpus = _stress_corpus()[:500]
+    assert score_articles(corpus) == [score_article(title, summary) for title, summary in corpus]
+    category, scores = score_article("Storm warning", "heavy rain and snow in the forecast")
+    assert category == "Weather"
+    assert scores["Weather"] > 0 and all(score > 0 for score in scores.values())
+
+
+def test_batch_categorizer_with_small_token_cache():
+    from app.services.categorization import CATEGORY_KEYWORDS, BatchCategorizer
+
+    corpus = _stress_corpus()
+    categorizer = BatchCategorizer(CATEGORY_KEYWORDS, token_cache_size=50)
+    texts = [(title + " " + summary).lower() for title, summary in corpus]
+    assert categorizer.categorize(texts) == [categorize_article(title, summary) for title, summary in corpus]
+    assert len(categorizer._token_hits) <= 50
+
+
+def test_category_cache_lru_and_version():
+    from app.services.categorization import CategoryCache
+
+    cache = CategoryCache(capacity=2)
+    a, b, c = (CategoryCache.key(text) for text in ("a", "b", "c"))
+    cache.put(a, "Sports", "v1")
+    cache.put(b, "Business", "v1")
+    assert cache.get(a, "v1") == "Sports"  # a is now most recent
+    cache.put(c, "Weather", "v1")
+    assert cache.get(b, "v1") is None
+    assert cache.get(a, "v1") == "Sports"
+    assert cache.evictions == 1
+
+    # A new keyword table version drops everything cached under the old one
+    assert cache.get(a, "v2") is None
+    assert len(cache) == 0
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["invalidations"] == 1 and stats["version"] == "v2"
+
+
+def test_categorization_reuses_cached_results(monkeypatch):
+    from app.services import categorization
+    from app.services.categorization import CATEGORY_KEYWORDS, CategoryCache, categorize_articles
+
+    cache = CategoryCache(capacity=100)
+    monkeypatch.setattr(categorization, "category_cache", cache)
+    wire = ("Senate passes the budget bill", "Lawmakers vote on new legislation")
+    assert categorize_article(*wire) == "Politics"
+    assert categorize_articles([wire, wire, ("Storm warning", "heavy rain forecast")]) == ["Politics", "Politics", "Weather"]
+    assert cache.hits == 2 and cache.misses == 2
+    assert len(cache) == 2
+
+    # Editing the keyword table invalidates what was cached under the old one
+    try:
+        categorization.load_category_keywords({"Budget": ["budget"], **CATEGORY_KEYWORDS})
+        assert categorize_article(*wire) == "Politics"  # 2 points for "budget", more for Politics
+        categorization.load_category_keywords({"Budget": ["budget"] * 20, **CATEGORY_KEYWORDS})
+        assert categorize_article(*wire) == "Budget"
+        assert cache.invalidations == 2
+    finally:
+        categorization.load_category_keywords(CATEGORY_KEYWORDS)
+
+
+
+def test_category_cache_is_shared_safely_between_threads():
+    import threading
+    from collections import OrderedDict
+    from app.services.categorization import CategoryCache
+
+    cache = CategoryCache(capacity=1)
+    cache.put(b"a", "Sports", "v1")
+
+    class Interleaved(OrderedDict):
+        def get(self, key, default=None):
+            # Another thread stores a new key (evicting this one) between the lookup and move_to_end
+            result = super().get(key, default)
+            writer = threading.Thread(target=cache.put, args=(b"b", "Weather", "v1"))
+            writer.start()
+            writer.join(0.2)  # blocks on the cache lock, so the eviction waits for this get
+            self.writers.append(writer)
+            return result
+
+    cache._entries = Interleaved(cache._entries)
+    cache._entries.writers = []
+    assert cache.get(b"a", "v1") == "Sports"
+    cache._entries.writers[0].join()
+    assert list(cache._entries) == [b"b"]
@@ -52,4 +52,104 @@ def test_duplicate_user_creation(db_session: Session):
     with pytest.raises(IntegrityError):
         crud.create_user(db=db_session, user=user_in2)
         # We need to rollback the session after an integrity error
-        db_session.rollback() 
\ No newline at end of file
+        db_session.rollback()
+
+
+def _article_rows(*urls):
+    return [{"url": url, "title": f"Title {url}", "source": "Source", "content": "", "category": "General"} for url in urls]
+
+
+def test_insert_new_articles_returns_only_inserted(db_session: Session):
+    """
+    Inserting overlapping batches should skip existing URLs instead of failing,
+    and return exactly the rows that were newly inserted.
+    """
+    first = crud.insert_new_articles(db_session, _article_rows("http://a", "http://b"))
+    second = crud.insert_new_articles(db_session, _article_rows("http://b", "http://c", "http://d"))
+
+    assert sorted(a.url for a in first) == ["http://a", "http://b"]
+    assert sorted(a.url for a in second) == ["http://c", "http://d"]
+    assert second[0].title.startswith("Title")
+
+
+def test_insert_new_articles_chunks(db_session: Session):
+    """Rows should be written in chunks of batch_size."""
+    urls = [f"http://chunk/{i}" for i in range(7)]
+    inserted = crud.insert_new_articles(db_session, _article_rows(*urls), batch_size=3)
+    assert len(inserted) == 7
+
+
+def test_insert_new_articles_are_readable_without_queries(db_session: Session):
+    """Reading the returned articles after the commit must not reload them one by one."""
+    from sqlalchemy import event
+
+    inserted = crud.insert_new_articles(db_session, _article_rows("http://a", "http://b", "http://c"))
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        validated = [schemas.Article.model_validate(article) for article in inserted]
+        leaders = [a for a in inserted if a.story_id in (None, a.canonical_url)]
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+    assert [a.title for a in validated] == ["Title http://a", "Title http://b", "Title http://c"]
+    assert len(leaders) == 3
+
+
+def test_insert_new_articles_empty(db_session: Session):
+    assert crud.insert_new_articles(db_session, []) == []
+
+
+def _articles_with_scores(db_session: Session):
+    rows = _article_rows("http://gadget-stocks", "http://match-report", "http://chip-maker")
+    rows[0]["category"] = "Business"
+    rows[1]["category"] = "Sports"
+    rows[2]["category"] = "Technology"
+    crud.insert_new_articles(db_session, rows, category_scores={
+        "http://gadget-stocks": {"Business": 6, "Technology": 4},
+        "http://match-report": {"Sports": 8},
+        "http://chip-maker": {"Technology": 3, "Business": 1},
+        "http://not-inserted": {"Sports": 2},
+    })
+
+
+def test_insert_new_articles_stores_category_scores(db_session: Session):
+    from app.database import ArticleCategory
+
+    _articles_with_scores(db_session)
+    stored = {(c.article_url, c.category, c.score) for c in db_session.query(ArticleCategory)}
+    assert len(stored) == 5
+    assert ("http://gadget-stocks", "Technology", 4) in stored
+
+    crud.replace_category_scores(db_session, {"http://gadget-stocks": {"Business": 2, "Weather": 0}})
+    db_session.commit()
+    assert {(c.category, c.score) for c in db_session.query(ArticleCategory).filter_by(article_url="http://gadget-stocks")} == {("Business", 2)}
+
+
+def test_get_articles_by_category_with_secondary_scores(db_session: Session):
+    _articles_with_scores(db_session)
+    # Primary category only by default
+    assert [a.url for a in crud.get_articles_by_category(db_session, "Technology")] == ["http://chip-maker"]
+    # Any article scoring high enough, strongest first
+    assert [a.url for a in crud.get_articles_by_category(db_session, "Technology", min_score=2)] == ["http://gadget-stocks", "http://chip-maker"]
+    assert [a.url for a in crud.get_articles_by_category(db_session, "Business", min_score=2)] == ["http://gadget-stocks"]
+
+
+def test_personalized_articles_match_followed_categories_by_score(db_session: Session):
+    user = crud.create_user(db_session, schemas.UserCreate(username="reader", email="reader@example.com", password="password"))
+    _articles_with_scores(db_session)
+
+    # Stored before per-category scores existed: matched on its primary category
+    crud.insert_new_articles(db_session, [{"url": "http://unscored", "title": "t", "source": "S", "category": "Technology"}])
+    scores = {"categories": ["Business", "Sports", "Technology"], "min_category_score": 2}
+
+    crud.follow_topic(db_session, user.id, "technology")
+    assert sorted(a.url for a in crud.get_personalized_articles(db_session, user.id, **scores)) == ["http://chip-maker", "http://gadget-stocks", "http://unscored"]
+    assert sorted(a.url for a in crud.get_personalized_articles(db_session, user.id)) == ["http://chip-maker", "http://unscored"]
+
+    crud.follow_outlet(db_session, user.id, "source")
+    assert len(crud.get_personalized_articles(db_session, user.id, **scores)) == 4
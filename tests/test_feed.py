@@ -5,9 +5,9 @@ from httpx import AsyncClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.database import Base, get_db, Article
+from app.database import Base, get_db, Article, ArticleCategory
 from app import crud
-from app.services.feed_service import get_latest_articles
+from app.services.feed_service import fetch_and_store_latest_articles, get_latest_articles
 
 # Use an in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -28,39 +28,128 @@ def test_db():
 def override_get_db(test_db):
     def get_test_db():
         yield test_db
+    previous = dict(app.dependency_overrides)
     app.dependency_overrides[get_db] = get_test_db
     yield
+    # Restore conftest's override rather than falling back to the real database
     app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+
+RSS_TEXT = (
+    '<?xml version="1.0"?><rss version="2.0"><channel><title>RSS Feed</title>'
+    '<item><title>RSS Article</title><link>http://test.com/rss</link>'
+    '<pubDate>Sun, 01 Jan 2023 13:00:00 GMT</pubDate><description>Content</description></item>'
+    '</channel></rss>'
+)
+
+@pytest.fixture
+def inline_parser(monkeypatch):
+    from app.adapters import feed_parser
+    monkeypatch.setattr(feed_parser, "FEED_PARSER_EXECUTOR", "inline")
 
 @pytest.mark.asyncio
-async def test_get_latest_articles_populates_db(mocker, db_session):
+async def test_get_latest_articles_populates_db(mocker, db_session, inline_parser):
     """
-    Test that the get_latest_articles service function correctly fetches
+    Test that fetch_and_store_latest_articles correctly fetches
     articles from adapters and saves them to the database.
     """
     # 1. Mock the external API calls
     mock_newsapi_articles = [
-        {"title": "NewsAPI Article", "url": "http://test.com/newsapi", "source": "NewsAPI", "published_at": "2023-01-01T12:00:00Z", "content": "Content"}
-    ]
-    mock_rss_articles = [
-        {"title": "RSS Article", "url": "http://test.com/rss", "source": "RSS Feed", "published_at": "2023-01-01T13:00:00Z", "content": "Content"}
+        {"title": "NewsAPI Article", "url": "http://test.com/newsapi", "source": "NewsAPI", "published_at": "2023-01-01T12:00:00Z", "summary": "Content"}
     ]
 
-    mocker.patch('app.services.feed_service.fetch_newsapi_articles', return_value=mock_newsapi_articles)
-    mocker.patch('app.services.feed_service.fetch_rss_articles', return_value=mock_rss_articles)
+    mocker.patch('app.services.ingest_pipeline.fetch_newsapi_articles', return_value=mock_newsapi_articles)
+    mocker.patch('app.services.ingest_pipeline.fetch_rss_feed_text', return_value=RSS_TEXT)
     
     # 2. Mock the categorization service where it is imported and used
-    mocker.patch('app.services.feed_service.categorize_article', return_value="Technology")
+    mocker.patch('app.services.ingest_pipeline.score_article', return_value=("Technology", {"Technology": 4, "Business": 1}))
 
     # 3. Call the service function directly
-    new_articles = await get_latest_articles(db=db_session, limit=10)
+    result = await fetch_and_store_latest_articles(db=db_session, limit=10, rss_feeds=["http://test.com/feed.xml"])
+    new_articles = get_latest_articles(db=db_session, limit=10)
 
     # 4. Assert the results
     assert len(new_articles) == 2
+    assert sorted(a.url for a in result.inserted) == ["http://test.com/newsapi", "http://test.com/rss"]
+    assert result.adapters["rss"].inserted == 1
+    assert result.adapters["newsapi"].inserted == 1
     
     # Verify articles were actually written to the test DB
-    articles_in_db = db_session.query(Article).all()
+    articles_in_db = db_session.query(Article).order_by(Article.published_at.desc()).all()
     assert len(articles_in_db) == 2
     assert articles_in_db[0].title == "RSS Article" # Sorted by date
     assert articles_in_db[1].title == "NewsAPI Article"
     assert articles_in_db[0].category == "Technology"
+    # Per-category scores are stored with each inserted article
+    scores = db_session.query(ArticleCategory).filter(ArticleCategory.article_url == "http://test.com/rss").all()
+    assert {(s.category, s.score) for s in scores} == {("Technology", 4), ("Business", 1)}
+
+@pytest.mark.asyncio
+async def test_new_articles_are_streamed_per_batch(mocker, db_session, inline_parser):
+    """Each committed batch is handed to on_new_articles; existing URLs are not stored twice."""
+    mocker.patch('app.services.ingest_pipeline.fetch_newsapi_articles', return_value=[])
+    mocker.patch('app.services.ingest_pipeline.fetch_rss_feed_text', return_value=RSS_TEXT)
+    mocker.patch('app.services.ingest_pipeline.INGEST_PERSIST_BATCH_SIZE', 1)
+    batches = []
+
+    async def on_new_articles(articles):
+        batches.append([a.url for a in articles])
+
+    feeds = ["http://a.test/feed.xml", "http://b.test/feed.xml"]
+    first = await fetch_and_store_latest_articles(db=db_session, limit=10, rss_feeds=feeds, on_new_articles=on_new_articles)
+    second = await fetch_and_store_latest_articles(db=db_session, limit=10, rss_feeds=feeds, on_new_articles=on_new_articles)
+
+    assert batches == [["http://test.com/rss"]]
+    assert [a.url for a in first.inserted] == ["http://test.com/rss"]
+    assert first.duplicates == 1  # the same entry from the second feed
+    assert second.inserted == []
+    assert second.duplicates == 2
+    assert second.adapters["rss"].fetched == 2
+    assert db_session.query(Article).count() == 1
+
+@pytest.mark.asyncio
+async def test_failed_persist_keeps_feed_validators_unsaved(mocker, db_session, inline_parser):
+    """A feed whose articles were not stored must be downloaded and parsed again next cycle."""
+    from app.adapters.feed_validators import validator_store
+    from app.database import FeedValidator
+    feed = "http://a.test/feed.xml"
+
+    async def fetch(url):
+        validator_store.update(url, etag='"v2"', body_hash="h2")
+        return RSS_TEXT
+
+    insert_new_articles = crud.insert_new_articles
+    validator_store.clear()
+    mocker.patch('app.services.ingest_pipeline.fetch_newsapi_articles', return_value=[])
+    mocker.patch('app.services.ingest_pipeline.fetch_rss_feed_text', side_effect=fetch)
+    insert = mocker.patch('app.services.ingest_pipeline.crud.insert_new_articles', side_effect=RuntimeError("db down"))
+    try:
+        failed = await fetch_and_store_latest_articles(db=db_session, limit=10, rss_feeds=[feed])
+        assert failed.errors == 1
+        assert failed.failed_feeds == [feed]
+        assert validator_store.get(feed) is None
+        assert db_session.query(FeedValidator).count() == 0
+
+        insert.side_effect = insert_new_articles
+        stored = await fetch_and_store_latest_articles(db=db_session, limit=10, rss_feeds=[feed])
+        assert [a.url for a in stored.inserted] == ["http://test.com/rss"]
+        assert stored.failed_feeds == []
+        assert db_session.query(FeedValidator).one().etag == '"v2"'
+    finally:
+        validator_store.clear()
+
+@pytest.mark.asyncio
+async def test_feed_secondary_categories_use_the_categorizer_threshold(test_db, mocker):
+    crud.insert_new_articles(test_db, [
+        {"url": "http://gadget-stocks", "title": "t", "source": "S", "category": "Business"},
+        {"url": "http://chip-maker", "title": "t", "source": "S", "category": "Technology"},
+    ], category_scores={"http://gadget-stocks": {"Business": 6, "Technology": 25}, "http://chip-maker": {"Technology": 3}})
+    from httpx import ASGITransport
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        primary = await client.get("/v1/feed", params={"category": "Technology"})
+        keywords = await client.get("/v1/feed", params={"category": "Technology", "secondary": True})
+        mocker.patch("app.routes.feed.min_category_score", return_value=20)  # a model's threshold, in percent
+        model = await client.get("/v1/feed", params={"category": "Technology", "secondary": True})
+    assert [a["url"] for a in primary.json()] == ["http://chip-maker"]
+    assert [a["url"] for a in keywords.json()] == ["http://gadget-stocks", "http://chip-maker"]
+    assert [a["url"] for a in model.json()] == ["http://gadget-stocks"]
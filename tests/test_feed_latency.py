@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import pytest
+import httpx
+from unittest.mock import patch, AsyncMock
+
+from app.main import app
+from app.adapters import feed_parser
+from app.adapters.rss_adapter import fetch_rss_articles
+
+# One large feed body, similar in size to DW / Al Jazeera / Guardian World
+LARGE_FEED = (
+    '<?xml version="1.0"?><rss version="2.0"><channel><title>Large Feed</title>'
+    + "".join(
+        f"<item><title>Story {i}</title><link>http://large.test/{i}</link>"
+        f"<pubDate>Mon, 01 Jan 2024 12:{i % 60:02d}:00 GMT</pubDate>"
+        f"<description>{'Lorem ipsum dolor sit amet. ' * 40}</description></item>"
+        for i in range(1500)
+    )
+    + "</channel></rss>"
+)
+FEEDS = [f"http://large{i}.test/rss" for i in range(4)]
+
+@pytest.mark.asyncio
+async def test_feed_is_served_while_ingest_parses(db_session, monkeypatch):
+    """
+    /v1/feed must be answered while an ingest cycle is parsing feeds. Each parse waits
+    until a request has been served, which can only happen when parsing runs off the
+    event loop; parsing inline would block the loop and the wait would time out.
+    """
+    served = threading.Event()
+    parsing = threading.Event()
+    parse_feed = feed_parser.parse_feed
+
+    def parse_once_a_request_is_served(text, limit):
+        parsing.set()
+        if not served.wait(5):
+            raise AssertionError("No request was served while the feed was being parsed")
+        return parse_feed(text, limit)
+
+    async def request_during_parse(client):
+        while not parsing.is_set():
+            await asyncio.sleep(0.001)
+        response = await client.get("/v1/feed")
+        assert response.status_code == 200
+        served.set()
+
+    monkeypatch.setattr(feed_parser, "parse_feed", parse_once_a_request_is_served)
+    # Threads see the patched parser; the process pool runs the same code path
+    monkeypatch.setattr(feed_parser, "FEED_PARSER_EXECUTOR", "thread")
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            with patch('app.adapters.rss_adapter._fetch_rss', new_callable=AsyncMock, return_value=LARGE_FEED):
+                articles, _ = await asyncio.gather(
+                    fetch_rss_articles(limit=1500, feed_urls=FEEDS), request_during_parse(client)
+                )
+    finally:
+        feed_parser.shutdown_parser_executor()
+    assert len(articles) == len(FEEDS) * 1500
@@ -0,0 +1,106 @@
+import pytest
+from datetime import datetime, timedelta
+
+from app.services import feed_scheduler as scheduler_module
+from app.services.feed_scheduler import FeedScheduler, estimate_publish_rate
+from app.adapters.feed_parser import parse_feed_hints
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def scheduler(clock):
+    return FeedScheduler(clock=clock)
+
+def _published_every(minutes, count):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    return [start + timedelta(minutes=minutes * i) for i in range(count)]
+
+def test_register_spreads_first_due_times(scheduler, clock):
+    """Newly registered feeds should not all come due at the same moment."""
+    feeds = [f"http://feed{i}.test/rss" for i in range(10)]
+    scheduler.register(feeds)
+    due_times = sorted(scheduler.feeds[f]["next_due"] for f in feeds)
+    assert len(set(due_times)) == 10
+    assert due_times[0] > clock.now
+    assert due_times[-1] <= clock.now + scheduler_module.FEED_DEFAULT_INTERVAL
+
+def test_claim_due_only_returns_due_feeds(scheduler, clock):
+    scheduler.register(["http://a.test/rss", "http://b.test/rss"])
+    scheduler.feeds["http://a.test/rss"]["next_due"] = clock.now - 1
+    scheduler.feeds["http://b.test/rss"]["next_due"] = clock.now + 100
+    assert scheduler.claim_due() == ["http://a.test/rss"]
+    # Claimed feeds are pushed out so they are not returned twice
+    assert scheduler.claim_due() == []
+
+def test_fast_feed_gets_short_interval(scheduler):
+    scheduler.record_result("fast", {"status": "ok", "published": _published_every(1, 20)})
+    scheduler.record_result("slow", {"status": "ok", "published": _published_every(180, 5)})
+    assert scheduler.feeds["fast"]["interval"] == scheduler_module.FEED_MIN_INTERVAL
+    assert scheduler.feeds["slow"]["interval"] == scheduler_module.FEED_MAX_INTERVAL
+
+def test_ttl_hint_is_a_floor(scheduler):
+    scheduler.record_result("feed", {"status": "ok", "published": _published_every(1, 20), "ttl_seconds": 900})
+    assert scheduler.feeds["feed"]["interval"] == 900
+
+def test_errors_back_off_exponentially(scheduler, clock):
+    scheduler.record_result("feed", {"status": "ok"})
+    base = scheduler.feeds["feed"]["interval"]
+    scheduler.record_result("feed", {"status": "error"})
+    first_wait = scheduler.feeds["feed"]["next_due"] - clock.now
+    scheduler.record_result("feed", {"status": "error"})
+    second_wait = scheduler.feeds["feed"]["next_due"] - clock.now
+    assert scheduler.feeds["feed"]["consecutive_errors"] == 2
+    assert first_wait >= base * 2 * (1 - scheduler_module.FEED_JITTER)
+    assert second_wait >= base * 4 * (1 - scheduler_module.FEED_JITTER)
+    scheduler.record_result("feed", {"status": "ok"})
+    assert scheduler.feeds["feed"]["consecutive_errors"] == 0
+
+def test_unchanged_polls_stretch_interval(scheduler):
+    scheduler.record_result("feed", {"status": "ok"})
+    before = scheduler.feeds["feed"]["interval"]
+    scheduler.record_result("feed", {"status": "unchanged"})
+    assert scheduler.feeds["feed"]["interval"] > before
+
+def test_fixed_feed_keeps_its_interval(scheduler):
+    scheduler.register(["newsapi"], fixed_interval=300)
+    scheduler.record_result("newsapi", {"status": "ok", "published": _published_every(1, 20)})
+    assert scheduler.feeds["newsapi"]["interval"] == 300
+
+def test_snapshot_classifies_feeds(scheduler):
+    scheduler.record_result("fast", {"status": "ok", "published": _published_every(1, 20)})
+    scheduler.record_result("slow", {"status": "ok", "published": _published_every(180, 5)})
+    scheduler.record_result("broken", {"status": "error"})
+    activity = {row["feed"]: row["activity"] for row in scheduler.snapshot()}
+    assert activity == {"fast": "hot", "slow": "idle", "broken": "backoff"}
+
+def test_estimate_publish_rate():
+    assert estimate_publish_rate([]) is None
+    assert estimate_publish_rate(_published_every(10, 1)) is None
+    assert estimate_publish_rate(_published_every(10, 7)) == pytest.approx(1 / 600)
+
+def test_parse_feed_hints():
+    assert parse_feed_hints({"ttl": "15"}) == {"ttl_seconds": 900, "update_period_seconds": None}
+    hints = parse_feed_hints({"sy_updateperiod": "hourly", "sy_updatefrequency": "4"})
+    assert hints["update_period_seconds"] == 900
+    assert parse_feed_hints({"ttl": "soon"}) == {"ttl_seconds": None, "update_period_seconds": None}
+
+@pytest.mark.asyncio
+async def test_feed_schedule_endpoint(scheduler, monkeypatch):
+    from app import main
+    monkeypatch.setattr(main, "feed_scheduler", scheduler)
+    scheduler.record_result("fast", {"status": "ok", "published": _published_every(1, 20)})
+    scheduler.record_result("broken", {"status": "error"})
+
+    response = await main.get_feed_schedule()
+
+    assert {feed["feed"] for feed in response["feeds"]} == {"fast", "broken"}
+    assert response["summary"] == {"hot": 1, "backoff": 1}
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.adapters import http_client
+
+@pytest.mark.asyncio
+async def test_get_http_client_is_reused():
+    """The same client should be returned for every call within a loop."""
+    client = http_client.get_http_client()
+    try:
+        assert http_client.get_http_client() is client
+        assert not client.is_closed
+    finally:
+        await http_client.close_http_client()
+
+@pytest.mark.asyncio
+async def test_close_http_client():
+    """Closing the shared client should release it so the next call builds a new one."""
+    client = http_client.get_http_client()
+    await http_client.close_http_client()
+    assert client.is_closed
+
+    new_client = http_client.get_http_client()
+    try:
+        assert new_client is not client
+    finally:
+        await http_client.close_http_client()
+
+@pytest.mark.asyncio
+async def test_close_http_client_without_client():
+    """Closing when no client was ever created should be a no-op."""
+    await http_client.close_http_client()
+    await http_client.close_http_client()
+
+@pytest.mark.asyncio
+async def test_requests_are_capped_per_host():
+    """Every request through the client, not just feed GETs, should wait for a slot on its host."""
+    active, peak = {}, {}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200)
+
+    async with http_client.HostLimitedClient(transport=httpx.MockTransport(handler), max_connections_per_host=2) as client:
+        await asyncio.gather(
+            *(client.get(f"https://example.com/{i}") for i in range(5)),
+            *(client.post("https://search.example.org/indexes/articles/search", json={}) for _ in range(5)),
+        )
+    assert peak == {"example.com": 2, "search.example.org": 2}
+
+def test_client_of_another_running_loop_is_closed():
+    """Switching loops should close the old client on the loop it belongs to when that loop still runs."""
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever)
+    thread.start()
+    try:
+        old = asyncio.run_coroutine_threadsafe(_get_client(), other).result()
+        new = asyncio.run(_get_client())
+        for _ in range(100):  # the close runs on the other loop's thread
+            if old.is_closed:
+                break
+            time.sleep(0.01)
+        assert old.is_closed and new is not old
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join()
+        other.close()
+        http_client._client = None
+
+async def _get_client():
+    return http_client.get_http_client()
+
+def test_build_client_falls_back_without_h2():
+    """Requesting HTTP/2 without the h2 package should not fail."""
+    with patch.object(http_client, "HTTP2_ENABLED", True):
+        with patch.object(http_client, "_http2_available", return_value=False):
+            client = http_client._build_client()
+    assert isinstance(client, http_client.httpx.AsyncClient)
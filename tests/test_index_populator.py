@@ -1,65 +1,269 @@
+import asyncio
+import datetime
+import json
+from functools import partial
+
 import pytest
-from unittest.mock import patch, Mock
-from app.services import index_populator
+from unittest.mock import patch, AsyncMock
+from app import crud
+from app.adapters.meili_client import MeiliError
+from app.database import Article, DeletedArticle, SearchSyncState, User, UserSavedArticle
+from app.services import index_populator, search_service
+from app.services.feed_service import purge_expired_articles
+from app.services.bulk_indexer import BulkIndexer, BulkIndexError
 
 @pytest.fixture
-def mock_db():
-    return Mock()
+def mock_client():
+    with patch("app.services.index_populator.client") as mock_client, \
+            patch.object(index_populator, "_settings_checked", False):
+        mock_client.add_documents_ndjson = AsyncMock(return_value={"taskUid": 1})
+        mock_client.delete_documents = AsyncMock(return_value={"taskUid": 2})
+        mock_client.get_task = AsyncMock(return_value={"uid": 1, "status": "succeeded"})
+        mock_client.get_settings = AsyncMock(return_value=dict(index_populator.SEARCH_INDEX_SETTINGS))
+        mock_client.update_settings = AsyncMock(return_value={"taskUid": 3})
+        yield mock_client
 
 @pytest.fixture
-def mock_articles():
-    return [
-        Mock(url="http://a.com", title="Test Article 1", content="Content 1", category="Tech", source="S1", published_at=None),
-        Mock(url="http://b.com", title="Test Article 2", content="Content 2", category="Business", source="S2", published_at=None),
-    ]
-
-def test_populate_meilisearch_index_success(mock_db, mock_articles):
-    with patch("app.services.index_populator.get_all_articles", return_value=mock_articles):
-        with patch("app.services.index_populator.client") as mock_client:
-            mock_index = Mock()
-            mock_client.index.return_value = mock_index
-            mock_index.delete_all_documents.return_value = None
-            mock_index.add_documents.return_value = {"updateId": 1}
-            # Should not raise
-            import asyncio
-            asyncio.run(index_populator.populate_meilisearch_index())
-            mock_client.index.assert_called_once_with("articles")
-            mock_index.delete_all_documents.assert_called_once()
-            mock_index.add_documents.assert_called_once()
-
-def test_populate_meilisearch_index_no_articles(mock_db):
-    with patch("app.services.index_populator.get_all_articles", return_value=[]):
-        with patch("app.services.index_populator.client") as mock_client:
-            mock_index = Mock()
-            mock_client.index.return_value = mock_index
-            # Should not raise
-            import asyncio
-            asyncio.run(index_populator.populate_meilisearch_index())
-            # Should not call delete_all_documents or add_documents
-            mock_index.delete_all_documents.assert_not_called()
-            mock_index.add_documents.assert_not_called()
-
-def test_populate_meilisearch_index_add_documents_error(mock_db, mock_articles):
-    with patch("app.services.index_populator.get_all_articles", return_value=mock_articles):
-        with patch("app.services.index_populator.client") as mock_client:
-            mock_index = Mock()
-            mock_client.index.return_value = mock_index
-            mock_index.delete_all_documents.return_value = None
-            mock_index.add_documents.side_effect = Exception("add error")
-            import asyncio
-            with pytest.raises(Exception, match="add error"):
-                asyncio.run(index_populator.populate_meilisearch_index())
-
-def test_populate_meilisearch_index_index_error(mock_db, mock_articles):
-    with patch("app.services.index_populator.get_all_articles", return_value=mock_articles):
-        with patch("app.services.index_populator.client") as mock_client:
-            mock_client.index.side_effect = Exception("index error")
-            import asyncio
-            with pytest.raises(Exception, match="index error"):
-                asyncio.run(index_populator.populate_meilisearch_index())
+def articles(db_session):
+    old = datetime.datetime(2020, 1, 1)
+    db_session.add_all([
+        Article(url="http://a.com", title="Test Article 1", content="Content 1", category="Tech", source="S1", published_at=old),
+        Article(url="http://b.com", title="Test Article 2", content="Content 2", category="Business", source="S2", published_at=old),
+        Article(url="http://c.com", title="Test Article 3", content="Content 3", category="Sports", source="S3",
+                published_at=datetime.datetime.utcnow()),
+    ])
+    db_session.commit()
+
+def _sync(db_session, **kwargs):
+    result = asyncio.run(index_populator.populate_meilisearch_index(db=db_session, **kwargs))
+    return {"upserted": result["upserted"], "deleted": result["deleted"]}
+
+def _sent(mock_client):
+    return [json.loads(line) for call in mock_client.add_documents_ndjson.call_args_list
+            for line in call.args[1].splitlines()]
+
+def _sent_urls(mock_client):
+    return [doc["url"] for doc in _sent(mock_client)]
+
+def test_first_sync_sends_everything_in_batches(db_session, articles, mock_client):
+    with patch("app.services.index_populator.BulkIndexer", partial(BulkIndexer, batch_bytes=400)), \
+            patch("app.services.index_populator.SEARCH_SYNC_FETCH_SIZE", 2):
+        assert _sync(db_session) == {"upserted": 3, "deleted": 0}
+    assert mock_client.add_documents_ndjson.call_count > 1
+    assert sorted(_sent_urls(mock_client)) == ["http://a.com", "http://b.com", "http://c.com"]
+    assert db_session.get(SearchSyncState, "articles").high_water is not None
+
+def test_later_syncs_only_send_changes(db_session, articles, mock_client):
+    with patch("app.services.index_populator.SEARCH_SYNC_OVERLAP_SECONDS", 0):
+        _sync(db_session)
+        mock_client.reset_mock()
+        assert _sync(db_session) == {"upserted": 0, "deleted": 0}
+        mock_client.add_documents_ndjson.assert_not_called()
+
+        crud.bulk_update_categories(db_session, [("http://b.com", "Technology")])
+        db_session.commit()
+        crud.insert_new_articles(db_session, [{"url": "http://d.com", "title": "New", "source": "S4", "category": "General"}])
+        assert _sync(db_session) == {"upserted": 2, "deleted": 0}
+        assert sorted(_sent_urls(mock_client)) == ["http://b.com", "http://d.com"]
+        assert {doc["url"]: doc["category"] for doc in _sent(mock_client)}["http://b.com"] == "Technology"
+
+        # A full sync re-sends everything regardless of the mark
+        mock_client.reset_mock()
+        assert _sync(db_session, full=True)["upserted"] == 4
+
+@patch("app.services.index_populator.SEARCH_SYNC_OVERLAP_SECONDS", 0)
+def test_retention_deletes_propagate(db_session, articles, mock_client):
+    user = User(username="reader", email="reader@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    db_session.add(UserSavedArticle(user_id=user.id, article_url="http://a.com"))
+    db_session.commit()
+    _sync(db_session)
+    mock_client.reset_mock()
+
+    purged = crud.purge_articles_published_before(db_session, datetime.datetime(2021, 1, 1))
+    assert purged == 1  # http://a.com is saved by a user
+    assert db_session.query(Article.url).order_by(Article.url).all() == [("http://a.com",), ("http://c.com",)]
+    assert [t.url for t in db_session.query(DeletedArticle)] == ["http://b.com"]
+
+    assert _sync(db_session) == {"upserted": 0, "deleted": 1}
+    mock_client.delete_documents.assert_awaited_once_with("articles", [index_populator.sanitize_id("http://b.com")])
+
+@pytest.mark.parametrize("backend, kept", [("meili", 3), ("local", 2), ("postgres", 2)])
+def test_tombstones_are_pruned_without_meilisearch(db_session, articles, backend, kept):
+    db_session.add(DeletedArticle(url="http://gone.com", deleted_at=datetime.datetime(2020, 6, 1)))
+    db_session.commit()
+    with patch.object(search_service, "SEARCH_BACKEND", backend):
+        assert purge_expired_articles(db_session, retention_days=30) == 2
+    # Only the MeiliSearch sync reads older tombstones; other backends keep just this purge's
+    assert db_session.query(DeletedArticle).count() == kept
+
+def test_populate_meilisearch_index_no_articles(db_session, mock_client):
+    assert _sync(db_session) == {"upserted": 0, "deleted": 0}
+    mock_client.add_documents_ndjson.assert_not_called()
+    mock_client.delete_documents.assert_not_called()
+
+def test_failed_sync_keeps_the_mark(db_session, articles, mock_client):
+    mock_client.add_documents_ndjson.side_effect = Exception("add error")
+    with patch("app.services.index_populator.BulkIndexer", partial(BulkIndexer, max_retries=0)):
+        with pytest.raises(Exception, match="add error"):
+            _sync(db_session)
+    state = db_session.get(SearchSyncState, "articles")
+    assert state is None or state.high_water is None
+
+def test_populate_meilisearch_index_unreachable(db_session, articles, mock_client):
+    crud.purge_articles_published_before(db_session, datetime.datetime(2021, 1, 1))
+    mock_client.delete_documents.side_effect = MeiliError("POST /indexes/articles/documents/delete-batch failed")
+    with pytest.raises(MeiliError):
+        _sync(db_session)
+    mock_client.add_documents_ndjson.assert_not_called()
 
 def test_sanitize_id():
     url = "http://example.com/article"
     result = index_populator.sanitize_id(url)
     assert isinstance(result, str)
-    assert len(result) == 32  # md5 hex 
\ No newline at end of file
+    assert len(result) == 32  # md5 hex
+
+class FakeMeili:
+    """In-memory MeiliSearch with just enough API for syncs, reindexes and swaps."""
+
+    def __init__(self):
+        self.indexes = {}
+        self.tasks = 0
+        self.drop_url = None
+
+    def _task(self):
+        self.tasks += 1
+        return {"taskUid": self.tasks}
+
+    def _index(self, uid):
+        if uid not in self.indexes:
+            raise MeiliError("missing", status_code=404, code="index_not_found")
+        return self.indexes[uid]
+
+    async def get_task(self, uid):
+        return {"uid": uid, "status": "succeeded"}
+
+    async def create_index(self, uid, primary_key="id"):
+        self.indexes[uid] = {"documents": {}, "settings": {"filterableAttributes": []}}
+        return self._task()
+
+    async def delete_index(self, uid):
+        self.indexes.pop(uid, None)
+        return self._task()
+
+    async def swap_indexes(self, pairs):
+        a, b = pairs[0]
+        self.indexes[a], self.indexes[b] = self.indexes[b], self.indexes[a]
+        return self._task()
+
+    async def list_indexes(self, limit=1000):
+        return [{"uid": uid} for uid in self.indexes]
+
+    async def get_settings(self, uid):
+        return dict(self._index(uid)["settings"])
+
+    async def update_settings(self, uid, settings):
+        self._index(uid)["settings"] = dict(settings)
+        return self._task()
+
+    async def add_documents_ndjson(self, uid, payload, primary_key="id"):
+        data = self.indexes.setdefault(uid, {"documents": {}, "settings": {}})
+        for line in payload.splitlines():
+            doc = json.loads(line)
+            if doc["url"] != self.drop_url:
+                data["documents"][doc["id"]] = doc
+        return self._task()
+
+    async def delete_documents(self, uid, ids):
+        for id in ids:
+            self._index(uid)["documents"].pop(id, None)
+        return self._task()
+
+    async def get_stats(self, uid):
+        return {"numberOfDocuments": len(self._index(uid)["documents"])}
+
+    def create(self, uid):
+        self.indexes[uid] = {"documents": {}, "settings": {"filterableAttributes": []}}
+
+    def urls(self, uid):
+        return sorted(doc["url"] for doc in self.indexes[uid]["documents"].values())
+
+@pytest.fixture
+def meili():
+    fake = FakeMeili()
+    with patch("app.services.index_populator.client", fake), \
+            patch.object(index_populator, "_settings_checked", False):
+        yield fake
+
+def test_reindex_swaps_in_a_complete_generation(db_session, articles, meili):
+    meili.create("articles")
+    meili.indexes["articles"]["settings"] = {"filterableAttributes": ["category"], "stopWords": ["the"]}
+    meili.indexes["articles"]["documents"]["stale"] = {"id": "stale", "url": "http://gone.com"}
+    meili.create("articles_20200101000000")  # left behind by a failed run
+
+    result = asyncio.run(index_populator.reindex_meilisearch_index(db=db_session))
+    assert result["documents"] == 3
+    assert result["dropped_generations"] == 2
+    assert list(meili.indexes) == ["articles"]
+    assert meili.urls("articles") == ["http://a.com", "http://b.com", "http://c.com"]
+    # Live settings carry over; the declared ones win
+    assert meili.indexes["articles"]["settings"] == {"stopWords": ["the"], **index_populator.SEARCH_INDEX_SETTINGS}
+    assert db_session.get(SearchSyncState, "articles").high_water is not None
+
+def test_reindex_creates_the_live_index_on_first_run(db_session, articles, meili):
+    asyncio.run(index_populator.reindex_meilisearch_index(db=db_session))
+    assert list(meili.indexes) == ["articles"]
+    assert meili.urls("articles") == ["http://a.com", "http://b.com", "http://c.com"]
+
+def test_reindex_with_missing_documents_keeps_the_live_index(db_session, articles, meili):
+    meili.create("articles")
+    meili.indexes["articles"]["documents"]["old"] = {"id": "old", "url": "http://old.com"}
+    meili.drop_url = "http://b.com"
+
+    with pytest.raises(BulkIndexError, match="holds 2 documents but the database has 3"):
+        asyncio.run(index_populator.reindex_meilisearch_index(db=db_session))
+    assert list(meili.indexes) == ["articles"]
+    assert meili.urls("articles") == ["http://old.com"]
+
+def test_reindex_catches_up_on_articles_stored_during_the_check(db_session, articles, meili, monkeypatch):
+    count_articles = crud.count_articles
+
+    def count_while_ingesting(db):
+        if not db.query(Article).filter_by(url="http://d.com").count():
+            # Stored after the catch-up read its changes but before the count
+            crud.insert_new_articles(db, [{"url": "http://d.com", "title": "t", "source": "S4"}])
+        return count_articles(db)
+
+    monkeypatch.setattr(crud, "count_articles", count_while_ingesting)
+    result = asyncio.run(index_populator.reindex_meilisearch_index(db=db_session))
+    assert result["documents"] == 4
+    assert meili.urls("articles") == ["http://a.com", "http://b.com", "http://c.com", "http://d.com"]
+
+def test_index_settings_are_applied_only_when_they_differ(meili):
+    assert asyncio.run(index_populator.apply_index_settings())
+    assert meili.indexes["articles"]["settings"] == index_populator.SEARCH_INDEX_SETTINGS
+    tasks = meili.tasks
+
+    # MeiliSearch may list attributes in another order; that is not a difference
+    meili.indexes["articles"]["settings"]["filterableAttributes"].reverse()
+    assert not asyncio.run(index_populator.apply_index_settings())
+    assert meili.tasks == tasks
+
+def test_documents_carry_a_sortable_timestamp(db_session, articles):
+    documents = {row.url: index_populator.article_document(row) for row in crud.iter_articles_changed_since(db_session, None)}
+    assert documents["http://a.com"]["published_ts"] == 1577836800  # 2020-01-01T00:00:00Z
+
+def test_changed_settings_resend_every_article(db_session, articles, meili):
+    meili.create("articles")
+    meili.indexes["articles"]["documents"]["old"] = {"id": "old", "url": "http://a.com"}
+    state = crud.get_search_sync_state(db_session, "articles")
+    state.high_water = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    db_session.commit()
+
+    # Settings changed, so the sync is a full one despite the high-water mark
+    assert _sync(db_session) == {"upserted": 3, "deleted": 0}
+    assert meili.indexes["articles"]["settings"] == index_populator.SEARCH_INDEX_SETTINGS
+    # Checked once per process
+    with patch.object(index_populator, "SEARCH_SYNC_OVERLAP_SECONDS", 0):
+        assert _sync(db_session) == {"upserted": 0, "deleted": 0}
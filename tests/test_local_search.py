@@ -0,0 +1,164 @@
+import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from unittest.mock import patch, AsyncMock
+
+from app import crud
+from app.adapters.meili_client import MeiliError
+from app.database import Article
+from app.services import search_service
+from app.services.local_search import BM25Index, LocalSearchIndex, snippet
+from app.services.search_filters import SearchFilters
+
+DOCS = {
+    "http://a": "Climate summit opens in Paris as leaders debate emissions",
+    "http://b": "Paris football club wins the league after late goal",
+    "http://c": "Emissions trading climate climate policy explained",
+    "http://d": "Local bakery wins award for sourdough",
+}
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    for url, text in DOCS.items():
+        index.add(url, text)
+    return index
+
+def test_bm25_ranks_and_pages(index):
+    results, total, _ = index.search("climate emissions")
+    assert total == 2
+    assert [url for url, _ in results] == ["http://c", "http://a"]
+    assert results[0][1] > results[1][1]
+
+    page, total, _ = index.search("paris climate wins", offset=1, limit=2)
+    assert total == 4
+    assert len(page) == 2
+    assert index.search("paris", offset=10)[0] == []
+    assert index.search("zeppelin")[:2] == ([], 0)
+
+def test_remove_and_reindex(index):
+    assert index.remove("http://c")
+    assert [url for url, _ in index.search("emissions")[0]] == ["http://a"]
+    index.add("http://a", "Rugby final tonight")
+    assert index.search("emissions")[:2] == ([], 0)
+    assert [url for url, _ in index.search("rugby")[0]] == ["http://a"]
+    assert len(index) == 3
+
+def test_compaction_and_snapshot_keep_results(index, tmp_path):
+    index.remove("http://d")
+    before = index.search("paris climate emissions wins")
+    postings = index.postings
+    index.compact()
+    assert index.search("paris climate emissions wins") == before
+    assert index.postings < postings  # the removed document's postings are gone
+
+    index.save(str(tmp_path / "idx"), saved_at="2024-01-01T00:00:00")
+    loaded, meta = BM25Index.load(str(tmp_path / "idx"))
+    assert not loaded._docs.flags.owndata
+    assert meta["saved_at"] == "2024-01-01T00:00:00"
+    assert loaded.search("paris climate emissions wins") == before
+    loaded.add("http://e", "Paris marathon route announced")
+    assert "http://e" in [url for url, _ in loaded.search("marathon")[0]]
+
+def test_filters_facets_and_recency_sort(tmp_path):
+    index = BM25Index()
+    index.add("http://a", "Rates rise again", datetime.datetime(2024, 5, 1), {"category": "Business", "source": "Reuters"})
+    index.add("http://b", "Rates rates rates", datetime.datetime(2024, 4, 1), {"category": "Business", "source": "AP"})
+    index.add("http://c", "Rates and politics", datetime.datetime(2024, 5, 3), {"category": "Politics", "source": "AP"})
+    index.add("http://d", "Rates without a date", None, {"category": "Business", "source": None})
+
+    results, total, facets = index.search("rates", facets=["category", "source"])
+    assert total == 4
+    assert facets == {"category": {"Business": 3, "Politics": 1}, "source": {"AP": 2, "Reuters": 1}}
+
+    may = SearchFilters(published_from=datetime.datetime(2024, 5, 1), published_to=datetime.datetime(2024, 5, 3))
+    assert sorted(url for url, _ in index.search("rates", filters=may)[0]) == ["http://a", "http://c"]
+    business = SearchFilters(categories=["Business"], sources=["AP", "Reuters"])
+    results, total, facets = index.search("rates", filters=business, facets=["category"])
+    assert (sorted(url for url, _ in results), total, facets) == (["http://a", "http://b"], 2, {"category": {"Business": 2}})
+    assert index.search("rates", filters=SearchFilters(categories=["Sports"]))[:2] == ([], 0)
+
+    newest = [url for url, _ in index.search("rates", sort="recent")[0]]
+    assert newest == ["http://c", "http://a", "http://b", "http://d"]
+    assert [url for url, _ in index.search("rates", offset=1, limit=2, sort="recent")[0]] == ["http://a", "http://b"]
+
+    index.save(str(tmp_path / "idx"), saved_at="")
+    loaded, _ = BM25Index.load(str(tmp_path / "idx"))
+    assert loaded.search("rates", filters=business, facets=["category"])[1:] == (2, {"category": {"Business": 2}})
+    assert [url for url, _ in loaded.search("rates", sort="recent")[0]] == newest
+
+def test_snippet_centres_on_the_match():
+    text = " ".join(f"w{i}" for i in range(100)) + " climate " + " ".join(f"x{i}" for i in range(100))
+    cut = snippet(text, "Climate", 10)
+    assert cut.startswith("…") and cut.endswith("…")
+    assert "climate" in cut.split()
+    assert snippet("short text", "other", 10) == "short text"
+
+def _articles(db_session):
+    db_session.add_all([
+        Article(url="http://a", title="Climate summit opens", content="Leaders debate emissions in Paris",
+                source="S", category="Politics", published_at=datetime.datetime(2020, 1, 1)),
+        Article(url="http://b", title="Paris club wins", content="A late goal settles the league",
+                source="S", category="Sports", published_at=datetime.datetime.utcnow()),
+    ])
+    db_session.commit()
+
+def test_local_index_warms_from_database_and_snapshot(db_session, tmp_path):
+    _articles(db_session)
+    factory = sessionmaker(bind=db_session.get_bind())
+    path = str(tmp_path / "search")
+    local = LocalSearchIndex(snapshot_path=path, session_factory=factory)
+    local.warm(db_session)
+    page = local.search("paris emissions", limit=10)
+    assert page["estimatedTotalHits"] == 2
+    assert page["hits"][0]["url"] == "http://a"
+    assert page["hits"][0]["content"] == "Leaders debate emissions in Paris"
+
+    # Written after the snapshot: picked up by the catch-up on the next warm
+    crud.insert_new_articles(db_session, [{"url": "http://c", "title": "Paris marathon", "source": "S"}])
+    crud.purge_articles_published_before(db_session, datetime.datetime(2021, 1, 1))
+    restarted = LocalSearchIndex(snapshot_path=path, session_factory=factory)
+    restarted.warm(db_session)
+    assert not restarted.index._docs.flags.owndata  # served from the memory-mapped snapshot
+    assert sorted(hit["url"] for hit in restarted.search("paris")["hits"]) == ["http://b", "http://c"]
+
+@pytest.mark.asyncio
+async def test_background_warm_catches_up_on_articles_stored_meanwhile(db_session):
+    _articles(db_session)
+    local = LocalSearchIndex(session_factory=sessionmaker(bind=db_session.get_bind()))
+    build = local._build
+
+    def slow_build(db, started):
+        index = build(db, started)
+        crud.insert_new_articles(db, [{"url": "http://c", "title": "Paris marathon", "source": "S"}])
+        return index
+
+    local._build = slow_build
+    local.add_articles(db_session.query(Article).all())  # not warmed yet: ignored
+    assert len(local.index) == 0
+    await local.warm_in_background()
+    assert local.ready
+    assert sorted(hit["url"] for hit in local.search("paris")["hits"]) == ["http://a", "http://b", "http://c"]
+
+def test_local_index_is_kept_only_when_used():
+    for backend, failover, expected in [("local", False, True), ("meili", False, False),
+                                        ("meili", True, True), ("postgres", True, False)]:
+        with patch.object(search_service, "SEARCH_BACKEND", backend), \
+                patch.object(search_service, "SEARCH_LOCAL_FAILOVER", failover):
+            assert search_service.uses_local_index() is expected
+
+@pytest.mark.asyncio
+async def test_search_fails_over_to_local_index(db_session):
+    _articles(db_session)
+    local = LocalSearchIndex(session_factory=sessionmaker(bind=db_session.get_bind()))
+    with patch("app.services.search_service.client") as mock_client, \
+            patch.object(search_service.local_backend, "index", local):
+        mock_client.search = AsyncMock(side_effect=MeiliError("GET /indexes/articles/search failed"))
+        with pytest.raises(MeiliError):
+            await search_service.search_page("paris")
+
+        local.warm(db_session)
+        page = await search_service.search_page("paris")
+        assert page["estimatedTotalHits"] == 2
+        assert {hit["url"] for hit in page["hits"]} == {"http://a", "http://b"}
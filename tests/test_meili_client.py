@@ -0,0 +1,69 @@
+import json
+
+import httpx
+import pytest
+
+from app.adapters.meili_client import AsyncMeiliClient, MeiliError
+
+
+def _client(handler, **kwargs):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncMeiliClient("http://meili.test", "secret", retry_backoff=0, http=http, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_search_posts_query_with_key():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"hits": [{"id": "1"}]})
+
+    result = await _client(handler).search("articles", "climate", limit=5)
+    assert result == {"hits": [{"id": "1"}]}
+    request = seen[0]
+    assert request.url == "http://meili.test/indexes/articles/search"
+    assert request.headers["Authorization"] == "Bearer secret"
+    assert json.loads(request.content) == {"q": "climate", "limit": 5}
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    responses = [httpx.ConnectError("refused"), httpx.Response(503), httpx.Response(200, json={"hits": []})]
+
+    def handler(request):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert await _client(handler, max_retries=2).search("articles", "q") == {"hits": []}
+    assert responses == []
+
+
+@pytest.mark.asyncio
+async def test_errors_carry_meilisearch_code():
+    def handler(request):
+        return httpx.Response(404, json={"message": "Index `articles` not found.", "code": "index_not_found"})
+
+    with pytest.raises(MeiliError) as raised:
+        await _client(handler).get_settings("articles")
+    assert raised.value.status_code == 404
+    assert raised.value.code == "index_not_found"
+
+
+@pytest.mark.asyncio
+async def test_index_writes_are_not_retried_once_sent():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(500, json={"message": "boom", "code": "internal"})
+
+    with pytest.raises(MeiliError, match="500"):
+        await _client(handler, max_retries=3).swap_indexes([["articles", "articles_20240101000000"]])
+    # The refused connection is retried, the 500 is not
+    assert len(calls) == 2
+    assert json.loads(calls[1].content) == [{"indexes": ["articles", "articles_20240101000000"]}]
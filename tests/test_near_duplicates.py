@@ -0,0 +1,137 @@
+import pytest
+
+from app.database import Article
+from app.services.near_duplicates import NearDuplicateIndex, estimate_similarity, minhash_signature
+
+JAPAN_QUAKE = (
+    "Earthquake of magnitude 6.8 strikes off the coast of Japan, tsunami warning issued",
+    "A powerful earthquake of magnitude 6.8 struck off the northeastern coast of Japan on Tuesday, "
+    "the Japan Meteorological Agency said, prompting a tsunami warning for coastal areas.",
+)
+JAPAN_QUAKE_WIRE_COPY = (
+    "Magnitude 6.8 earthquake strikes off coast of Japan, tsunami warning issued",
+    "<p>A powerful earthquake of magnitude 6.8 struck off the northeastern coast of Japan on Tuesday, "
+    "the Japan Meteorological Agency said, prompting a tsunami warning.</p>",
+)
+CHILE_QUAKE = (
+    "Earthquake hits Chile, no tsunami warning issued",
+    "A strong earthquake of magnitude 6.1 struck central Chile on Wednesday, the national "
+    "seismology centre said, with no tsunami warning for coastal areas.",
+)
+
+def test_wire_copies_are_similar_and_different_stories_are_not():
+    original = minhash_signature(*JAPAN_QUAKE)
+    assert len(original) == 64
+    assert estimate_similarity(original, minhash_signature(*JAPAN_QUAKE_WIRE_COPY)) >= 0.7
+    assert estimate_similarity(original, minhash_signature(*CHILE_QUAKE)) < 0.5
+
+def test_short_texts_are_not_fingerprinted():
+    assert minhash_signature("Markets close higher", "") is None
+
+def test_index_links_copies_to_the_first_story():
+    index = NearDuplicateIndex()
+    _, story = index.assign("https://reuters.example/quake", *JAPAN_QUAKE)
+    _, copy_story = index.assign("https://bbc.example/quake", *JAPAN_QUAKE_WIRE_COPY)
+    _, other_story = index.assign("https://dw.example/chile", *CHILE_QUAKE)
+
+    assert story == "https://reuters.example/quake"
+    assert copy_story == story
+    assert other_story == "https://dw.example/chile"
+    assert index.assign("https://short.example", "Too short")[1] == "https://short.example"
+
+def test_index_evicts_oldest_signatures():
+    index = NearDuplicateIndex(capacity=1)
+    index.assign("https://reuters.example/quake", *JAPAN_QUAKE)
+    index.assign("https://dw.example/chile", *CHILE_QUAKE)
+
+    assert len(index) == 1
+    assert index.find(minhash_signature(*JAPAN_QUAKE_WIRE_COPY)) is None
+    bucketed = {
+        url for buckets in index._buckets for bucket in buckets.values()
+        for url in ([bucket] if isinstance(bucket, str) else bucket)
+    }
+    assert bucketed == {"https://dw.example/chile"}
+
+def test_index_warms_from_stored_signatures(db_session):
+    db_session.add(Article(
+        url="https://reuters.example/quake", title=JAPAN_QUAKE[0], source="Reuters",
+        minhash=minhash_signature(*JAPAN_QUAKE), story_id="https://reuters.example/quake",
+    ))
+    db_session.commit()
+
+    index = NearDuplicateIndex()
+    index.warm(db_session)
+
+    assert index.ready
+    assert index.find(minhash_signature(*JAPAN_QUAKE_WIRE_COPY)) == "https://reuters.example/quake"
+
+@pytest.mark.asyncio
+async def test_pipeline_stores_copies_but_only_announces_the_story(db_session):
+    from app.services.ingest_pipeline import IngestPipeline
+    from app.services.url_filter import KnownURLFilter
+
+    announced = []
+
+    async def on_persisted(articles):
+        announced.extend(a.url for a in articles)
+
+    pipeline = IngestPipeline(
+        db=db_session, rss_feeds=[], include_newsapi=False, on_persisted=on_persisted,
+        on_feed_result=None, url_filter=KnownURLFilter(), story_index=NearDuplicateIndex(),
+    )
+    articles = [
+        {"url": "https://reuters.example/quake", "title": JAPAN_QUAKE[0], "summary": JAPAN_QUAKE[1]},
+        {"url": "https://bbc.example/quake", "title": JAPAN_QUAKE_WIRE_COPY[0], "summary": JAPAN_QUAKE_WIRE_COPY[1]},
+    ]
+    for article_data in articles:
+        article_data.update(source="Wire", source_type="rss", category="World")
+        [normalized] = await pipeline._normalize(article_data)
+        [clustered] = await pipeline._cluster(normalized)
+        [persisted] = await pipeline._persist([clustered])
+        await pipeline._publish(persisted)
+
+    stored = {a.url: a.story_id for a in db_session.query(Article)}
+    assert stored == {
+        "https://reuters.example/quake": "https://reuters.example/quake",
+        "https://bbc.example/quake": "https://reuters.example/quake",
+    }
+    assert announced == ["https://reuters.example/quake"]
+    assert pipeline.adapters["rss"].near_duplicates == 1
+
+@pytest.mark.asyncio
+async def test_story_is_indexed_only_once_stored(db_session, mocker):
+    """A story whose first article failed to store is led by the next copy that is stored."""
+    from app.services.ingest_pipeline import IngestPipeline
+    from app.services.url_filter import KnownURLFilter
+
+    announced = []
+
+    async def on_persisted(articles):
+        announced.extend(a.url for a in articles)
+
+    index = NearDuplicateIndex()
+    pipeline = IngestPipeline(
+        db=db_session, rss_feeds=[], include_newsapi=False, on_persisted=on_persisted,
+        on_feed_result=None, url_filter=KnownURLFilter(), story_index=index,
+    )
+    clustered = []
+    for url, (title, summary) in [("https://reuters.example/quake", JAPAN_QUAKE),
+                                  ("https://bbc.example/quake", JAPAN_QUAKE_WIRE_COPY)]:
+        article_data = {"url": url, "title": title, "summary": summary, "source": "Wire",
+                        "source_type": "rss", "category": "World"}
+        [normalized] = await pipeline._normalize(article_data)
+        clustered.extend(await pipeline._cluster(normalized))
+    assert clustered[1]["story_id"] == "https://reuters.example/quake"
+    assert len(index) == 0
+
+    mocker.patch("app.services.ingest_pipeline.crud.insert_new_articles", side_effect=RuntimeError("db down"))
+    with pytest.raises(RuntimeError):
+        await pipeline._persist(clustered[:1])
+    mocker.stopall()
+    assert len(index) == 0
+
+    [persisted] = await pipeline._persist(clustered[1:])
+    await pipeline._publish(persisted)
+    assert announced == ["https://bbc.example/quake"]
+    assert index.find(minhash_signature(*JAPAN_QUAKE)) == "https://bbc.example/quake"
+    assert db_session.query(Article.story_id).scalar() == "https://bbc.example/quake"
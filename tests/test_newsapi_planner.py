@@ -0,0 +1,149 @@
+import json
+import os
+import datetime
+import pytest
+import httpx
+from unittest.mock import patch
+
+from app.adapters import newsapi_adapter
+from app.adapters.newsapi_adapter import (
+    NewsAPIQuota,
+    NEWSAPI_CATEGORIES,
+    NEWSAPI_SOURCES,
+    allocate_pages,
+    fetch_newsapi_articles,
+    plan_requests,
+)
+
+RECORDINGS = os.path.join(os.path.dirname(__file__), "fixtures", "newsapi_recorded_responses.json")
+
+class RecordedNewsAPI:
+    """
+    Offline stand-in for newsapi.org: replays recorded responses keyed by the
+    request's query string (minus the API key) and logs every request made.
+    """
+
+    def __init__(self, path=RECORDINGS, rate_limited=False):
+        with open(path) as f:
+            self.recordings = json.load(f)
+        self.rate_limited = rate_limited
+        self.requests = []
+
+    @staticmethod
+    def key(request: httpx.Request) -> str:
+        params = sorted((k, v) for k, v in request.url.params.multi_items() if k != "apiKey")
+        return "&".join(f"{k}={v}" for k, v in params)
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        key = self.key(request)
+        self.requests.append(key)
+        if self.rate_limited:
+            return httpx.Response(429, json={"status": "error", "code": "rateLimited"})
+        if key not in self.recordings:
+            return httpx.Response(400, json={"status": "error", "code": "unrecorded", "message": key})
+        return httpx.Response(200, json=self.recordings[key])
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+async def _fetch_with(api: RecordedNewsAPI, limit: int, quota: NewsAPIQuota):
+    async with api.client() as client:
+        with patch.object(newsapi_adapter, "get_http_client", return_value=client):
+            with patch.dict(os.environ, {"NEWSAPI_KEY": "test-api-key"}):
+                return await fetch_newsapi_articles(limit=limit, quota=quota)
+
+def test_plan_packs_sources_into_batches():
+    plan = plan_requests(limit=6)
+    source_requests = [r for r in plan if "sources" in r]
+    assert len(plan) == len(NEWSAPI_CATEGORIES) + 2
+    assert [len(r["sources"]) for r in source_requests] == [20, len(NEWSAPI_SOURCES) - 20]
+    assert sum(len(r["sources"]) for r in source_requests) == len(NEWSAPI_SOURCES)
+    assert source_requests[0]["wanted"] == 120
+
+@pytest.mark.asyncio
+async def test_recorded_cycle_uses_batched_paginated_requests():
+    api = RecordedNewsAPI()
+    quota = NewsAPIQuota(daily_limit=100)
+
+    articles = await _fetch_with(api, limit=6, quota=quota)
+
+    # 7 categories + 2 pages for the first 20 sources + 1 page for the rest,
+    # instead of 7 + 21 single-source requests
+    assert len(api.requests) == 10
+    assert quota.used == 10
+    assert all(key in api.recordings for key in api.requests)
+    assert len(articles) == len(NEWSAPI_CATEGORIES) * 6 + 115 + 4
+    assert len({a["url"] for a in articles}) == len(articles)
+    # Every configured outlet is represented; "General Wire" comes from the general category
+    sources = {a["source"] for a in articles if a["category"] == "General"} - {"General Wire"}
+    assert len(sources) == len(NEWSAPI_SOURCES)
+
+@pytest.mark.asyncio
+async def test_stops_cleanly_when_budget_is_spent():
+    api = RecordedNewsAPI()
+    quota = NewsAPIQuota(daily_limit=3)
+
+    articles = await _fetch_with(api, limit=6, quota=quota)
+
+    assert len(api.requests) == 3
+    assert quota.remaining == 0
+    assert len(articles) == 3 * 6
+
+@pytest.mark.asyncio
+async def test_rate_limit_response_exhausts_quota():
+    api = RecordedNewsAPI(rate_limited=True)
+    quota = NewsAPIQuota(daily_limit=100)
+
+    articles = await _fetch_with(api, limit=6, quota=quota)
+
+    assert articles == []
+    assert quota.remaining == 0
+    assert len(api.requests) < len(plan_requests(limit=6))
+
+def test_pages_are_capped_per_cycle():
+    plan = plan_requests(limit=100)
+    # 7 categories and 21 sources: never more requests than fetching each one separately
+    assert sum(allocate_pages(plan, newsapi_adapter.NEWSAPI_MAX_REQUESTS_PER_CYCLE)) == 28
+    # First pages for every request before a deep page of the 20-source batch
+    assert allocate_pages(plan, 12) == [1] * len(NEWSAPI_CATEGORIES) + [4, 1]
+    assert allocate_pages(plan, 5) == [1] * 5 + [0] * 4
+    assert allocate_pages(plan_requests(limit=6), 100) == [1] * len(NEWSAPI_CATEGORIES) + [2, 1]
+
+@pytest.mark.asyncio
+async def test_later_page_error_keeps_earlier_pages():
+    class MaximumResultsReached(RecordedNewsAPI):
+        def handler(self, request):
+            if request.url.params.get("page") == "2":
+                self.requests.append(self.key(request))
+                return httpx.Response(426, json={"status": "error", "code": "maximumResultsReached"})
+            return super().handler(request)
+
+    api = MaximumResultsReached()
+    articles = await _fetch_with(api, limit=6, quota=NewsAPIQuota(daily_limit=100))
+
+    assert len(api.requests) == 10
+    # The first page of the 20-source batch is kept instead of being thrown away
+    assert len(articles) == len(NEWSAPI_CATEGORIES) * 6 + 100 + 4
+
+def test_quota_resets_each_day():
+    day = [datetime.date(2024, 5, 1)]
+    quota = NewsAPIQuota(daily_limit=2, today=lambda: day[0])
+    assert quota.try_consume() and quota.try_consume()
+    assert not quota.try_consume()
+    day[0] = datetime.date(2024, 5, 2)
+    assert quota.remaining == 2
+
+def test_quota_survives_restarts(db_session):
+    day = [datetime.date(2024, 5, 1)]
+    quota = NewsAPIQuota(daily_limit=5, today=lambda: day[0])
+    quota.load(db_session)
+    assert quota.try_consume() and quota.try_consume() and quota.try_consume()
+    quota.save(db_session)
+
+    restarted = NewsAPIQuota(daily_limit=5, today=lambda: day[0])
+    restarted.load(db_session)
+    assert restarted.remaining == 2
+    day[0] = datetime.date(2024, 5, 2)
+    tomorrow = NewsAPIQuota(daily_limit=5, today=lambda: day[0])
+    tomorrow.load(db_session)
+    assert tomorrow.remaining == 5
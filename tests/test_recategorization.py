@@ -0,0 +1,151 @@
+import pytest
+
+from app import crud
+from app.database import Article, ArticleCategory, RecategorizationJob
+from app.services.categorization import categorize_article
+from app.services.recategorization import RecategorizationRunner
+from tests.conftest import TestingSessionLocal
+
+ARTICLES = [
+    ("football match tonight", "the team won the championship game"),
+    ("stock market rally", "investors cheer as earnings beat forecasts"),
+    ("heavy rain and storm warning", "the forecast shows flooding"),
+    ("senate vote on the bill", "congress debates new legislation"),
+    ("untitled", ""),
+]
+
+def _seed(db_session, category="General"):
+    db_session.add_all([
+        Article(url=f"https://example.com/{i}", title=title, content=content, source="s", category=category)
+        for i, (title, content) in enumerate(ARTICLES)
+    ])
+    db_session.commit()
+
+def test_bulk_update_categories(db_session):
+    _seed(db_session)
+    assert crud.bulk_update_categories(db_session, [("https://example.com/0", "Sports"), ("https://example.com/3", "Politics")]) == 2
+    db_session.commit()
+    categories = dict(db_session.query(Article.url, Article.category).all())
+    assert categories["https://example.com/0"] == "Sports"
+    assert categories["https://example.com/3"] == "Politics"
+    assert categories["https://example.com/1"] == "General"
+    assert crud.bulk_update_categories(db_session, []) == 0
+
+@pytest.mark.asyncio
+async def test_job_recategorizes_in_chunks(db_session):
+    _seed(db_session)
+    runner = RecategorizationRunner(session_factory=TestingSessionLocal, chunk_size=2)
+    runner.start()
+    await runner._task
+
+    status = runner.status()
+    expected = {f"https://example.com/{i}": categorize_article(title, content) for i, (title, content) in enumerate(ARTICLES)}
+    assert status["status"] == "completed"
+    assert status["processed"] == status["total"] == len(ARTICLES)
+    assert status["updated"] == sum(category != "General" for category in expected.values())
+    assert status["cursor"] == "https://example.com/4"
+    assert status["progress"] == 1.0
+    db_session.expire_all()
+    assert dict(db_session.query(Article.url, Article.category).all()) == expected
+    # Per-category scores are (re)written for every article scanned
+    stored = {row.article_url for row in db_session.query(ArticleCategory)}
+    assert stored == {url for url, category in expected.items() if category != "General"}
+
+@pytest.mark.asyncio
+async def test_job_keeps_provider_categories(db_session):
+    _seed(db_session)
+    labelled = db_session.get(Article, "https://example.com/1")
+    labelled.category = labelled.native_category = "Entertainment"
+    db_session.commit()
+    runner = RecategorizationRunner(session_factory=TestingSessionLocal, chunk_size=2)
+    runner.start()
+    await runner._task
+
+    db_session.expire_all()
+    assert db_session.get(Article, "https://example.com/1").category == "Entertainment"
+    assert db_session.get(Article, "https://example.com/0").category == categorize_article(*ARTICLES[0])
+    # Its keyword scores are refreshed all the same
+    assert db_session.query(ArticleCategory).filter_by(article_url="https://example.com/1").count() > 0
+
+@pytest.mark.asyncio
+async def test_job_updates_local_search_categories(db_session):
+    from app.services.local_search import LocalSearchIndex
+    from app.services.search_filters import SearchFilters
+
+    _seed(db_session)
+    local = LocalSearchIndex(session_factory=TestingSessionLocal)
+    local.warm(db_session)
+    runner = RecategorizationRunner(session_factory=TestingSessionLocal, chunk_size=2, search_index=local)
+    runner.start()
+    await runner._task
+
+    sports = local.index.search("the", filters=SearchFilters(categories=["Sports"]), facets=["category"])
+    assert [url for url, _ in sports[0]] == ["https://example.com/0"]
+    assert "General" not in local.index.search("the", facets=["category"])[2]["category"]
+
+@pytest.mark.asyncio
+async def test_job_resumes_from_cursor_after_restart(db_session):
+    _seed(db_session, category="Stale")
+    first = RecategorizationRunner(session_factory=TestingSessionLocal, chunk_size=2)
+    db_session.add(RecategorizationJob(status="running", total=len(ARTICLES)))
+    db_session.commit()
+    job_id = db_session.query(RecategorizationJob.id).scalar()
+    # One chunk lands, then the process "stops"
+    assert first.process_chunk(db_session, job_id)[0] == 2
+
+    second = RecategorizationRunner(session_factory=TestingSessionLocal, chunk_size=2)
+    assert second.resume()
+    await second._task
+
+    job = db_session.get(RecategorizationJob, job_id)
+    db_session.refresh(job)
+    assert job.status == "completed"
+    assert job.processed == len(ARTICLES)
+    assert job.updated == len(ARTICLES)
+    assert db_session.query(RecategorizationJob).count() == 1
+    assert not second.resume()
+
+@pytest.mark.asyncio
+async def test_failed_job_is_resumed_by_next_start(db_session, monkeypatch):
+    _seed(db_session)
+    runner = RecategorizationRunner(session_factory=TestingSessionLocal, chunk_size=2)
+
+    def fail(db, changes):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(crud, "bulk_update_categories", fail)
+    runner.start()
+    await runner._task
+    assert runner.status()["status"] == "failed"
+    assert runner.status()["error"] == "database went away"
+
+    monkeypatch.undo()
+    runner.start()
+    await runner._task
+    status = runner.status()
+    assert status["status"] == "completed"
+    assert status["processed"] == len(ARTICLES)
+    assert db_session.query(RecategorizationJob).count() == 1
+
+def test_status_without_jobs(db_session):
+    runner = RecategorizationRunner(session_factory=TestingSessionLocal)
+    assert runner.status() == {"status": "idle"}
+
+@pytest.mark.asyncio
+async def test_scores_are_backfilled_once(db_session):
+    _seed(db_session)
+    runner = RecategorizationRunner(session_factory=TestingSessionLocal, chunk_size=2)
+    assert runner.backfill_scores()
+    await runner._task
+    assert runner.status()["status"] == "completed"
+    assert db_session.query(ArticleCategory).count() > 0
+
+    # The finished job marks the backfill as done
+    db_session.query(ArticleCategory).delete()
+    db_session.commit()
+    assert not runner.backfill_scores()
+
+def test_no_backfill_without_unscored_articles(db_session):
+    runner = RecategorizationRunner(session_factory=TestingSessionLocal)
+    assert not runner.backfill_scores()
+    assert db_session.query(RecategorizationJob).count() == 0
@@ -1,5 +1,6 @@
+import datetime
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
 from app.services import search_service
 
 @pytest.fixture
@@ -15,10 +16,10 @@ async def test_search_articles_success():
         ]
     }
     with patch("app.services.search_service.client") as mock_client:
-        mock_index = Mock()
-        mock_client.index.return_value = mock_index
-        mock_index.search.return_value = mock_results
+        mock_client.search = AsyncMock(return_value=mock_results)
         results = await search_service.search_articles("test query")
+        assert mock_client.search.call_args.args == ("articles", "test query")
+        assert mock_client.search.call_args.kwargs["limit"] == 20
         assert isinstance(results, list)
         assert len(results) == 2
         assert results[0]["title"] == "Test Article"
@@ -27,9 +28,7 @@ async def test_search_articles_success():
 async def test_search_articles_no_results():
     mock_results = {"hits": []}
     with patch("app.services.search_service.client") as mock_client:
-        mock_index = Mock()
-        mock_client.index.return_value = mock_index
-        mock_index.search.return_value = mock_results
+        mock_client.search = AsyncMock(return_value=mock_results)
         results = await search_service.search_articles("no match")
         assert isinstance(results, list)
         assert len(results) == 0
@@ -37,8 +36,70 @@ async def test_search_articles_no_results():
 @pytest.mark.asyncio
 async def test_search_articles_error():
     with patch("app.services.search_service.client") as mock_client:
-        mock_index = Mock()
-        mock_client.index.return_value = mock_index
-        mock_index.search.side_effect = Exception("search error")
+        mock_client.search = AsyncMock(side_effect=Exception("search error"))
         with pytest.raises(Exception, match="search error"):
-            await search_service.search_articles("error query") 
\ No newline at end of file
+            await search_service.search_articles("error query") 
+@pytest.mark.asyncio
+async def test_search_page_pages_in_meilisearch():
+    mock_results = {
+        "hits": [{"url": "http://a.com", "title": "Deep", "source": "S", "category": "Tech",
+                  "_formatted": {"url": "http://a.com", "content": "…the match in context…"}}],
+        "estimatedTotalHits": 1234,
+    }
+    with patch("app.services.search_service.client") as mock_client:
+        mock_client.search = AsyncMock(return_value=mock_results)
+        page = await search_service.search_page("deep", offset=980, limit=20)
+    params = mock_client.search.call_args.kwargs
+    assert (params["offset"], params["limit"]) == (980, 20)
+    assert "content" not in params["attributesToRetrieve"]
+    assert params["attributesToCrop"] == ["content"]
+    assert page["estimatedTotalHits"] == 1234
+    assert page["hits"][0]["content"] == "…the match in context…"
+    assert "_formatted" not in page["hits"][0]
+
+def test_search_endpoint_passes_page_through(client):
+    with patch("app.services.search_service.client") as mock_client:
+        mock_client.search = AsyncMock(return_value={"hits": [], "estimatedTotalHits": 0})
+        response = client.get("/v1/search", params={"q": "climate", "page": 50, "limit": 20})
+    assert response.status_code == 200
+    assert response.json() == {"articles": [], "page": 50, "limit": 20, "estimatedTotalHits": 0, "facetDistribution": {}}
+    assert mock_client.search.call_args.kwargs["offset"] == 980
+
+def test_search_endpoint_filters_and_sorts_in_the_index(client):
+    facets = {"category": {"Business": 3, "Politics": 1}, "source": {"Reuters": 4}}
+    with patch("app.services.search_service.client") as mock_client:
+        mock_client.search = AsyncMock(return_value={"hits": [], "estimatedTotalHits": 4, "facetDistribution": facets})
+        response = client.get("/v1/search", params={
+            "q": "rates", "category": ["Business", "Politics"], "source": 'The "Times"',
+            "published_from": "2024-05-01T00:00:00Z", "published_to": "2024-05-02T00:00:00+02:00", "sort": "recent",
+        })
+    assert response.status_code == 200
+    assert response.json()["facetDistribution"] == facets
+    params = mock_client.search.call_args.kwargs
+    assert params["filter"] == [
+        'category IN ["Business", "Politics"]',
+        'source IN ["The \\"Times\\""]',
+        "published_ts >= 1714521600",
+        "published_ts <= 1714600800",
+    ]
+    assert params["sort"] == ["published_ts:desc"]
+    assert params["facets"] == ["category", "source"]
+    assert client.get("/v1/search", params={"q": "rates", "sort": "oldest"}).status_code == 422
+
+@pytest.mark.asyncio
+async def test_postgres_backend_searches_without_meilisearch():
+    article = Mock(url="http://a.com", title="Rates rise", source="S", category="Business",
+                   image_url=None, published_at=datetime.datetime(2024, 5, 1, 8, 30))
+    backend = search_service.PostgresSearchBackend(session_factory=Mock)
+    with patch.object(search_service, "SEARCH_BACKEND", "postgres"), \
+            patch.dict(search_service._standalone_backends, {"postgres": backend}), \
+            patch("app.services.search_service.client") as mock_client, \
+            patch("app.crud.search_articles_fulltext",
+                  return_value=([(article, "central banks raise rates")], 1, {"category": {"Business": 1}})) as fulltext:
+        page = await search_service.search_page("interest rates", offset=20, limit=10)
+    assert not mock_client.search.called
+    assert fulltext.call_args.args[1:4] == ("interest rates", 20, 10)
+    assert page == {"hits": [{"url": "http://a.com", "title": "Rates rise", "source": "S",
+                              "published_at": "2024-05-01T08:30:00", "category": "Business",
+                              "image_url": None, "content": "central banks raise rates"}],
+                    "estimatedTotalHits": 1, "facetDistribution": {"category": {"Business": 1}}}
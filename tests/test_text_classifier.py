@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from app.database import Article
+from app.services import categorization
+from app.services.text_classifier import NaiveBayesClassifier, load_labelled_articles
+
+TRAINING = [
+    ("striker scores twice as united win the derby", "Sports"),
+    ("coach praises defence after cup final victory", "Sports"),
+    ("injury rules goalkeeper out of the league match", "Sports"),
+    ("title race tightens after late penalty drama", "Sports"),
+    ("shares slide as central bank signals rate rise", "Business"),
+    ("retailer profits beat forecasts on strong holiday sales", "Business"),
+    ("merger talks lift bank stocks in early trading", "Business"),
+    ("quarterly earnings disappoint investors as costs climb", "Business"),
+]
+
+@pytest.fixture
+def model():
+    return NaiveBayesClassifier.train(TRAINING)
+
+def test_classifier_learns_labels(model):
+    assert model.categories == ["Business", "Sports"]
+    results = model.score_texts(["late penalty wins the derby for united", "bank shares rise after strong earnings"])
+    assert [category for category, _ in results] == ["Sports", "Business"]
+    for _, percents in results:
+        assert 99 <= sum(percents) <= 101
+
+def test_single_and_batch_probabilities_agree(model):
+    texts = ["goalkeeper injury before the cup final", "investors cheer the merger", ""]
+    batch = model.probabilities(texts)
+    for text, row in zip(texts, batch):
+        np.testing.assert_allclose(model.probability(text), row, atol=1e-5)
+
+def test_saved_model_is_memory_mapped(model, tmp_path):
+    model.save(str(tmp_path))
+    loaded = NaiveBayesClassifier.load(str(tmp_path))
+    assert loaded.version == model.version
+    assert loaded.categories == model.categories
+    assert not loaded.weights.flags.owndata
+    text = "coach praises striker after derby"
+    np.testing.assert_allclose(loaded.probability(text), model.probability(text), atol=1e-6)
+
+def test_empty_training_set():
+    with pytest.raises(ValueError):
+        NaiveBayesClassifier.train([])
+
+def test_model_backend_is_selectable(model, tmp_path):
+    model.save(str(tmp_path))
+    headline = ("Late penalty wins the derby", "")
+    try:
+        categorization.use_categorizer("model", str(tmp_path))
+        assert categorization.category_names() == ["Business", "Sports"]
+        # Thresholds follow the backend's units: percent here, keyword hits otherwise
+        assert categorization.min_category_score() == 20
+        category, scores = categorization.score_article(*headline)
+        assert category == "Sports"
+        assert scores["Sports"] > 50
+        assert categorization.categorize_articles([headline, ("Bank shares slide", "")]) == ["Sports", "Business"]
+
+        # A missing model falls back to the keyword engine
+        categorization.use_categorizer("model", str(tmp_path / "missing"))
+        assert "Politics" in categorization.category_names()
+        assert categorization.categorize_article(*headline) != "Business"
+        assert categorization.min_category_score() == 2
+    finally:
+        categorization.use_categorizer("keywords")
+    with pytest.raises(ValueError):
+        categorization.use_categorizer("oracle")
+
+def test_labelled_articles_come_from_native_categories(db_session):
+    db_session.add_all([
+        Article(url="https://a", title="Derby Day", content="United win", source="s", category="Sports", native_category="Sports"),
+        Article(url="https://b", title="Rain", content="", source="s", category="Weather"),
+    ])
+    db_session.commit()
+    assert load_labelled_articles(db_session) == [("derby day united win", "Sports")]
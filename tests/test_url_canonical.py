@@ -0,0 +1,101 @@
+import pytest
+import feedparser
+from sqlalchemy import create_engine, event, inspect, text
+
+from app import crud, database
+from app.adapters.feed_parser import entry_canonical_url
+from app.adapters.url_canonical import canonicalize_url
+from app.database import Article
+
+@pytest.mark.parametrize("variant", [
+    "https://www.example.com/news/story",
+    "http://example.com/news/story",
+    "https://example.com/news/story/",
+    "https://EXAMPLE.com:443/news/story#comments",
+    "https://example.com/news/story?utm_source=rss&utm_medium=feed&fbclid=abc",
+    "https://amp.example.com/news/story",
+    "https://example.com/news/story/amp",
+    "https://example.com/amp/news/story",
+    "https://example.com/news/story.amp",
+    "https://www-example-com.cdn.ampproject.org/c/s/www.example.com/news/story/amp",
+    "https://www.google.com/amp/s/example.com/news/story",
+])
+def test_variants_share_one_key(variant):
+    assert canonicalize_url(variant) == "https://example.com/news/story"
+
+def test_meaningful_query_params_are_kept_and_sorted():
+    assert canonicalize_url("https://example.com/story?page=2&id=7&utm_campaign=x") == "https://example.com/story?id=7&page=2"
+    assert canonicalize_url("https://example.com/story?id=7") != canonicalize_url("https://example.com/story?id=8")
+
+def test_generic_params_are_not_treated_as_tracking():
+    url = "https://example.com/story?amp=1&cmp=2&feed=3&ito=4&ref=5&rss=6&share=7"
+    assert canonicalize_url(url) == url
+    assert canonicalize_url("https://example.com/story?ref=a") != canonicalize_url("https://example.com/story?ref=b")
+
+def test_path_case_and_encoded_slashes_are_preserved():
+    assert canonicalize_url("https://example.com/News/A%2fB%7e") == "https://example.com/News/A%2FB~"
+    assert canonicalize_url("https://example.com:8080/x") == "https://example.com:8080/x"
+
+def test_non_http_urls_pass_through():
+    assert canonicalize_url("mailto:news@example.com") == "mailto:news@example.com"
+    assert canonicalize_url(None) is None
+
+def test_feed_entry_prefers_rel_canonical():
+    feed = feedparser.parse(
+        '<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>F</title>'
+        '<entry><title>T</title><link rel="alternate" href="https://example.com/s?utm_source=feed"/>'
+        '<link rel="canonical" href="https://www.example.com/world/s/"/></entry></feed>'
+    )
+    assert entry_canonical_url(feed.entries[0]) == "https://example.com/world/s"
+
+def test_insert_skips_variants_of_a_stored_article(db_session):
+    crud.insert_new_articles(db_session, [{"url": "https://example.com/story", "title": "t", "source": "s"}])
+
+    inserted = crud.insert_new_articles(db_session, [
+        {"url": "http://www.example.com/story/?utm_source=rss", "title": "t", "source": "s"},
+        {"url": "https://example.com/story/amp", "title": "t", "source": "s"},
+        {"url": "https://example.com/other", "title": "t", "source": "s"},
+    ])
+
+    assert [a.url for a in inserted] == ["https://example.com/other"]
+    assert db_session.query(Article).count() == 2
+
+def test_backfill_keeps_older_duplicates_unkeyed(db_session):
+    db_session.execute(text(
+        "INSERT INTO articles (url, title, source) VALUES "
+        "('http://example.com/a?utm_source=x', 't', 's'), ('https://example.com/a', 't', 's'), "
+        "('https://example.com/b', 't', 's')"
+    ))
+    db_session.commit()
+    updates = []
+
+    def listen(conn, cursor, statement, params, context, executemany):
+        if statement.startswith("UPDATE"):
+            updates.append(executemany)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", listen)
+    try:
+        assert crud.backfill_canonical_urls(db_session) == 2
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listen)
+    assert updates == [True]  # one bulk statement for the chunk
+    keys = sorted(key for (key,) in db_session.query(Article.canonical_url) if key)
+    assert keys == ["https://example.com/a", "https://example.com/b"]
+
+    # Done once: later calls neither scan nor key rows that were left NULL on purpose
+    db_session.execute(text("INSERT INTO articles (url, title, source) VALUES ('https://example.com/c', 't', 's')"))
+    db_session.commit()
+    assert crud.backfill_canonical_urls(db_session) == 0
+    assert db_session.query(Article).filter(Article.canonical_url.is_(None)).count() == 2
+
+def test_existing_articles_table_gains_the_column(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE articles (url VARCHAR PRIMARY KEY, title VARCHAR, source VARCHAR)"))
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.create_db_and_tables()
+
+    columns = {c["name"] for c in inspect(engine).get_columns("articles")}
+    assert "canonical_url" in columns
+    assert "ix_articles_canonical_url" in {i["name"] for i in inspect(engine).get_indexes("articles")}
@@ -0,0 +1,68 @@
+import pytest
+
+from app.database import Article
+from app.services.url_filter import BloomFilter, KnownURLFilter
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f"https://example.com/story/{i}" for i in range(1000)]
+    bloom.update(urls)
+    assert all(url in bloom for url in urls)
+    assert bloom.count == 1000
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    bloom.update(f"https://example.com/seen/{i}" for i in range(5000))
+    false_positives = sum(bloom.might_contain(f"https://example.com/unseen/{i}") for i in range(20000))
+    assert false_positives / 20000 < 0.02
+
+def test_bloom_filter_sizing():
+    bloom = BloomFilter(capacity=1_000_000, error_rate=0.01)
+    # ~9.6 bits per item and 7 hashes for a 1% error rate
+    assert 1_150_000 < bloom.size_bytes < 1_250_000
+    assert bloom.num_hashes == 7
+    assert not bloom.saturated
+
+def test_known_url_filter_warms_from_db(db_session):
+    db_session.add_all([Article(url=f"http://stored/{i}", title="t", source="s") for i in range(3)])
+    db_session.commit()
+
+    url_filter = KnownURLFilter(capacity=100)
+    assert url_filter.might_contain("http://anything")  # not warmed: everything must be checked
+    url_filter.warm(db_session)
+
+    assert url_filter.ready
+    assert url_filter.might_contain("https://stored/0")  # keyed by canonical URL
+    url_filter.add(["http://new/1"])
+    assert url_filter.might_contain("http://new/1")
+
+@pytest.mark.asyncio
+async def test_pipeline_dedup_only_checks_possible_positives(db_session):
+    from app.services.ingest_pipeline import IngestPipeline
+
+    db_session.add(Article(url="http://stored/1", title="t", source="s"))
+    db_session.commit()
+    url_filter = KnownURLFilter(capacity=100)
+    url_filter.warm(db_session)
+
+    pipeline = IngestPipeline(db=db_session, rss_feeds=[], include_newsapi=False, url_filter=url_filter)
+    queries = []
+    real_query = db_session.query
+    db_session.query = lambda *args: queries.append(args) or real_query(*args)
+    try:
+        new = await pipeline._dedup([
+            {"url": "http://stored/1", "canonical_url": "https://stored/1", "source_type": "rss"},
+            {"url": "http://fresh/1", "canonical_url": "https://fresh/1", "source_type": "rss"},
+        ])
+        assert [a["url"] for a in new] == ["http://fresh/1"]
+        assert len(queries) == 1
+
+        queries.clear()
+        new = await pipeline._dedup([
+            {"url": f"http://fresh/{i}", "canonical_url": f"https://fresh/{i}", "source_type": "rss"}
+            for i in range(2, 6)
+        ])
+        assert len(new) == 4
+        assert queries == []  # every URL was ruled out by the filter
+    finally:
+        db_session.query = real_query